@@ -7,6 +7,7 @@ from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from typing import Any, Dict, Optional
 from enum import Enum
+import sys
 import uuid
 import json
 
@@ -27,6 +28,19 @@ class Priority(Enum):
     URGENT = "urgent"
 
 
+# Wire value -> member maps so decoding skips the Enum call machinery
+_MESSAGE_TYPES = {member.value: member for member in MessageType}
+_PRIORITIES = {member.value: member for member in Priority}
+
+
+def _enum_member(members: Dict[str, Enum], value: str, enum_name: str) -> Enum:
+    """Look up an enum member by wire value, raising ValueError like Enum(value) does"""
+    try:
+        return members[value]
+    except KeyError:
+        raise ValueError(f"{value!r} is not a valid {enum_name}") from None
+
+
 @dataclass
 class A2AMessage:
     """
@@ -247,9 +261,14 @@ class A2AMessage:
         """
         # Convert string enums back to Enum types
         if isinstance(data.get('message_type'), str):
-            data['message_type'] = MessageType(data['message_type'])
+            data['message_type'] = _enum_member(_MESSAGE_TYPES, data['message_type'], 'MessageType')
         if isinstance(data.get('priority'), str):
-            data['priority'] = Priority(data['priority'])
+            data['priority'] = _enum_member(_PRIORITIES, data['priority'], 'Priority')
+        
+        # Intern the action name so receivers' action-table lookups hit the identity fast path
+        payload = data.get('payload')
+        if isinstance(payload, dict) and isinstance(payload.get('action'), str):
+            payload['action'] = sys.intern(payload['action'])
         
         return cls(**data)
 
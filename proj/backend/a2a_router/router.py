@@ -5,15 +5,31 @@ Routes messages between registered agents with history logging and error handlin
 
 import asyncio
 import logging
+import time
 from typing import Dict, Optional, Callable, List, Any
 from datetime import datetime
 from collections import deque
 import threading
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from ..a2a_protocol.a2a_message import A2AMessage, MessageType
 
 logger = logging.getLogger(__name__)
 
+# Timeout (seconds) for delivering a message to an agent's /a2a/message endpoint
+HTTP_DELIVERY_TIMEOUT = 30
+# Connect timeout (seconds): an agent that isn't up fails fast instead of
+# holding the caller for the full delivery timeout
+HTTP_CONNECT_TIMEOUT = 2
+# Failed connection attempts the transport retries (with a short backoff)
+# before delivery fails. This is the only retry on the HTTP path: reads and
+# error statuses aren't retried here, and _send_http makes a single delivery
+# attempt, so a request that reached the agent is never sent twice
+HTTP_CONNECT_RETRIES = 3
+
 
 class A2ARouter:
     """
@@ -35,6 +51,8 @@ class A2ARouter:
         self._lock = threading.RLock()
         self._async_handlers: Dict[str, Callable] = {}
         self._sync_handlers: Dict[str, Callable] = {}
+        # Keep-alive session for URL-registered agents, created on first HTTP delivery
+        self._session: Optional[requests.Session] = None
 
     def register_agent(
         self,
@@ -124,6 +142,100 @@ class A2ARouter:
         """
         return list(self._agents.keys())
 
+    def set_session(self, session: requests.Session) -> None:
+        """
+        Use the given session for HTTP delivery (e.g. one shared by a service).
+        
+        Args:
+            session: requests session to send messages with
+        """
+        with self._lock:
+            self._session = session
+
+    def _get_session(self) -> requests.Session:
+        """Pooled keep-alive session for HTTP delivery, created on first use"""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=16,
+                    pool_maxsize=32,
+                    max_retries=Retry(
+                        total=HTTP_CONNECT_RETRIES, connect=HTTP_CONNECT_RETRIES,
+                        read=0, status=0, redirect=0, backoff_factor=0.1
+                    )
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def _deliver_http(self, agent_url: str, message: A2AMessage) -> Optional[A2AMessage]:
+        """
+        POST a message to an agent's /a2a/message endpoint.
+        
+        Delivery failures (connection errors, timeouts) raise requests
+        exceptions; any HTTP reply, including a 5xx, is returned as an A2A message.
+        
+        Args:
+            agent_url: Base URL the agent registered with
+            message: A2A message to deliver
+            
+        Returns:
+            The agent's reply, or an error message if the reply isn't an A2A message
+        """
+        response = self._get_session().post(
+            f"{agent_url.rstrip('/')}/a2a/message",
+            data=message.to_json(),
+            headers={'Content-Type': 'application/json'},
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_DELIVERY_TIMEOUT)
+        )
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        
+        if isinstance(data, dict) and data.get('message_type'):
+            return A2AMessage.from_dict(data)
+        return A2AMessage.create_error(
+            sender_agent=message.recipient_agent,
+            recipient_agent=message.sender_agent,
+            error_message=(data.get('error') if isinstance(data, dict) else None) or f"HTTP {response.status_code}",
+            correlation_id=message.message_id
+        )
+
+    def _send_http(self, agent_url: str, message: A2AMessage) -> A2AMessage:
+        """
+        Deliver a message over HTTP exactly once.
+        
+        The POST is not repeated here: a timed-out request may already have
+        started a refresh or generation on the agent, so any delivery failure
+        is returned to the caller as an error message.
+        
+        Args:
+            agent_url: Base URL the agent registered with
+            message: A2A message to deliver
+            
+        Returns:
+            The agent's reply, or an error message if delivery failed
+        """
+        try:
+            response = self._deliver_http(agent_url, message)
+        except requests.RequestException as e:
+            logger.error(f"Error delivering message to {message.recipient_agent}: {e}")
+            error_msg = A2AMessage.create_error(
+                sender_agent="router",
+                recipient_agent=message.sender_agent,
+                error_message=f"Failed to deliver message: {str(e)}",
+                correlation_id=message.message_id
+            )
+            self._log_message(error_msg, "error")
+            return error_msg
+        
+        self._log_message(response, "incoming")
+        self._increment_message_count(message.recipient_agent)
+        return response
+
     def send_message(
         self,
         message: A2AMessage,
@@ -135,7 +247,8 @@ class A2ARouter:
         
         Args:
             message: A2A message to send
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts for an in-process handler
+                (HTTP delivery is attempted once, see _send_http)
             retry_delay: Delay between retries in seconds
             
         Returns:
@@ -169,23 +282,20 @@ class A2ARouter:
             self._log_message(error_msg, "error")
             return error_msg
         
+        if not handler:
+            return self._send_http(agent_info["url"], message)
+        
         # Try to deliver message
         for attempt in range(max_retries):
             try:
-                if handler:
-                    response = handler(message)
-                    if response:
-                        self._log_message(response, "incoming")
-                        self._agents[message.recipient_agent]["message_count"] += 1
-                    return response
-                else:
-                    # HTTP-based delivery would go here
-                    logger.warning(f"HTTP delivery not yet implemented for {message.recipient_agent}")
-                    return None
+                response = handler(message)
+                if response:
+                    self._log_message(response, "incoming")
+                    self._increment_message_count(message.recipient_agent)
+                return response
             except Exception as e:
                 logger.error(f"Error delivering message (attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt < max_retries - 1:
-                    import time
                     time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
                 else:
                     error_msg = A2AMessage.create_error(
@@ -210,7 +320,8 @@ class A2ARouter:
         
         Args:
             message: A2A message to send
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts for an in-process handler
+                (HTTP delivery is attempted once, see _send_http)
             retry_delay: Delay between retries in seconds
             
         Returns:
@@ -244,19 +355,18 @@ class A2ARouter:
             self._log_message(error_msg, "error")
             return error_msg
         
+        if not handler:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._send_http, agent_info["url"], message)
+        
         # Try to deliver message
         for attempt in range(max_retries):
             try:
-                if handler:
-                    response = await handler(message)
-                    if response:
-                        self._log_message(response, "incoming")
-                        self._agents[message.recipient_agent]["message_count"] += 1
-                    return response
-                else:
-                    # HTTP-based delivery would go here
-                    logger.warning(f"HTTP delivery not yet implemented for {message.recipient_agent}")
-                    return None
+                response = await handler(message)
+                if response:
+                    self._log_message(response, "incoming")
+                    self._increment_message_count(message.recipient_agent)
+                return response
             except Exception as e:
                 logger.error(f"Error delivering message (attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt < max_retries - 1:
@@ -273,6 +383,18 @@ class A2ARouter:
         
         return None
 
+    def _increment_message_count(self, agent_id: str) -> None:
+        """
+        Count a delivered message for an agent.
+        
+        Args:
+            agent_id: Agent that handled the message
+        """
+        with self._lock:
+            agent = self._agents.get(agent_id)
+            if agent:
+                agent["message_count"] += 1
+
     def _log_message(self, message: A2AMessage, direction: str) -> None:
         """
         Log a message to history.
@@ -286,7 +408,8 @@ class A2ARouter:
             "direction": direction,
             "message": message.to_dict()
         }
-        self._message_history.append(log_entry)
+        with self._lock:
+            self._message_history.append(log_entry)
         logger.debug(f"Message logged: {direction} - {message.message_id[:8]}")
 
     def get_message_history(
@@ -306,7 +429,9 @@ class A2ARouter:
         Returns:
             List of message log entries
         """
-        history = list(self._message_history)
+        # Snapshot under the lock: copying a deque while another thread appends raises
+        with self._lock:
+            history = list(self._message_history)
         
         # Apply filters
         if agent_id:
@@ -330,7 +455,8 @@ class A2ARouter:
 
     def clear_history(self) -> None:
         """Clear message history."""
-        self._message_history.clear()
+        with self._lock:
+            self._message_history.clear()
         logger.info("Message history cleared")
 
     def get_stats(self) -> Dict[str, Any]:
@@ -340,17 +466,18 @@ class A2ARouter:
         Returns:
             Dictionary with router statistics
         """
-        total_messages = sum(agent["message_count"] for agent in self._agents.values())
-        
-        return {
-            "total_agents": len(self._agents),
-            "total_messages": total_messages,
-            "history_size": len(self._message_history),
-            "agents": {
-                agent_id: {
-                    "message_count": agent["message_count"],
-                    "registered_at": agent["registered_at"]
+        with self._lock:
+            total_messages = sum(agent["message_count"] for agent in self._agents.values())
+            
+            return {
+                "total_agents": len(self._agents),
+                "total_messages": total_messages,
+                "history_size": len(self._message_history),
+                "agents": {
+                    agent_id: {
+                        "message_count": agent["message_count"],
+                        "registered_at": agent["registered_at"]
+                    }
+                    for agent_id, agent in self._agents.items()
                 }
-                for agent_id, agent in self._agents.items()
             }
-        }
@@ -3,9 +3,16 @@ Data Context Agent
 Worker agent for retrieving financial project context via A2A protocol
 """
 
-from typing import Dict, Any, Optional
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
 
+# Every /ask rebuilds the project's financial context over several A2A calls;
+# a summary built successfully is reused for this long
+_CONTEXT_SUMMARY_TTL_SECONDS = 60
+_CONTEXT_SUMMARY_MAX_PROJECTS = 128
+
 
 class DataContextAgent:
     """Worker agent for building financial context via A2A protocol"""
@@ -20,6 +27,10 @@ class DataContextAgent:
         """
         self.a2a_router = a2a_router
         self.anomaly_agent = anomaly_agent
+        
+        # project_id -> (built_at, summary) for build_context_summary()
+        self._summary_cache: Dict[str, Tuple[float, str]] = {}
+        self._summary_cache_lock = threading.Lock()
     
     def get_full_context(self, project_id: str) -> Dict[str, Any]:
         """
@@ -257,17 +268,35 @@ class DataContextAgent:
         """
         Build a text summary of financial context
         
+        A summary built in the last _CONTEXT_SUMMARY_TTL_SECONDS is reused;
+        failures are not cached, so the next call tries again.
+        
         Args:
             project_id: Project identifier
             
         Returns:
             Text summary of context
         """
+        with self._summary_cache_lock:
+            entry = self._summary_cache.get(project_id)
+        if entry and time.monotonic() - entry[0] < _CONTEXT_SUMMARY_TTL_SECONDS:
+            return entry[1]
+        
         context = self.get_full_context(project_id)
         
         if not context.get('success'):
             return "Unable to retrieve financial context"
         
+        summary = self._format_context_summary(context)
+        with self._summary_cache_lock:
+            self._summary_cache.pop(project_id, None)
+            self._summary_cache[project_id] = (time.monotonic(), summary)
+            while len(self._summary_cache) > _CONTEXT_SUMMARY_MAX_PROJECTS:
+                self._summary_cache.pop(next(iter(self._summary_cache)))
+        return summary
+    
+    def _format_context_summary(self, context: Dict[str, Any]) -> str:
+        """Text summary of a successful get_full_context() result"""
         summary_parts = []
         
         # Budget
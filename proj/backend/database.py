@@ -1,12 +1,19 @@
 import json
 import os
-from typing import List, Dict, Optional
+import threading
+from typing import List, Dict, Optional, Tuple
 
 class DatabaseManager:
+    # Serializes read-modify-write of the JSON files across request threads; shared
+    # because services build several DatabaseManager instances over the same files
+    _lock = threading.RLock()
+
     def __init__(self):
         self.data_dir = 'data'
         self.projects_file = os.path.join(self.data_dir, 'projects.json')
         self.documents_file = os.path.join(self.data_dir, 'documents.json')
+        # filepath -> ((inode, mtime_ns, size), parsed records); reparsed only when the file changes
+        self._file_cache: Dict[str, Tuple[Tuple[int, int, int], List[Dict]]] = {}
         self._ensure_data_directory()
         self._initialize_files()
 
@@ -25,25 +32,57 @@ class DatabaseManager:
             with open(self.documents_file, 'w') as f:
                 json.dump([], f)
 
+    @staticmethod
+    def _file_signature(filepath: str) -> Optional[Tuple[int, int, int]]:
+        """
+        (inode, mtime_ns, size) of a file, or None if it doesn't exist
+        
+        _write_json replaces the file, so every write gets a new inode and is
+        detected even within one mtime tick at an unchanged size.
+        """
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
     def _read_json(self, filepath: str) -> List[Dict]:
-        """Read JSON data from file"""
+        """Read JSON data from file (shared parsed copy; callers must not mutate it)"""
+        signature = self._file_signature(filepath)
+        if signature is None:
+            return []
+        
+        cached = self._file_cache.get(filepath)
+        if cached and cached[0] == signature:
+            return cached[1]
+        
         try:
             with open(filepath, 'r') as f:
-                return json.load(f)
+                data = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             return []
+        self._file_cache[filepath] = (signature, data)
+        return data
 
     def _write_json(self, filepath: str, data: List[Dict]):
-        """Write JSON data to file"""
-        with open(filepath, 'w') as f:
+        """Write JSON data to file (via a temp file, so readers never see a partial write)"""
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp_path, filepath)
+        signature = self._file_signature(filepath)
+        if signature is not None:
+            self._file_cache[filepath] = (signature, data)
+
+    def _append_record(self, filepath: str, record: Dict):
+        """Append a record to a JSON file without losing concurrent appends"""
+        with self._lock:
+            self._write_json(filepath, self._read_json(filepath) + [record])
 
     def create_project(self, project_data: Dict) -> bool:
         """Create a new project"""
         try:
-            projects = self._read_json(self.projects_file)
-            projects.append(project_data)
-            self._write_json(self.projects_file, projects)
+            self._append_record(self.projects_file, project_data)
             return True
         except Exception as e:
             print(f"Error creating project: {e}")
@@ -54,12 +93,12 @@ class DatabaseManager:
         projects = self._read_json(self.projects_file)
         for project in projects:
             if project['id'] == project_id:
-                return project
+                return dict(project)
         return None
 
     def get_all_projects(self) -> List[Dict]:
         """Get all projects"""
-        return self._read_json(self.projects_file)
+        return [dict(project) for project in self._read_json(self.projects_file)]
 
     def search_projects(self, query: str) -> List[Dict]:
         """Search projects by name or ID"""
@@ -70,16 +109,14 @@ class DatabaseManager:
         for project in projects:
             if (query_lower in project['name'].lower() or 
                 query_lower in project['id'].lower()):
-                results.append(project)
+                results.append(dict(project))
         
         return results
 
     def create_document(self, document_data: Dict) -> bool:
         """Create a new document record"""
         try:
-            documents = self._read_json(self.documents_file)
-            documents.append(document_data)
-            self._write_json(self.documents_file, documents)
+            self._append_record(self.documents_file, document_data)
             return True
         except Exception as e:
             print(f"Error creating document: {e}")
@@ -88,14 +125,14 @@ class DatabaseManager:
     def get_project_documents(self, project_id: str) -> List[Dict]:
         """Get all documents for a specific project"""
         documents = self._read_json(self.documents_file)
-        return [doc for doc in documents if doc['project_id'] == project_id]
+        return [dict(doc) for doc in documents if doc['project_id'] == project_id]
 
     def get_document(self, document_id: str) -> Optional[Dict]:
         """Get a specific document by ID"""
         documents = self._read_json(self.documents_file)
         for document in documents:
             if document['id'] == document_id:
-                return document
+                return dict(document)
         return None
 
 
@@ -284,4 +284,23 @@ class EmbeddingsManager:
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return None
+    
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts in one batched model call.
+        Prefer this over calling get_embedding() in a loop.
+        
+        Args:
+            texts: Text strings to embed
+            
+        Returns:
+            One embedding per text (in order), or None on failure
+        """
+        try:
+            if not texts:
+                return []
+            return self.model.encode(texts).tolist()
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
+            return None
 
@@ -8,10 +8,41 @@ from backend.chromadb_patch import chromadb
 import re
 import json
 import uuid
+import time
+import threading
+import numpy as np
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from sentence_transformers import SentenceTransformer
 
+# Shared stand-in for items stored without metadata
+_EMPTY_METADATA = {}
+
+# Transaction type codes used in get_transaction_columns()
+TRANSACTION_EXPENSE = 0
+TRANSACTION_REVENUE = 1
+TRANSACTION_OTHER = 2
+_TRANSACTION_TYPE_CODES = {'expense': TRANSACTION_EXPENSE, 'revenue': TRANSACTION_REVENUE}
+
+# Parsed transaction columns are reused for this long (other processes may write
+# transactions too), and for at most this many projects
+_TRANSACTION_COLUMNS_TTL_SECONDS = 60
+_TRANSACTION_COLUMNS_MAX_PROJECTS = 128
+
+
+def _transaction_columns(metadatas: List[Dict]) -> Dict[str, np.ndarray]:
+    """Amount (float64) and type code (uint8) columns for transaction metadata"""
+    count = len(metadatas)
+    return {
+        'amounts': np.fromiter(
+            (float(m.get('amount') or 0) for m in metadatas), dtype=np.float64, count=count
+        ),
+        'transaction_types': np.fromiter(
+            (_TRANSACTION_TYPE_CODES.get(m.get('transaction_type'), TRANSACTION_OTHER) for m in metadatas),
+            dtype=np.uint8, count=count
+        )
+    }
+
 
 class FinancialChromaManager:
     """Centralized ChromaDB manager for Financial Agent system"""
@@ -44,30 +75,42 @@ class FinancialChromaManager:
             'actor_transaction_mappings': 'project_actor_transaction_mappings'
         }
         
+        # Collection objects by type, filled at init so lookups skip the client
+        self._collection_objs = {}
+        
+        # project_id -> (loaded_at, columns) for get_transaction_columns()
+        self._transaction_columns = {}
+        self._transaction_columns_lock = threading.Lock()
+        
         # Initialize financial collections
         self._initialize_financial_collections()
     
     def _initialize_financial_collections(self):
         """Initialize all financial agent collections"""
         try:
-            for collection_type, collection_name in self.collections.items():
-                self.client.get_or_create_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function,
-                    metadata={"description": f"Financial {collection_type} storage"}
-                )
+            for collection_type in self.collections:
+                self._bootstrap_collection(collection_type)
             print("✅ Financial ChromaDB collections initialized")
         except Exception as e:
             print(f"Error initializing financial collections: {e}")
     
+    def _bootstrap_collection(self, collection_type: str):
+        """Get or create a collection and cache the reference"""
+        collection = self.client.get_or_create_collection(
+            name=self.collections[collection_type],
+            embedding_function=self.embedding_function,
+            metadata={"description": f"Financial {collection_type} storage"}
+        )
+        self._collection_objs[collection_type] = collection
+        return collection
+    
     def get_financial_collection(self, collection_type: str):
         """Get financial agent collection"""
         try:
             if collection_type not in self.collections:
                 raise ValueError(f"Invalid collection type: {collection_type}")
             
-            collection_name = self.collections[collection_type]
-            return self.client.get_collection(name=collection_name)
+            return self._collection_objs.get(collection_type) or self._bootstrap_collection(collection_type)
         except Exception as e:
             print(f"Error getting financial collection {collection_type}: {e}")
             return None
@@ -91,7 +134,6 @@ class FinancialChromaManager:
             ids = []
             documents = []
             metadatas = []
-            embeddings = []
             
             for item in data:
                 # Generate unique ID using UUID to avoid collisions
@@ -101,14 +143,10 @@ class FinancialChromaManager:
                     item_id = f"{collection_type}_{project_id[:8]}_{str(uuid.uuid4())[:8]}"
                 ids.append(item_id)
                 
-                # Document text for embedding
+                # Document text for embedding (encoded in one batch below)
                 doc_text = item.get('text', item.get('description', str(item)))
                 documents.append(doc_text)
                 
-                # Generate embedding
-                embedding = self.model.encode(doc_text).tolist()
-                embeddings.append(embedding)
-                
                 # Metadata - convert lists/dicts to JSON strings for ChromaDB compatibility
                 raw_metadata = item.get('metadata', {})
                 raw_metadata['project_id'] = project_id
@@ -130,12 +168,15 @@ class FinancialChromaManager:
             
             # Store in ChromaDB
             if ids:
+                embeddings = self.model.encode(documents).tolist()
                 collection.add(
                     ids=ids,
                     documents=documents,
                     embeddings=embeddings,
                     metadatas=metadatas
                 )
+                if collection_type == 'transactions':
+                    self._invalidate_transaction_columns(project_id)
                 print(f"✅ Stored {len(ids)} items in {collection_type}")
                 return True
             
@@ -210,6 +251,63 @@ class FinancialChromaManager:
             print(f"Error getting financial data: {e}")
             return []
     
+    def get_transaction_columns(self, project_id: str) -> Dict[str, np.ndarray]:
+        """
+        Get a project's transaction amounts and types as parallel arrays
+        
+        Only metadata is fetched (no documents or embeddings), and the parsed
+        columns are kept per project until transactions are written through
+        this manager (or _TRANSACTION_COLUMNS_TTL_SECONDS pass).
+        
+        Args:
+            project_id: Project identifier
+            
+        Returns:
+            Dict with 'amounts' (float64) and 'transaction_types' (uint8
+            TRANSACTION_EXPENSE / TRANSACTION_REVENUE / TRANSACTION_OTHER) arrays
+        """
+        with self._transaction_columns_lock:
+            entry = self._transaction_columns.get(project_id)
+        if entry and time.monotonic() - entry[0] < _TRANSACTION_COLUMNS_TTL_SECONDS:
+            return entry[1]
+        
+        try:
+            collection = self.get_financial_collection('transactions')
+            if not collection:
+                return _transaction_columns([])
+            
+            results = collection.get(where={"project_id": project_id}, include=['metadatas'])
+            metadatas = [m or _EMPTY_METADATA for m in (results.get('metadatas') or [])]
+            columns = _transaction_columns(metadatas)
+            
+            with self._transaction_columns_lock:
+                self._transaction_columns.pop(project_id, None)
+                self._transaction_columns[project_id] = (time.monotonic(), columns)
+                while len(self._transaction_columns) > _TRANSACTION_COLUMNS_MAX_PROJECTS:
+                    self._transaction_columns.pop(next(iter(self._transaction_columns)))
+            return columns
+            
+        except Exception as e:
+            print(f"Error getting transaction columns: {e}")
+            return _transaction_columns([])
+    
+    def _invalidate_transaction_columns(self, project_id: Optional[str] = None):
+        """
+        Drop cached transaction columns after a write.
+        
+        The columns are reloaded rather than patched: add() skips ids that
+        already exist, so the rows a write actually changed aren't known here.
+        
+        Args:
+            project_id: Project written to; None drops every project's columns
+                (updates and deletes only carry the item id)
+        """
+        with self._transaction_columns_lock:
+            if project_id is None:
+                self._transaction_columns.clear()
+            else:
+                self._transaction_columns.pop(project_id, None)
+    
     def query_financial_data(self, collection_type: str, query_text: str, 
                             project_id: str, n_results: int = 10) -> List[Dict]:
         """
@@ -285,6 +383,8 @@ class FinancialChromaManager:
                 embeddings=[embedding],
                 metadatas=[metadata]
             )
+            if collection_type == 'transactions':
+                self._invalidate_transaction_columns()
             
             return True
             
@@ -300,6 +400,8 @@ class FinancialChromaManager:
                 return False
             
             collection.delete(ids=[item_id])
+            if collection_type == 'transactions':
+                self._invalidate_transaction_columns()
             return True
             
         except Exception as e:
@@ -7,6 +7,7 @@ from typing import Dict, Any
 from ..agents.expense_agent import ExpenseAgent
 from ..agents.revenue_agent import RevenueAgent
 from ..agents.anomaly_detection_agent import AnomalyDetectionAgent
+from backend.refresh_progress import clear_refresh_progress
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType, Priority
 
 
@@ -229,6 +230,7 @@ def update_timestamp_node(state: Dict[str, Any]) -> Dict[str, Any]:
         }
         with open(update_file, 'w') as f:
             json.dump(data, f, indent=2)
+        clear_refresh_progress(financial_data_dir, project_id)
         
         state["refresh_result"]["timestamp_updated"] = True
         state["success"] = True
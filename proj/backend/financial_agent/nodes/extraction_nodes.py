@@ -6,6 +6,7 @@ Node functions that wrap worker agent extraction methods.
 from typing import Dict, Any
 from ..agents.financial_details_agent import FinancialDetailsAgent
 from ..agents.transaction_agent import TransactionAgent
+from backend.refresh_progress import load_refresh_progress, save_refresh_progress
 
 
 def extract_details_node(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -114,22 +115,31 @@ def extract_from_new_docs_node(state: Dict[str, Any]) -> Dict[str, Any]:
         details_agent = FinancialDetailsAgent(chroma_manager)
         transaction_agent = TransactionAgent(chroma_manager)
         
-        # Process each new document
+        # Process each new document, skipping steps an earlier refresh already completed.
+        # Failed steps aren't recorded, so an interrupted refresh retries them
+        data_dir = state.get("financial_data_dir", "data/financial")
+        completed_steps = load_refresh_progress(data_dir, project_id)
+        failed_steps = []
         for document in new_documents:
             document_id = document['id']
             
-            # Extract details
-            details_agent.extract_financial_details(
-                project_id, document_id, llm_manager, embeddings_manager
-            )
-            
-            # Extract transactions
-            transaction_agent.extract_transactions(
-                project_id, document_id, llm_manager, embeddings_manager
-            )
+            for step, extract in (
+                ("details", details_agent.extract_financial_details),
+                ("transactions", transaction_agent.extract_transactions)
+            ):
+                step_key = f"{document_id}:{step}"
+                if step_key in completed_steps:
+                    continue
+                result = extract(project_id, document_id, llm_manager, embeddings_manager)
+                if not result.get('success'):
+                    failed_steps.append(step_key)
+                    continue
+                completed_steps.add(step_key)
+                save_refresh_progress(data_dir, project_id, completed_steps)
         
         state["refresh_result"] = {
             'documents_processed': len(new_documents),
+            'failed_steps': failed_steps,
             'success': True
         }
         return state
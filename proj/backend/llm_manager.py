@@ -7,6 +7,7 @@ import json
 from typing import List, Dict, Any, Optional
 import os
 import time
+import threading
 from google.generativeai import GenerativeModel
 import google.generativeai as genai
 
@@ -22,6 +23,7 @@ class LLMManager:
 
         self.gemini_model = None
         self.last_gemini_call_time = 0  # Track last Gemini API call time for rate limiting
+        self._rate_limit_lock = threading.Lock()  # Keeps rate limiting correct when called from worker threads
         
         # Hugging Face Inference API - router chat model (available)
         # Use a widely available router model for reliability
@@ -294,14 +296,15 @@ Response:"""
                 }
             
             # Rate limiting: 15 second delay between Gemini API calls
-            current_time = time.time()
-            time_since_last_call = current_time - self.last_gemini_call_time
-            if time_since_last_call < 15:
-                delay_needed = 15 - time_since_last_call
-                print(f"  ⏳ Rate limiting: waiting {delay_needed:.1f} seconds before Gemini API call...")
-                time.sleep(delay_needed)
-            
-            self.last_gemini_call_time = time.time()
+            with self._rate_limit_lock:
+                current_time = time.time()
+                time_since_last_call = current_time - self.last_gemini_call_time
+                if time_since_last_call < 15:
+                    delay_needed = 15 - time_since_last_call
+                    print(f"  ⏳ Rate limiting: waiting {delay_needed:.1f} seconds before Gemini API call...")
+                    time.sleep(delay_needed)
+                
+                self.last_gemini_call_time = time.time()
             
             # Configure generation parameters for better performance
             generation_config = {
@@ -374,14 +377,15 @@ Response:"""
                 }
             
             # Rate limiting: 2 second delay between Hugging Face API calls
-            current_time = time.time()
-            time_since_last_call = current_time - self.last_huggingface_call_time
-            if time_since_last_call < 2:
-                delay_needed = 2 - time_since_last_call
-                print(f"  ⏳ Rate limiting: waiting {delay_needed:.1f} seconds before Hugging Face API call...")
-                time.sleep(delay_needed)
-            
-            self.last_huggingface_call_time = time.time()
+            with self._rate_limit_lock:
+                current_time = time.time()
+                time_since_last_call = current_time - self.last_huggingface_call_time
+                if time_since_last_call < 2:
+                    delay_needed = 2 - time_since_last_call
+                    print(f"  ⏳ Rate limiting: waiting {delay_needed:.1f} seconds before Hugging Face API call...")
+                    time.sleep(delay_needed)
+                
+                self.last_huggingface_call_time = time.time()
             
             # Prepare headers with required API key
             headers = {
@@ -39,13 +39,16 @@ class OrchestratorAgent:
             # Get function descriptions from registry
             descriptions = self.registry.get_function_descriptions(agent_name)
             
-            for func_name, func_desc in descriptions.items():
-                # Generate embedding for this function description
-                try:
-                    embedding = self.embeddings_manager.get_embedding(func_desc)
+            # Embed all of this agent's function descriptions in one batch
+            try:
+                func_names = list(descriptions)
+                embeddings = self.embeddings_manager.get_embeddings([descriptions[name] for name in func_names])
+                if embeddings is None:
+                    embeddings = [None] * len(func_names)
+                for func_name, embedding in zip(func_names, embeddings):
                     self.function_embeddings[agent_name][func_name] = embedding
-                except Exception as e:
-                    print(f"   ⚠️ Failed to generate embedding for {agent_name}.{func_name}: {e}")
+            except Exception as e:
+                print(f"   ⚠️ Failed to generate embeddings for {agent_name}: {e}")
                 
         print(f"✅ Initialized embeddings for {len(self.function_embeddings)} agents")
     
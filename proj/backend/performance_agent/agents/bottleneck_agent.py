@@ -315,6 +315,7 @@ Extract bottlenecks now:"""
                 metadata = {
                     'project_id': project_id,
                     'document_id': document_id,
+                    'type': 'bottleneck',  # Distinguishes from bottleneck_suggestion rows in the same collection
                     'bottleneck_text': bottleneck_text,
                     'category': bottleneck['category'],
                     'severity': bottleneck['severity'],
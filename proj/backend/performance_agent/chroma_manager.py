@@ -47,6 +47,9 @@ class PerformanceChromaManager:
             'actors_details': 'project_actors_details'
         }
         
+        # Collection objects by type, filled at init so lookups skip the client
+        self._collection_objs = {}
+        
         # Initialize performance collections
         self._initialize_performance_collections()
     
@@ -70,15 +73,21 @@ class PerformanceChromaManager:
     def _initialize_performance_collections(self):
         """Initialize all performance agent collections"""
         try:
-            for collection_type, collection_name in self.collections.items():
-                self.client.get_or_create_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function,
-                    metadata={"description": f"Project {collection_type} storage"}
-                )
+            for collection_type in self.collections:
+                self._bootstrap_collection(collection_type)
         except Exception as e:
             print(f"Error initializing performance collections: {e}")
     
+    def _bootstrap_collection(self, collection_type: str):
+        """Get or create a collection and cache the reference"""
+        collection = self.client.get_or_create_collection(
+            name=self.collections[collection_type],
+            embedding_function=self.embedding_function,
+            metadata={"description": f"Project {collection_type} storage"}
+        )
+        self._collection_objs[collection_type] = collection
+        return collection
+    
     def get_document_collection(self, project_id: str, document_id: str):
         """Get document collection with proper error handling"""
         try:
@@ -94,8 +103,7 @@ class PerformanceChromaManager:
             if collection_type not in self.collections:
                 raise ValueError(f"Invalid collection type: {collection_type}")
             
-            collection_name = self.collections[collection_type]
-            return self.client.get_collection(name=collection_name)
+            return self._collection_objs.get(collection_type) or self._bootstrap_collection(collection_type)
         except Exception as e:
             print(f"Error getting performance collection {collection_type}: {e}")
             return None
@@ -152,14 +160,17 @@ class PerformanceChromaManager:
             if not collection:
                 return 0
             
+            # Embed every item's text in one batched model call
+            texts = [item.get('text', '') for item in data]
+            embeddings = self.model.encode(texts).tolist() if texts else []
+            
             stored_count = 0
             for i, item in enumerate(data):
                 # Use provided ID if present, otherwise generate
                 item_id = item.get('id') or f"{collection_type}_{project_id}_{document_id}_{i}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 
-                # Create embedding
-                text_content = item.get('text', '')
-                embedding = self.model.encode([text_content]).tolist()[0]
+                text_content = texts[i]
+                embedding = embeddings[i]
                 
                 # Prepare metadata - convert lists/dicts to JSON strings for ChromaDB compatibility
                 raw_metadata = {
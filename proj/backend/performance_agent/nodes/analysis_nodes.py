@@ -7,6 +7,7 @@ from typing import Dict, Any
 from ..agents.milestone_agent import MilestoneAgent
 from ..agents.task_agent import TaskAgent
 from ..agents.bottleneck_agent import BottleneckAgent
+from backend.refresh_progress import clear_refresh_progress
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
 
 
@@ -316,6 +317,7 @@ def recalculate_completion_node(state: Dict[str, Any]) -> Dict[str, Any]:
         }
         with open(update_file, 'w') as f:
             json.dump(data, f, indent=2)
+        clear_refresh_progress(performance_data_dir, project_id)
         
         state["refresh_result"]["completion_recalculated"] = True
         state["refresh_result"]["completion_score"] = completion_score
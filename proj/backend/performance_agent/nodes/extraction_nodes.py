@@ -9,6 +9,7 @@ from ..agents.task_agent import TaskAgent
 from ..agents.bottleneck_agent import BottleneckAgent
 from ..agents.requirements_agent import RequirementsAgent
 from ..agents.actors_agent import ActorsAgent
+from backend.refresh_progress import load_refresh_progress, save_refresh_progress
 
 
 def extract_milestones_node(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -206,37 +207,34 @@ def extract_from_new_docs_node(state: Dict[str, Any]) -> Dict[str, Any]:
         requirements_agent = RequirementsAgent(chroma_manager)
         actors_agent = ActorsAgent(chroma_manager)
         
-        # Process each new document
+        # Process each new document, skipping steps an earlier refresh already completed.
+        # Failed steps aren't recorded, so an interrupted refresh retries them
+        data_dir = state.get("performance_data_dir", "data/performance")
+        completed_steps = load_refresh_progress(data_dir, project_id)
+        failed_steps = []
         for document in new_documents:
             document_id = document['id']
             
-            # Extract milestones
-            milestone_agent.extract_milestones_from_document(
-                project_id, document_id, llm_manager
-            )
-            
-            # Extract tasks
-            task_agent.extract_tasks_from_document(
-                project_id, document_id, llm_manager
-            )
-            
-            # Extract bottlenecks
-            bottleneck_agent.extract_bottlenecks_from_document(
-                project_id, document_id, llm_manager
-            )
-            
-            # Extract requirements
-            requirements_agent.extract_requirements_from_document(
-                project_id, document_id, llm_manager
-            )
-
-            # Extract actors
-            actors_agent.extract_actors_from_document(
-                project_id, document_id, llm_manager
-            )
+            for step, extract in (
+                ("milestones", milestone_agent.extract_milestones_from_document),
+                ("tasks", task_agent.extract_tasks_from_document),
+                ("bottlenecks", bottleneck_agent.extract_bottlenecks_from_document),
+                ("requirements", requirements_agent.extract_requirements_from_document),
+                ("actors", actors_agent.extract_actors_from_document)
+            ):
+                step_key = f"{document_id}:{step}"
+                if step_key in completed_steps:
+                    continue
+                result = extract(project_id, document_id, llm_manager)
+                if not result.get('success'):
+                    failed_steps.append(step_key)
+                    continue
+                completed_steps.add(step_key)
+                save_refresh_progress(data_dir, project_id, completed_steps)
         
         state["refresh_result"] = {
             'documents_processed': len(new_documents),
+            'failed_steps': failed_steps,
             'success': True
         }
         return state
@@ -0,0 +1,48 @@
+"""
+Refresh Progress
+Per-step progress of an agent's refresh graph.
+
+Each (document, extraction step) a refresh completes successfully is recorded
+in {project_id}_refresh_progress.json in the agent's data directory, so a
+refresh that stopped part way is resumed by the next one instead of re-running
+(and re-storing) the extractions that already completed. The file is removed
+once the refresh records its new last_update timestamp.
+"""
+
+import os
+import json
+from typing import Set
+
+
+def _refresh_progress_file(data_dir: str, project_id: str) -> str:
+    return os.path.join(data_dir, f"{project_id}_refresh_progress.json")
+
+
+def load_refresh_progress(data_dir: str, project_id: str) -> Set[str]:
+    """Extraction steps ("document_id:step") completed by an unfinished refresh"""
+    progress_file = _refresh_progress_file(data_dir, project_id)
+    if not os.path.exists(progress_file):
+        return set()
+    try:
+        with open(progress_file, 'r') as f:
+            return set(json.load(f).get('completed_steps', []))
+    except (OSError, ValueError):
+        return set()
+
+
+def save_refresh_progress(data_dir: str, project_id: str, completed_steps: Set[str]):
+    """Persist the extraction steps completed so far in this refresh"""
+    progress_file = _refresh_progress_file(data_dir, project_id)
+    os.makedirs(data_dir or '.', exist_ok=True)
+    with open(progress_file, 'w') as f:
+        json.dump({
+            'project_id': project_id,
+            'completed_steps': sorted(completed_steps)
+        }, f, indent=2)
+
+
+def clear_refresh_progress(data_dir: str, project_id: str):
+    """Forget refresh progress once the refresh has finished"""
+    progress_file = _refresh_progress_file(data_dir, project_id)
+    if os.path.exists(progress_file):
+        os.remove(progress_file)
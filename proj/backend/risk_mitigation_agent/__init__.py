@@ -3,8 +3,8 @@ Risk Mitigation Agent Package
 Provides risk analysis, prediction, and mitigation strategies for projects.
 """
 
-from .risk_mitigation_agent import RiskMitigationAgent
+from .risk_mitigation_agent import RiskMitigationAgent, RiskDataMissing
 from .chroma_manager import RiskChromaManager
 
-__all__ = ['RiskMitigationAgent', 'RiskChromaManager']
+__all__ = ['RiskMitigationAgent', 'RiskDataMissing', 'RiskChromaManager']
 
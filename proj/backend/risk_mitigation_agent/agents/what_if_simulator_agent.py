@@ -3,10 +3,106 @@ What If Scenario Simulator Agent
 Worker agent for risk mitigation that fetches bottlenecks, orders them, and provides mitigation suggestions
 """
 
+import asyncio
+import hashlib
 import json
+import logging
+import re
+import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Optional, Tuple
 from backend.chromadb_patch import chromadb
+from backend.service_utils import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# orjson is an optional speedup; fall back to stdlib json when it's missing.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers keep
+# catching json.JSONDecodeError either way.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj, indent: bool = False) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj, indent: bool = False) -> str:
+        return json.dumps(obj, indent=2 if indent else None)
+
+
+# Markdown code fences LLMs wrap around JSON responses
+_FENCE_RE = re.compile(r'^\s*```(?:json)?|```\s*$')
+
+# Impact values that mark a bottleneck as needing LLM impact enhancement
+_UNKNOWN_IMPACTS = frozenset(['unknown impact', 'unknown', ''])
+
+# Prefixes added to bottleneck IDs by the enhanced/raw storage paths
+_BOTTLENECK_ID_PREFIX_RE = re.compile(r'^(enhanced_|raw_)')
+
+
+# Semantic consequence cache: reuse an analysis for a near-identical bottleneck
+# title (squared L2 0.16 == cosine distance 0.08 on normalized embeddings)
+_SEMANTIC_CACHE_MAX_DISTANCE = 0.16
+_SEMANTIC_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Graph node colors by severity (read-only)
+_SEVERITY_COLORS = {
+    'High': {'background': '#fee2e2', 'border': '#dc2626'},  # red
+    'Medium': {'background': '#fed7aa', 'border': '#ea580c'},  # orange
+    'Low': {'background': '#fef3c7', 'border': '#d97706'}  # yellow
+}
+
+# Shared edge styling for the ordering flow (read-only)
+_EDGE_ARROWS = {
+    'to': {
+        'enabled': True,
+        'scaleFactor': 1.2,
+        'type': 'arrow'
+    }
+}
+_EDGE_COLOR = {
+    'color': '#94a3b8',
+    'highlight': '#64748b',
+    'hover': '#475569'
+}
+_EDGE_SMOOTH = {
+    'type': 'curvedCW',
+    'roundness': 0.5
+}
+
+
+def _bottleneck_id_base(bottleneck_id: str) -> str:
+    """Bottleneck ID with any enhanced_/raw_ storage prefix stripped"""
+    return _BOTTLENECK_ID_PREFIX_RE.sub('', bottleneck_id)
+
+
+def format_titles_context(bottleneck_titles: List[str]) -> str:
+    """Bullet list of bottleneck titles used as context in consequence prompts"""
+    return '\n'.join(f"- {title}" for title in bottleneck_titles)
+
+
+def titles_prompt_hash(bottleneck_titles: List[str]):
+    """blake2b state over the project's sorted titles; copy() and update() it per bottleneck"""
+    return hashlib.blake2b('||'.join(sorted(bottleneck_titles)).encode(), digest_size=16)
+
+
+def prompt_key(titles_hash, bottleneck_title: str) -> str:
+    """Key identifying the prompt inputs (bottleneck title + project titles) of a stored analysis"""
+    key_hash = titles_hash.copy()
+    key_hash.update(b'|' + bottleneck_title.encode())
+    return key_hash.hexdigest()
+
+
+def _is_valid_bottleneck(bottleneck_text: str, metadata: Dict) -> bool:
+    """Actual bottlenecks are typed 'bottleneck' (or untyped legacy rows) and have non-empty text"""
+    if metadata.get('type', '') not in ('', 'bottleneck'):
+        return False
+    return bool(bottleneck_text) and bottleneck_text.strip() != '' and bottleneck_text != 'Unknown Bottleneck'
 
 
 class WhatIfSimulatorAgent:
@@ -22,31 +118,39 @@ class WhatIfSimulatorAgent:
         """
         self.chroma_manager = chroma_manager
         self.performance_chroma_manager = performance_chroma_manager
+        
+        # project_id -> {bottleneck_id: stored consequence item}, invalidated on write
+        self._consequence_cache: Dict[str, Dict[str, Dict]] = {}
+        
+        # Concurrent callers analyzing the same bottleneck with the same inputs share one LLM call
+        self._inflight = SingleFlight()
     
     def _get_cached_bottlenecks(self, project_id: str) -> List[Dict]:
         """Get cached enhanced bottlenecks from ChromaDB"""
         try:
             cached_data = self.chroma_manager.get_risk_data('enhanced_bottlenecks', project_id)
-            if not cached_data:
-                return []
-            
-            bottlenecks = []
-            for item in cached_data:
-                metadata = item.get('metadata', {})
-                bottlenecks.append({
-                    'id': metadata.get('bottleneck_id', ''),
-                    'bottleneck': item.get('content', ''),
-                    'category': metadata.get('category', 'General'),
-                    'severity': metadata.get('severity', 'Medium'),
-                    'impact': metadata.get('impact', 'Unknown impact'),
-                    'created_at': metadata.get('created_at', ''),
-                    'source_document': metadata.get('source_document', '')
-                })
-            return bottlenecks
-        except Exception as e:
-            print(f"Error retrieving cached bottlenecks: {e}")
+            return self.bottlenecks_from_cache_rows(cached_data)
+        except Exception:
+            logger.exception("Error retrieving cached bottlenecks")
             return []
     
+    @staticmethod
+    def bottlenecks_from_cache_rows(cached_data: List[Dict]) -> List[Dict]:
+        """Convert 'enhanced_bottlenecks' rows from RiskChromaManager into bottleneck dicts"""
+        return [
+            {
+                'id': metadata.get('bottleneck_id', ''),
+                'bottleneck': item.get('content', ''),
+                'category': metadata.get('category', 'General'),
+                'severity': metadata.get('severity', 'Medium'),
+                'impact': metadata.get('impact', 'Unknown impact'),
+                'created_at': metadata.get('created_at', ''),
+                'source_document': metadata.get('source_document', '')
+            }
+            for item in cached_data
+            for metadata in (item.get('metadata', {}),)
+        ]
+    
     def _cache_bottlenecks(self, project_id: str, bottlenecks: List[Dict]):
         """Cache enhanced bottlenecks in ChromaDB"""
         try:
@@ -108,60 +212,52 @@ class WhatIfSimulatorAgent:
                 try:
                     print("   📂 Direct ChromaDB access to bottlenecks collection...")
                     # Get all items from bottlenecks collection
-                    from backend.chromadb_patch import chromadb
                     bottlenecks_collection = self.performance_chroma_manager.client.get_collection(
                         name='project_bottlenecks',
                         embedding_function=self.performance_chroma_manager.embedding_function
                     )
                     
-                    # Query for project bottlenecks
-                    results = bottlenecks_collection.query(
-                        query_embeddings=[[0.0] * 384],  # Dummy query to get all
+                    # Get every row for the project and filter on type in Python: rows
+                    # stored before bottlenecks were typed have no 'type' key, which
+                    # Chroma's where filter cannot match, and they can sit alongside typed ones
+                    results = bottlenecks_collection.get(
                         where={"project_id": project_id},
-                        n_results=1000
+                        include=['documents', 'metadatas']  # Skip embeddings we never read
                     )
                     
-                    print(f"   📊 Found {len(results['ids'][0])} items in bottlenecks collection")
+                    result_ids = results['ids']
+                    print(f"   📊 Found {len(result_ids)} items in bottlenecks collection")
                     
-                    # Parse results and filter
-                    for i, (bottleneck_text, metadata) in enumerate(zip(
-                        results['documents'][0], 
-                        results['metadatas'][0]
-                    )):
-                        # Skip suggestions (they have a 'type' field)
-                        item_type = metadata.get('type', '')
-                        if item_type == 'bottleneck_suggestion':
-                            print(f"   ⏭️  Skipping suggestion: {bottleneck_text[:50]}...")
-                            continue
-                        if item_type:  # Skip anything with a type (suggestions, tasks, etc.)
-                            print(f"   ⏭️  Skipping type '{item_type}': {bottleneck_text[:50]}...")
-                            continue
-                        
-                        # Validate bottleneck text
-                        if not bottleneck_text or bottleneck_text.strip() == '' or bottleneck_text == 'Unknown Bottleneck':
-                            print(f"   ⏭️  Skipping invalid bottleneck: '{bottleneck_text[:50]}'")
-                            continue
-                        
-                        # This is a valid bottleneck
-                        bottlenecks.append({
-                            'id': results['ids'][0][i],
+                    # Parse results, skipping suggestions/tasks and invalid entries
+                    bottlenecks = [
+                        {
+                            'id': bottleneck_id,
                             'bottleneck': bottleneck_text.strip(),
                             'category': metadata.get('category', 'General'),
                             'severity': metadata.get('severity', 'Medium'),
                             'impact': metadata.get('impact', 'Unknown impact'),
                             'created_at': metadata.get('created_at', ''),
                             'source_document': metadata.get('source_document', '')
-                        })
+                        }
+                        for bottleneck_id, bottleneck_text, metadata in zip(
+                            result_ids,
+                            results['documents'],
+                            results['metadatas']
+                        )
+                        if _is_valid_bottleneck(bottleneck_text, metadata)
+                    ]
+                    
+                    skipped = len(result_ids) - len(bottlenecks)
+                    if skipped:
+                        print(f"   ⏭️  Skipped {skipped} typed (suggestion/task) or invalid items")
                     
                     print(f"✅ Fetched {len(bottlenecks)} ACTUAL bottlenecks via ChromaDB")
                     if bottlenecks:
                         print(f"   Sample: '{bottlenecks[0].get('bottleneck', 'N/A')[:60]}...'")
                         print(f"   Categories: {set(b.get('category') for b in bottlenecks)}")
                         print(f"   Severities: {set(b.get('severity') for b in bottlenecks)}")
-                except Exception as e:
-                    print(f"⚠️ ChromaDB access failed: {e}")
-                    import traceback
-                    traceback.print_exc()
+                except Exception:
+                    logger.exception("ChromaDB access failed")
             
             # No fallback needed - ChromaDB is the primary and most reliable method
             
@@ -179,10 +275,8 @@ class WhatIfSimulatorAgent:
             
             return bottlenecks
             
-        except Exception as e:
-            print(f"Error fetching project bottlenecks: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error fetching project bottlenecks")
             return []
     
     def _enhance_bottleneck_impacts(self, bottlenecks: List[Dict], llm_manager) -> List[Dict]:
@@ -197,10 +291,14 @@ class WhatIfSimulatorAgent:
             List of bottlenecks with enhanced impacts
         """
         try:
+            # Fast path: steady-state projects already have enriched impacts
+            if not any(b.get('impact', '').lower() in _UNKNOWN_IMPACTS for b in bottlenecks):
+                return bottlenecks
+            
             # Find bottlenecks with unknown impact
             unknown_impact_bottlenecks = [
                 b for b in bottlenecks 
-                if b.get('impact', '').lower() in ['unknown impact', 'unknown', '']
+                if b.get('impact', '').lower() in _UNKNOWN_IMPACTS
             ]
             
             if not unknown_impact_bottlenecks:
@@ -250,17 +348,10 @@ Only return valid JSON, no additional text."""
                 response_text = llm_response.get('response', '')
                 
                 # Parse JSON response
-                response_text = response_text.strip()
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:]
-                if response_text.startswith('```'):
-                    response_text = response_text[3:]
-                if response_text.endswith('```'):
-                    response_text = response_text[:-3]
-                response_text = response_text.strip()
+                response_text = _FENCE_RE.sub('', response_text).strip()
                 
                 try:
-                    impact_map = json.loads(response_text)
+                    impact_map = _json_loads(response_text)
                     
                     # Update bottlenecks with enhanced impacts
                     for bottleneck in batch:
@@ -281,10 +372,8 @@ Only return valid JSON, no additional text."""
             
             return bottlenecks
             
-        except Exception as e:
-            print(f"Error enhancing bottleneck impacts: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error enhancing bottleneck impacts")
             return bottlenecks
     
     def order_bottlenecks_by_priority(self, bottlenecks: List[Dict], llm_manager) -> List[Dict]:
@@ -312,7 +401,7 @@ Only return valid JSON, no additional text."""
             prompt = f"""Analyze the following project bottlenecks and order them by which will occur first in the project timeline.
 
 Bottlenecks:
-{json.dumps(bottleneck_summary, indent=2)}
+{_json_dumps(bottleneck_summary, indent=True)}
 
 Consider factors like:
 - Dependencies between bottlenecks
@@ -338,24 +427,20 @@ Only return valid JSON, no additional text."""
             response_text = llm_response.get('response', '')
             
             # Parse JSON response (handle cases where LLM adds extra text)
-            response_text = response_text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            result = json.loads(response_text)
-            ordered_ids = result.get('ordered_ids', [])
+            response_text = _FENCE_RE.sub('', response_text).strip()
             
+            result = _json_loads(response_text)
+            ordered_ids = result.get('ordered_ids', [])
+
+            # Index positions once (first occurrence wins, matching list.index)
+            priority_by_id = {}
+            for i, bid in enumerate(ordered_ids):
+                priority_by_id.setdefault(bid, i + 1)
+            fallback = len(bottlenecks) + 1  # Put unlisted ones at end
+
             # Add order_priority to bottlenecks
             for bottleneck in bottlenecks:
-                if bottleneck['id'] in ordered_ids:
-                    bottleneck['order_priority'] = ordered_ids.index(bottleneck['id']) + 1
-                else:
-                    bottleneck['order_priority'] = len(bottlenecks) + 1  # Put unlisted ones at end
+                bottleneck['order_priority'] = priority_by_id.get(bottleneck['id'], fallback)
             
             # Sort by order_priority
             ordered_bottlenecks = sorted(bottlenecks, key=lambda x: x.get('order_priority', 999))
@@ -363,10 +448,8 @@ Only return valid JSON, no additional text."""
             print(f"✅ Ordered {len(ordered_bottlenecks)} bottlenecks by priority")
             return ordered_bottlenecks
             
-        except Exception as e:
-            print(f"Error ordering bottlenecks: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error ordering bottlenecks")
             # Return original order if LLM fails
             for i, bottleneck in enumerate(bottlenecks):
                 bottleneck['order_priority'] = i + 1
@@ -388,14 +471,8 @@ Only return valid JSON, no additional text."""
             
             for bottleneck in ordered_bottlenecks:
                 # Determine node color based on severity
-                severity_colors = {
-                    'High': {'background': '#fee2e2', 'border': '#dc2626'},  # red
-                    'Medium': {'background': '#fed7aa', 'border': '#ea580c'},  # orange
-                    'Low': {'background': '#fef3c7', 'border': '#d97706'}  # yellow
-                }
-                
                 severity = bottleneck.get('severity', 'Medium')
-                colors = severity_colors.get(severity, severity_colors['Medium'])
+                colors = _SEVERITY_COLORS.get(severity, _SEVERITY_COLORS['Medium'])
                 
                 node = {
                     'id': bottleneck['id'],
@@ -407,10 +484,7 @@ Only return valid JSON, no additional text."""
                     'color': {
                         'background': colors['background'],
                         'border': colors['border'],
-                        'highlight': {
-                            'background': colors['background'],
-                            'border': colors['border']
-                        }
+                        'highlight': dict(colors)
                     }
                 }
                 nodes.append(node)
@@ -425,23 +499,10 @@ Only return valid JSON, no additional text."""
                     'id': f"edge_{i}",
                     'from': current_id,
                     'to': next_id,
-                    'arrows': {
-                        'to': {
-                            'enabled': True,
-                            'scaleFactor': 1.2,
-                            'type': 'arrow'
-                        }
-                    },
-                    'color': {
-                        'color': '#94a3b8',
-                        'highlight': '#64748b',
-                        'hover': '#475569'
-                    },
+                    'arrows': _EDGE_ARROWS,
+                    'color': _EDGE_COLOR,
                     'width': 2,
-                    'smooth': {
-                        'type': 'curvedCW',
-                        'roundness': 0.5
-                    }
+                    'smooth': _EDGE_SMOOTH
                 }
                 edges.append(edge)
             
@@ -471,71 +532,64 @@ Only return valid JSON, no additional text."""
             Dict with mitigation_points if found, None otherwise
         """
         try:
-            print(f"🔍 Looking for mitigation suggestions: bottleneck_id={bottleneck_id[:30]}..., project_id={project_id[:20]}...")
+            logger.debug("Looking for mitigation suggestions: bottleneck_id=%s, project_id=%s", bottleneck_id, project_id)
             mitigation_data = self.chroma_manager.get_risk_data('mitigation_suggestions', project_id)
-            print(f"   📊 Found {len(mitigation_data)} items in mitigation_suggestions collection")
+            logger.debug("Found %d items in mitigation_suggestions collection", len(mitigation_data))
             
-            # Find the most recent suggestion for this bottleneck
-            # Try exact match first, then partial match (in case IDs have prefixes)
+            # Index by stored bottleneck_id once (first occurrence wins, as before)
+            id_to_item = {}
             for item in mitigation_data:
+                id_to_item.setdefault(item.get('metadata', {}).get('bottleneck_id', ''), item)
+            
+            # Try exact match first, then partial match (in case ID has prefix like "enhanced_")
+            exact_item = id_to_item.get(bottleneck_id)
+            if exact_item is not None:
+                logger.debug("Found exact mitigation match: %s", bottleneck_id)
+                matches = [exact_item]
+            else:
+                matches = (
+                    item for stored_bottleneck_id, item in id_to_item.items()
+                    if bottleneck_id in stored_bottleneck_id or stored_bottleneck_id in bottleneck_id
+                )
+            
+            for item in matches:
                 metadata = item.get('metadata', {})
-                stored_bottleneck_id = metadata.get('bottleneck_id', '')
-                
-                # Exact match
-                if stored_bottleneck_id == bottleneck_id:
-                    print(f"   ✅ Found exact match: {stored_bottleneck_id[:30]}...")
-                    try:
-                        # Parse the JSON string back to list
-                        content = item.get('content', '[]')
-                        if isinstance(content, str):
-                            mitigation_points = json.loads(content)
-                        else:
-                            mitigation_points = content
-                        
-                        return {
-                            'bottleneck_id': bottleneck_id,
-                            'bottleneck_title': metadata.get('bottleneck_title', ''),
-                            'mitigation_points': mitigation_points,
-                            'generated_at': metadata.get('created_at', ''),
-                            'from_cache': True
-                        }
-                    except json.JSONDecodeError as e:
-                        print(f"   ⚠️ Error parsing JSON: {e}")
-                        continue
-                
-                # Partial match (in case ID has prefix like "enhanced_")
-                if bottleneck_id in stored_bottleneck_id or stored_bottleneck_id in bottleneck_id:
-                    print(f"   ✅ Found partial match: {stored_bottleneck_id[:30]}... matches {bottleneck_id[:30]}...")
-                    try:
-                        content = item.get('content', '[]')
-                        if isinstance(content, str):
-                            mitigation_points = json.loads(content)
-                        else:
-                            mitigation_points = content
-                        
-                        return {
-                            'bottleneck_id': bottleneck_id,
-                            'bottleneck_title': metadata.get('bottleneck_title', ''),
-                            'mitigation_points': mitigation_points,
-                            'generated_at': metadata.get('created_at', ''),
-                            'from_cache': True
-                        }
-                    except json.JSONDecodeError as e:
-                        print(f"   ⚠️ Error parsing JSON: {e}")
-                        continue
+                if item is not exact_item:
+                    logger.debug("Found partial mitigation match: %s matches %s",
+                                 metadata.get('bottleneck_id', ''), bottleneck_id)
+                try:
+                    # Parse the JSON string back to list
+                    content = item.get('content', '[]')
+                    if metadata.get('mitigation_count') == 0:
+                        mitigation_points = []  # Known empty, skip parsing
+                    elif isinstance(content, str):
+                        mitigation_points = _json_loads(content)
+                    else:
+                        mitigation_points = content
+                    
+                    return {
+                        'bottleneck_id': bottleneck_id,
+                        'bottleneck_title': metadata.get('bottleneck_title', ''),
+                        'mitigation_points': mitigation_points,
+                        'generated_at': metadata.get('created_at', ''),
+                        'from_cache': True
+                    }
+                except json.JSONDecodeError as e:
+                    logger.debug("Error parsing stored mitigation suggestions JSON: %s", e)
+                    continue
             
-            print(f"   ⚠️ No mitigation suggestions found for bottleneck_id: {bottleneck_id[:30]}...")
-            print(f"   Available bottleneck_ids in DB: {[m.get('metadata', {}).get('bottleneck_id', 'N/A')[:30] for m in mitigation_data[:5]]}")
+            logger.debug("No mitigation suggestions found for bottleneck_id: %s", bottleneck_id)
             return None
-        except Exception as e:
-            print(f"❌ Error retrieving mitigation suggestions from DB: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error retrieving mitigation suggestions from DB")
             return None
     
     def generate_mitigation_suggestions(self, bottleneck_id: str, bottleneck_title: str,
                                       all_bottleneck_titles: List[str], llm_manager, 
-                                      project_id: str = None, force_regenerate: bool = False) -> Dict:
+                                      project_id: str = None, force_regenerate: bool = False,
+                                      titles_context_block: Optional[str] = None,
+                                      batch_writer: Optional[List[Dict]] = None,
+                                      prompt_key: Optional[str] = None) -> Dict:
         """
         Generate AI-powered mitigation suggestions for a bottleneck
         Checks DB first unless force_regenerate is True
@@ -547,6 +601,10 @@ Only return valid JSON, no additional text."""
             llm_manager: LLM manager instance
             project_id: Project identifier (for DB lookup)
             force_regenerate: If True, regenerate even if exists in DB
+            titles_context_block: Prebuilt format_titles_context(all_bottleneck_titles)
+            batch_writer: If given, the record to store is appended here instead of
+                written immediately; persist it with store_many()
+            prompt_key: prompt_key() of the inputs, stored so unchanged re-runs can reuse it
             
         Returns:
             Dict with 'mitigation_points' list
@@ -559,13 +617,16 @@ Only return valid JSON, no additional text."""
                     print(f"   ✅ Retrieved mitigation suggestions from DB for {bottleneck_id[:20]}...")
                     return cached
             
+            if titles_context_block is None:
+                titles_context_block = format_titles_context(all_bottleneck_titles)
+            
             # Create prompt
             prompt = f"""You are a project risk management expert. Analyze the following bottleneck and provide specific, actionable mitigation strategies.
 
 Current Bottleneck: {bottleneck_title}
 
 Other Bottlenecks in Project (for context):
-{chr(10).join(f"- {title}" for title in all_bottleneck_titles)}
+{titles_context_block}
 
 Provide 3-5 specific, actionable mitigation strategies for this bottleneck. Each strategy should be:
 - Specific and actionable
@@ -598,45 +659,39 @@ Only return valid JSON, no additional text."""
             response_text = llm_response.get('response', '')
             
             # Parse JSON response
-            response_text = response_text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            result = json.loads(response_text)
+            response_text = _FENCE_RE.sub('', response_text).strip()
+            
+            result = _json_loads(response_text)
             mitigation_points = result.get('mitigation_points', [])
             
             # Store in ChromaDB
+            now = datetime.now()
             project_id_for_storage = project_id or (bottleneck_id.split('_')[0] if '_' in bottleneck_id else '')
-            self.chroma_manager.store_risk_data(
-                'mitigation_suggestions',
-                [{
-                    'id': f"mitigation_{bottleneck_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                    'text': json.dumps(mitigation_points),
-                    'metadata': {
-                        'bottleneck_id': bottleneck_id,
-                        'bottleneck_title': bottleneck_title
-                    }
-                }],
-                project_id_for_storage,
-                {'bottleneck_id': bottleneck_id}
-            )
+            record = {
+                'id': f"mitigation_{bottleneck_id}_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
+                'text': _json_dumps(mitigation_points),
+                'metadata': {
+                    'project_id': project_id_for_storage,
+                    'bottleneck_id': bottleneck_id,
+                    'bottleneck_title': bottleneck_title,
+                    'mitigation_count': len(mitigation_points),
+                    'prompt_key': prompt_key
+                }
+            }
+            if batch_writer is not None:
+                batch_writer.append(record)
+            else:
+                self.store_many('mitigation_suggestions', [record])
             
             return {
                 'bottleneck_id': bottleneck_id,
                 'bottleneck_title': bottleneck_title,
                 'mitigation_points': mitigation_points,
-                'generated_at': datetime.now().isoformat()
+                'generated_at': now.isoformat()
             }
             
         except Exception as e:
-            print(f"Error generating mitigation suggestions: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error generating mitigation suggestions")
             return {
                 'bottleneck_id': bottleneck_id,
                 'bottleneck_title': bottleneck_title,
@@ -657,71 +712,117 @@ Only return valid JSON, no additional text."""
             Dict with consequence_points if found, None otherwise
         """
         try:
-            print(f"🔍 Looking for consequences: bottleneck_id={bottleneck_id[:30]}..., project_id={project_id[:20]}...")
-            consequence_data = self.chroma_manager.get_risk_data('consequences', project_id)
-            print(f"   📊 Found {len(consequence_data)} items in consequences collection")
+            logger.debug("Looking for consequences: bottleneck_id=%s, project_id=%s", bottleneck_id, project_id)
+            consequences_by_id = self._consequence_cache.get(project_id)
+            if consequences_by_id is None:
+                consequences_by_id = self._preload_consequences(project_id)
             
-            # Find the most recent consequence for this bottleneck
-            # Try exact match first, then partial match (in case IDs have prefixes)
-            for item in consequence_data:
+            # Exact match first, then match on the prefix-stripped ID (e.g. "enhanced_")
+            exact_item = consequences_by_id.get(bottleneck_id)
+            if exact_item is not None:
+                logger.debug("Found exact consequence match: %s", bottleneck_id)
+                matches = [exact_item]
+            else:
+                base_item = consequences_by_id.get(_bottleneck_id_base(bottleneck_id))
+                matches = [base_item] if base_item is not None else []
+            
+            for item in matches:
                 metadata = item.get('metadata', {})
-                stored_bottleneck_id = metadata.get('bottleneck_id', '')
-                
-                # Exact match
-                if stored_bottleneck_id == bottleneck_id:
-                    print(f"   ✅ Found exact match: {stored_bottleneck_id[:30]}...")
-                    try:
-                        # Parse the JSON string back to list
-                        content = item.get('content', '[]')
-                        if isinstance(content, str):
-                            consequence_points = json.loads(content)
-                        else:
-                            consequence_points = content
-                        
-                        return {
-                            'bottleneck_id': bottleneck_id,
-                            'bottleneck_title': metadata.get('bottleneck_title', ''),
-                            'consequence_points': consequence_points,
-                            'generated_at': metadata.get('created_at', ''),
-                            'from_cache': True
-                        }
-                    except json.JSONDecodeError as e:
-                        print(f"   ⚠️ Error parsing JSON: {e}")
-                        continue
-                
-                # Partial match (in case ID has prefix like "enhanced_")
-                if bottleneck_id in stored_bottleneck_id or stored_bottleneck_id in bottleneck_id:
-                    print(f"   ✅ Found partial match: {stored_bottleneck_id[:30]}... matches {bottleneck_id[:30]}...")
-                    try:
-                        content = item.get('content', '[]')
-                        if isinstance(content, str):
-                            consequence_points = json.loads(content)
-                        else:
-                            consequence_points = content
-                        
-                        return {
-                            'bottleneck_id': bottleneck_id,
-                            'bottleneck_title': metadata.get('bottleneck_title', ''),
-                            'consequence_points': consequence_points,
-                            'generated_at': metadata.get('created_at', ''),
-                            'from_cache': True
-                        }
-                    except json.JSONDecodeError as e:
-                        print(f"   ⚠️ Error parsing JSON: {e}")
-                        continue
+                try:
+                    # Parse the JSON string back to list
+                    content = item.get('content', '[]')
+                    if isinstance(content, str):
+                        consequence_points = _json_loads(content)
+                    else:
+                        consequence_points = content
+                    
+                    return {
+                        'bottleneck_id': bottleneck_id,
+                        'bottleneck_title': metadata.get('bottleneck_title', ''),
+                        'consequence_points': consequence_points,
+                        'generated_at': metadata.get('created_at', ''),
+                        'from_cache': True
+                    }
+                except json.JSONDecodeError as e:
+                    logger.debug("Error parsing stored consequences JSON: %s", e)
+                    continue
             
-            print(f"   ⚠️ No consequences found for bottleneck_id: {bottleneck_id[:30]}...")
-            print(f"   Available bottleneck_ids in DB: {[m.get('metadata', {}).get('bottleneck_id', 'N/A')[:30] for m in consequence_data[:5]]}")
+            logger.debug("No consequences found for bottleneck_id: %s", bottleneck_id)
             return None
-        except Exception as e:
-            print(f"❌ Error retrieving consequences from DB: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error retrieving consequences from DB")
             return None
     
+    def _preload_consequences(self, project_id: str) -> Dict[str, Dict]:
+        """
+        Load all stored consequences for a project in one query and index them
+        by bottleneck_id, then by bottleneck_id_base for IDs not already present
+        """
+        consequence_data = self.chroma_manager.get_risk_data('consequences', project_id)
+        logger.debug("Loaded %d items from consequences collection", len(consequence_data))
+        
+        consequences_by_id = {}
+        for item in consequence_data:
+            # First occurrence wins
+            consequences_by_id.setdefault(item.get('metadata', {}).get('bottleneck_id', ''), item)
+        for item in consequence_data:
+            metadata = item.get('metadata', {})
+            # Rows stored before bottleneck_id_base existed derive it from bottleneck_id
+            base_id = metadata.get('bottleneck_id_base') or _bottleneck_id_base(metadata.get('bottleneck_id', ''))
+            consequences_by_id.setdefault(base_id, item)
+        
+        if consequences_by_id:
+            # Don't pin an empty result; consequences may not be generated yet
+            self._consequence_cache[project_id] = consequences_by_id
+        return consequences_by_id
+    
+    def _generate_consequence_points(self, bottleneck_title: str, titles_context_block: str,
+                                     llm_manager) -> Tuple[List[str], Optional[str]]:
+        """Ask the LLM for consequence points; returns (points, error)"""
+        # Create prompt
+        prompt = f"""You are a project risk management expert. Analyze the consequences if the following bottleneck is not addressed.
+
+Bottleneck: {bottleneck_title}
+
+Other Bottlenecks in Project (for context):
+{titles_context_block}
+
+Provide 3-5 specific consequences that could occur if this bottleneck is not mitigated. Each consequence should be:
+- Specific and measurable
+- Realistic and likely
+- Impact-focused (schedule, budget, quality, resources)
+
+Return JSON format:
+{{
+    "consequence_points": [
+        "Consequence 1: Specific impact on project",
+        "Consequence 2: Another specific impact",
+        "Consequence 3: Additional consequence"
+    ]
+}}
+
+Only return valid JSON, no additional text."""
+        
+        # Call LLM
+        llm_response = llm_manager.simple_chat(prompt)
+        
+        if not llm_response.get('success'):
+            return [], llm_response.get('error', 'Unknown error')
+        
+        response_text = llm_response.get('response', '')
+        
+        # Parse JSON response
+        response_text = _FENCE_RE.sub('', response_text).strip()
+        
+        result = _json_loads(response_text)
+        return result.get('consequence_points', []), None
+    
     def analyze_consequences(self, bottleneck_id: str, bottleneck_title: str,
                             all_bottleneck_titles: List[str], llm_manager,
-                            project_id: str = None, force_regenerate: bool = False) -> Dict:
+                            project_id: str = None, force_regenerate: bool = False,
+                            batch_writer: Optional[List[Dict]] = None,
+                            titles_context_block: Optional[str] = None,
+                            prompt_key: Optional[str] = None) -> Dict:
         """
         Analyze consequences of a bottleneck
         Checks DB first unless force_regenerate is True
@@ -733,96 +834,111 @@ Only return valid JSON, no additional text."""
             llm_manager: LLM manager instance
             project_id: Project identifier (for DB lookup)
             force_regenerate: If True, regenerate even if exists in DB
+            batch_writer: If given, the record to store is appended here instead of
+                written immediately; persist it with store_many()
+            titles_context_block: Prebuilt format_titles_context(all_bottleneck_titles);
+                pass it when analyzing many bottlenecks to build it only once
+            prompt_key: prompt_key() of the inputs, stored so unchanged re-runs can reuse it
             
         Returns:
             Dict with 'consequence_points' list
         """
+        if titles_context_block is None:
+            titles_context_block = format_titles_context(all_bottleneck_titles)
+        titles_hash = titles_prompt_hash(all_bottleneck_titles).hexdigest()
+        
+        # Callers only share a run whose inputs match theirs
+        key = (project_id, bottleneck_id, titles_hash, force_regenerate)
+        result = self._inflight.run(
+            key, self._analyze_consequences,
+            bottleneck_id, bottleneck_title, titles_context_block, titles_hash, llm_manager,
+            project_id, force_regenerate, batch_writer, prompt_key
+        )
+        # Each caller gets its own dict; concurrent callers share the run's result
+        return dict(result)
+    
+    def _analyze_consequences(self, bottleneck_id: str, bottleneck_title: str,
+                              titles_context_block: str, titles_hash: str, llm_manager,
+                              project_id: Optional[str], force_regenerate: bool,
+                              batch_writer: Optional[List[Dict]], prompt_key: Optional[str]) -> Dict:
+        """Body of analyze_consequences, run by the first caller for a bottleneck"""
         try:
             # Check DB first unless forcing regeneration
             if not force_regenerate and project_id:
                 cached = self.get_consequences_from_db(bottleneck_id, project_id)
                 if cached:
-                    print(f"   ✅ Retrieved consequences from DB for {bottleneck_id[:20]}...")
+                    logger.debug("Retrieved consequences from DB for %s", bottleneck_id)
                     return cached
             
-            # Create prompt
-            prompt = f"""You are a project risk management expert. Analyze the consequences if the following bottleneck is not addressed.
-
-Bottleneck: {bottleneck_title}
-
-Other Bottlenecks in Project (for context):
-{chr(10).join(f"- {title}" for title in all_bottleneck_titles)}
-
-Provide 3-5 specific consequences that could occur if this bottleneck is not mitigated. Each consequence should be:
-- Specific and measurable
-- Realistic and likely
-- Impact-focused (schedule, budget, quality, resources)
-
-Return JSON format:
-{{
-    "consequence_points": [
-        "Consequence 1: Specific impact on project",
-        "Consequence 2: Another specific impact",
-        "Consequence 3: Additional consequence"
-    ]
-}}
-
-Only return valid JSON, no additional text."""
+            # Reuse an analysis of a near-identical bottleneck title generated with
+            # the same other-titles context; the prompt lists those titles, so an
+            # entry from a different context may mention bottlenecks this project lacks
+            semantic_hit = None
+            title_embedding = self.chroma_manager.model.encode([bottleneck_title]).tolist()[0]
+            if not force_regenerate:
+                semantic_hit = self.chroma_manager.get_semantic_match(
+                    'consequence_prompt_cache', title_embedding, _SEMANTIC_CACHE_MAX_DISTANCE,
+                    where={'titles_hash': titles_hash}
+                )
             
-            # Call LLM
-            llm_response = llm_manager.simple_chat(prompt)
+            if semantic_hit:
+                logger.debug("Reusing semantically cached consequences for %s", bottleneck_id)
+                consequence_points = _json_loads(semantic_hit['content'])
+            else:
+                consequence_points, error = self._generate_consequence_points(
+                    bottleneck_title, titles_context_block, llm_manager
+                )
+                if error:
+                    return {
+                        'bottleneck_id': bottleneck_id,
+                        'bottleneck_title': bottleneck_title,
+                        'consequence_points': [],
+                        'error': error,
+                        'generated_at': datetime.now().isoformat()
+                    }
+                if consequence_points:
+                    cache_key = f"{bottleneck_title.strip().lower()}|{titles_hash}"
+                    self.chroma_manager.upsert_semantic_entry(
+                        'consequence_prompt_cache',
+                        f"consequence_cache_{hashlib.sha1(cache_key.encode()).hexdigest()}",
+                        title_embedding,
+                        _json_dumps(consequence_points),
+                        {'bottleneck_title': bottleneck_title, 'project_id': project_id or '',
+                         'titles_hash': titles_hash},
+                        _SEMANTIC_CACHE_TTL_SECONDS
+                    )
             
-            if not llm_response.get('success'):
-                return {
+            # Store in ChromaDB
+            now = datetime.now()
+            project_id_for_storage = project_id or (bottleneck_id.split('_')[0] if '_' in bottleneck_id else '')
+            record = {
+                'id': f"consequence_{bottleneck_id}_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
+                'text': _json_dumps(consequence_points),
+                'metadata': {
+                    'project_id': project_id_for_storage,
                     'bottleneck_id': bottleneck_id,
+                    'bottleneck_id_base': _bottleneck_id_base(bottleneck_id),
                     'bottleneck_title': bottleneck_title,
-                    'consequence_points': [],
-                    'error': llm_response.get('error', 'Unknown error'),
-                    'generated_at': datetime.now().isoformat()
+                    'prompt_key': prompt_key
                 }
+            }
+            if batch_writer is not None:
+                batch_writer.append(record)
+            else:
+                self.store_many('consequences', [record])
             
-            response_text = llm_response.get('response', '')
-            
-            # Parse JSON response
-            response_text = response_text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            result = json.loads(response_text)
-            consequence_points = result.get('consequence_points', [])
-            
-            # Store in ChromaDB
-            project_id_for_storage = project_id or (bottleneck_id.split('_')[0] if '_' in bottleneck_id else '')
-            self.chroma_manager.store_risk_data(
-                'consequences',
-                [{
-                    'id': f"consequence_{bottleneck_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                    'text': json.dumps(consequence_points),
-                    'metadata': {
-                        'bottleneck_id': bottleneck_id,
-                        'bottleneck_title': bottleneck_title
-                    }
-                }],
-                project_id_for_storage,
-                {'bottleneck_id': bottleneck_id}
-            )
-            
-            return {
+            result = {
                 'bottleneck_id': bottleneck_id,
                 'bottleneck_title': bottleneck_title,
                 'consequence_points': consequence_points,
-                'generated_at': datetime.now().isoformat()
+                'generated_at': now.isoformat()
             }
+            if semantic_hit:
+                result['from_cache'] = 'semantic'
+            return result
             
         except Exception as e:
-            print(f"Error analyzing consequences: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error analyzing consequences")
             return {
                 'bottleneck_id': bottleneck_id,
                 'bottleneck_title': bottleneck_title,
@@ -830,4 +946,127 @@ Only return valid JSON, no additional text."""
                 'error': str(e),
                 'generated_at': datetime.now().isoformat()
             }
-
+    
+    def analyze_bottlenecks_pipelined(self, bottlenecks: List[Dict], all_bottleneck_titles: List[str],
+                                      llm_manager, project_id: str = None, force_regenerate: bool = False,
+                                      max_concurrency: int = 16,
+                                      reuse_unchanged: bool = False) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Generate mitigation suggestions and consequences for many bottlenecks
+        
+        Each bottleneck's consequence call is dispatched as soon as its suggestion
+        returns, and both call types share one concurrency limit, so the LLM is
+        kept busy without a barrier between the two phases. Records are stored
+        with one batched write per collection at the end.
+        
+        Args:
+            bottlenecks: List of bottleneck dicts with 'id' and 'bottleneck' (title)
+            all_bottleneck_titles: List of all bottleneck titles in project (for context)
+            llm_manager: LLM manager instance
+            project_id: Project identifier (for DB lookup and storage)
+            force_regenerate: If True, regenerate even if exists in DB
+            max_concurrency: Maximum number of LLM calls in flight
+            reuse_unchanged: If True, reuse a stored analysis whose prompt_key matches
+                (same bottleneck title and project titles) instead of calling the LLM
+            
+        Returns:
+            (suggestion results, consequence results), each in the same order as bottlenecks
+        """
+        titles_context_block = format_titles_context(all_bottleneck_titles)
+        titles_hash = titles_prompt_hash(all_bottleneck_titles)
+        suggestion_records: List[Dict] = []
+        consequence_records: List[Dict] = []
+        
+        async def _run():
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            async def _call(method, collection_type, bottleneck, key, batch_writer):
+                if reuse_unchanged and project_id:
+                    reused = await asyncio.to_thread(
+                        self._find_by_prompt_key, collection_type, project_id, bottleneck, key
+                    )
+                    if reused:
+                        return reused
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        method,
+                        bottleneck['id'],
+                        bottleneck['bottleneck'],
+                        all_bottleneck_titles,
+                        llm_manager,
+                        project_id=project_id,
+                        force_regenerate=force_regenerate,
+                        titles_context_block=titles_context_block,
+                        batch_writer=batch_writer,
+                        prompt_key=key
+                    )
+            
+            async def _pipeline(bottleneck):
+                key = prompt_key(titles_hash, bottleneck['bottleneck'])
+                suggestion = await _call(
+                    self.generate_mitigation_suggestions, 'mitigation_suggestions',
+                    bottleneck, key, suggestion_records
+                )
+                consequence = await _call(
+                    self.analyze_consequences, 'consequences', bottleneck, key, consequence_records
+                )
+                return suggestion, consequence
+            
+            return await asyncio.gather(*(_pipeline(b) for b in bottlenecks))
+        
+        results = asyncio.run(_run())
+        
+        if suggestion_records:
+            self.store_many('mitigation_suggestions', suggestion_records)
+        if consequence_records:
+            self.store_many('consequences', consequence_records)
+        return [suggestion for suggestion, _ in results], [consequence for _, consequence in results]
+    
+    def _find_by_prompt_key(self, collection_type: str, project_id: str, bottleneck: Dict,
+                            key: str) -> Optional[Dict]:
+        """Stored suggestion/consequence result for a bottleneck generated from the same prompt inputs"""
+        rows = self.chroma_manager.find_risk_data(
+            collection_type, project_id, {'bottleneck_id': bottleneck['id'], 'prompt_key': key}, limit=1
+        )
+        if not rows:
+            return None
+        
+        points_key = 'mitigation_points' if collection_type == 'mitigation_suggestions' else 'consequence_points'
+        try:
+            points = _json_loads(rows[0]['content'])
+        except ValueError:
+            return None
+        return {
+            'bottleneck_id': bottleneck['id'],
+            'bottleneck_title': bottleneck['bottleneck'],
+            points_key: points,
+            'generated_at': rows[0]['metadata'].get('created_at', ''),
+            'from_cache': 'prompt_key'
+        }
+    
+    def store_many(self, collection_type: str, records: List[Dict], batch_size: int = 100) -> int:
+        """
+        Store records collected through a batch_writer with one write per project and batch
+        
+        Args:
+            collection_type: 'mitigation_suggestions' or 'consequences'
+            records: Records appended to a generate_mitigation_suggestions or
+                analyze_consequences batch_writer
+            batch_size: Maximum records per store_risk_data call
+            
+        Returns:
+            Number of records stored
+        """
+        by_project: Dict[str, List[Dict]] = {}
+        for record in records:
+            by_project.setdefault(record['metadata']['project_id'], []).append(record)
+        
+        stored = 0
+        for project_id, project_records in by_project.items():
+            for start in range(0, len(project_records), batch_size):
+                stored += self.chroma_manager.store_risk_data(
+                    collection_type, project_records[start:start + batch_size], project_id
+                )
+            if collection_type == 'consequences':
+                self._consequence_cache.pop(project_id, None)
+        return stored
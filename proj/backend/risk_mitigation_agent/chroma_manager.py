@@ -5,12 +5,174 @@ Handles all ChromaDB operations with consistent naming and error handling
 
 # Import patched chromadb
 from backend.chromadb_patch import chromadb
+import os
 import re
 import json
+import time
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from sentence_transformers import SentenceTransformer
 
+# Metadata values are (de)serialized per row on every read/write; use orjson
+# when available. Chroma metadata values must be str, hence the decode().
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Directory holding an int8 ONNX export of MiniLM (see scripts/export_minilm_onnx.py).
+# When it contains model_quantized.onnx, embeddings run on ONNX Runtime instead of PyTorch.
+ONNX_MODEL_DIR = os.getenv('RISK_ONNX_MODEL_DIR', os.path.join('data', 'onnx_minilm'))
+ONNX_MODEL_FILE = 'model_quantized.onnx'
+
+
+class _ONNXMiniLM:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime with dynamic int8 weights
+    
+    Mirrors the SentenceTransformer.encode call used by the risk agent:
+    tokenize -> run -> mean-pool -> L2-normalize, returning a NumPy array.
+    """
+    
+    def __init__(self, model_dir: str):
+        import numpy as np
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        self._np = np
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            sess_options=so,
+            providers=['CPUExecutionProvider']
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+    
+    def encode(self, sentences, batch_size: int = 64, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True):
+        """Embed a string or list of strings into normalized 384-dim vectors"""
+        np = self._np
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
+        
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=256,
+                return_tensors='np'
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self._input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            
+            mask = encoded['attention_mask'][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        
+        embeddings = np.concatenate(batches)
+        return embeddings[0] if single else embeddings
+
+
+class _ModelEmbeddingFunction:
+    """
+    Chroma embedding function over the already loaded risk model
+    
+    RiskChromaManager passes embeddings explicitly on every add/query/upsert, so
+    this is only a fallback for documents Chroma has to embed itself; it reuses
+    the loaded model instead of building a second SentenceTransformer.
+    """
+    
+    def __init__(self, model):
+        self._model = model
+    
+    def __call__(self, input):
+        return self._model.encode(
+            list(input), batch_size=64, show_progress_bar=False, convert_to_numpy=True
+        ).tolist()
+
+
+# Embedding model and Chroma embedding function are shared by every
+# RiskChromaManager in the process; loading MiniLM takes seconds
+_MODEL = None
+_EMBEDDING_FUNCTION = None
+_MODEL_LOCK = threading.Lock()
+
+
+def _load_model():
+    """Load the int8 ONNX MiniLM when exported, otherwise the PyTorch SentenceTransformer"""
+    if os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+        try:
+            model = _ONNXMiniLM(ONNX_MODEL_DIR)
+            print(f"✅ Risk embeddings using int8 ONNX MiniLM from {ONNX_MODEL_DIR}")
+            return model
+        except Exception as e:
+            print(f"Could not load ONNX MiniLM, falling back to SentenceTransformer: {e}")
+    
+    try:
+        import torch
+        torch.set_num_threads(min(8, os.cpu_count() or 1))
+    except Exception as e:
+        print(f"Could not tune torch threads: {e}")
+    
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    model.eval()
+    return model
+
+
+def _get_embedding_model():
+    """Return the process-wide (model, embedding_function) pair, loading it once"""
+    global _MODEL, _EMBEDDING_FUNCTION
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                model = _load_model()
+                _EMBEDDING_FUNCTION = _ModelEmbeddingFunction(model)
+                _MODEL = model
+    return _MODEL, _EMBEDDING_FUNCTION
+
+
+# Runs independent collection reads in parallel (see get_risk_data_bundle)
+_READ_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='risk-chroma-read')
+
+# Metadata key listing which values were JSON-encoded at write time, so reads
+# only parse those instead of trying json on every string value
+JSON_FIELDS_KEY = '__json_fields__'
+
+
+def _encode_other(value):
+    """Metadata encoder for types not in _METADATA_ENCODERS (primitives, list/dict subclasses)"""
+    if isinstance(value, (list, dict)):
+        return _json_dumps(value)
+    return value
+
+
+# Chroma only accepts primitive metadata values; dispatch on exact type so
+# the common cases cost one dict lookup instead of an isinstance chain
+_METADATA_ENCODERS = {
+    list: _json_dumps,
+    dict: _json_dumps,
+    type(None): lambda _: '',
+    str: lambda value: value,
+}
+
 
 class RiskChromaManager:
     """Centralized ChromaDB manager for Risk Mitigation Agent system"""
@@ -19,14 +181,8 @@ class RiskChromaManager:
         # Single ChromaDB client instance
         self.client = chromadb.PersistentClient(path=chroma_path)
         
-        # Initialize embedding model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Create embedding function to avoid onnxruntime
-        from chromadb.utils import embedding_functions
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name='all-MiniLM-L6-v2'
-        )
+        # Shared embedding model and embedding function
+        self.model, self.embedding_function = _get_embedding_model()
         
         # Collection naming pattern
         self._name_pattern = re.compile(r"[^a-zA-Z0-9_-]")
@@ -37,24 +193,60 @@ class RiskChromaManager:
             'mitigation_suggestions': 'project_risk_mitigation_suggestions',
             'consequences': 'project_risk_consequences',
             'ordering': 'project_risk_ordering',
-            'enhanced_bottlenecks': 'project_risk_enhanced_bottlenecks'
+            'enhanced_bottlenecks': 'project_risk_enhanced_bottlenecks',
+            'consequence_prompt_cache': 'project_risk_consequence_cache'
         }
         
+        # Collection objects by type, filled at init so lookups skip the client
+        self._collection_objs = {}
+        
         # Initialize risk collections
         self._initialize_risk_collections()
     
     def _initialize_risk_collections(self):
         """Initialize all risk mitigation agent collections"""
         try:
-            for collection_type, collection_name in self.collections.items():
-                self.client.get_or_create_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function,
-                    metadata={"description": f"Project risk {collection_type} storage"}
-                )
+            for collection_type in self.collections:
+                self._bootstrap_collection(collection_type)
         except Exception as e:
             print(f"Error initializing risk collections: {e}")
     
+    def _bootstrap_collection(self, collection_type: str):
+        """Get or create a collection and cache the reference"""
+        collection = self.client.get_or_create_collection(
+            name=self.collections[collection_type],
+            embedding_function=self.embedding_function,
+            metadata={"description": f"Project risk {collection_type} storage"}
+        )
+        self._collection_objs[collection_type] = collection
+        return collection
+    
+    def _parse_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse JSON strings in stored metadata back to lists/dicts"""
+        if JSON_FIELDS_KEY in metadata:
+            parsed_metadata = dict(metadata)
+            json_fields = parsed_metadata.pop(JSON_FIELDS_KEY)
+            for key in json_fields.split(',') if json_fields else ():
+                if key in parsed_metadata:
+                    parsed_metadata[key] = _json_loads(parsed_metadata[key])
+            return parsed_metadata
+        
+        # Rows written before JSON_FIELDS_KEY existed: try every string value
+        parsed_metadata = {}
+        for key, value in metadata.items():
+            if isinstance(value, str) and value:
+                try:
+                    parsed = _json_loads(value)
+                    if isinstance(parsed, (list, dict)):
+                        parsed_metadata[key] = parsed
+                    else:
+                        parsed_metadata[key] = value
+                except (ValueError, TypeError):
+                    parsed_metadata[key] = value
+            else:
+                parsed_metadata[key] = value
+        return parsed_metadata
+    
     def get_risk_collection(self, collection_type: str):
         """Get risk mitigation agent collection"""
         try:
@@ -62,12 +254,7 @@ class RiskChromaManager:
                 print(f"Warning: Unknown collection type '{collection_type}', available: {list(self.collections.keys())}")
                 raise ValueError(f"Invalid collection type: {collection_type}")
             
-            collection_name = self.collections[collection_type]
-            return self.client.get_or_create_collection(
-                name=collection_name,
-                embedding_function=self.embedding_function,
-                metadata={"description": f"Project risk {collection_type} storage"}
-            )
+            return self._collection_objs.get(collection_type) or self._bootstrap_collection(collection_type)
         except Exception as e:
             print(f"Error getting risk collection {collection_type}: {e}")
             return None
@@ -77,51 +264,53 @@ class RiskChromaManager:
         """Store risk data in appropriate collection"""
         try:
             collection = self.get_risk_collection(collection_type)
-            if not collection:
+            if not collection or not data:
                 return 0
             
-            stored_count = 0
+            now = datetime.now()
+            # Index + random suffix keeps generated IDs unique within and across calls
+            id_prefix = f"{collection_type}_{project_id}_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            created_at = now.isoformat()
+            
+            ids, texts, metadatas = [], [], []
             for i, item in enumerate(data):
                 # Use provided ID if present, otherwise generate
-                item_id = item.get('id') or f"{collection_type}_{project_id}_{i}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                
-                # Create embedding
-                text_content = item.get('text', item.get('content', ''))
-                embedding = self.model.encode([text_content]).tolist()[0]
+                ids.append(item.get('id') or f"{id_prefix}_{i}")
+                texts.append(item.get('text', item.get('content', '')))
                 
                 # Prepare metadata
                 raw_metadata = {
                     'project_id': project_id,
-                    'created_at': datetime.now().isoformat(),
+                    'created_at': created_at,
                     **(metadata or {}),
                     **item.get('metadata', {})
                 }
                 
-                # Convert lists and dicts to JSON strings
-                final_metadata = {}
-                for key, value in raw_metadata.items():
-                    if isinstance(value, (list, dict)):
-                        final_metadata[key] = json.dumps(value)
-                    elif value is None:
-                        final_metadata[key] = ''
-                    else:
-                        final_metadata[key] = value
-                
-                # Store in collection
-                collection.add(
-                    embeddings=[embedding],
-                    documents=[text_content],
-                    metadatas=[final_metadata],
-                    ids=[item_id]
+                # Convert lists and dicts to JSON strings, recording which ones
+                final_metadata = {
+                    key: _METADATA_ENCODERS.get(type(value), _encode_other)(value)
+                    for key, value in raw_metadata.items()
+                }
+                final_metadata[JSON_FIELDS_KEY] = ','.join(
+                    key for key, value in raw_metadata.items() if isinstance(value, (list, dict))
                 )
-                
-                stored_count += 1
+                metadatas.append(final_metadata)
             
-            return stored_count
+            # Embed all texts in one batched call, then store in one add
+            embeddings = self.model.encode(
+                texts, batch_size=64, show_progress_bar=False, convert_to_numpy=True
+            ).tolist()
+            collection.add(
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas,
+                ids=ids
+            )
+            
+            return len(ids)
             
         except Exception as e:
             print(f"Error storing risk data: {e}")
-            import traceback
             traceback.print_exc()
             return 0
     
@@ -132,45 +321,133 @@ class RiskChromaManager:
             if not collection:
                 return []
             
-            # Query collection for project data
-            results = collection.query(
-                query_embeddings=[[0.0] * 384],  # Dummy query
+            # Metadata-only lookup; no vector search needed to filter by project
+            results = collection.get(
                 where={"project_id": project_id},
-                n_results=1000  # Get all data for project
+                include=['documents', 'metadatas']
             )
             
-            data = []
-            for i, (document, metadata) in enumerate(zip(
-                results['documents'][0], 
-                results['metadatas'][0]
-            )):
-                # Parse JSON strings back to lists/dicts
-                parsed_metadata = {}
-                for key, value in metadata.items():
-                    if isinstance(value, str) and value:
-                        try:
-                            parsed = json.loads(value)
-                            if isinstance(parsed, (list, dict)):
-                                parsed_metadata[key] = parsed
-                            else:
-                                parsed_metadata[key] = value
-                        except (json.JSONDecodeError, ValueError):
-                            parsed_metadata[key] = value
-                    else:
-                        parsed_metadata[key] = value
-                
-                data.append({
-                    'id': results['ids'][0][i],
+            return [
+                {
+                    'id': item_id,
                     'content': document,
-                    'metadata': parsed_metadata
-                })
-            
-            return data
+                    'metadata': self._parse_metadata(metadata)
+                }
+                for item_id, document, metadata in zip(
+                    results['ids'], results['documents'], results['metadatas']
+                )
+            ]
             
         except Exception as e:
             print(f"Error getting risk data: {e}")
             return []
     
+    def get_risk_data_bundle(self, collection_types: List[str], project_id: str) -> Dict[str, List[Dict]]:
+        """Get a project's risk data from several collections concurrently, keyed by collection type"""
+        futures = {
+            collection_type: _READ_EXECUTOR.submit(self.get_risk_data, collection_type, project_id)
+            for collection_type in collection_types
+        }
+        return {collection_type: future.result() for collection_type, future in futures.items()}
+    
+    def find_risk_data(self, collection_type: str, project_id: str,
+                       filters: Dict[str, Any], limit: Optional[int] = None) -> List[Dict]:
+        """Get project risk data matching exact metadata filters, evaluated inside ChromaDB"""
+        try:
+            collection = self.get_risk_collection(collection_type)
+            if not collection:
+                return []
+            
+            where = {"$and": [{"project_id": project_id}] + [{k: v} for k, v in filters.items()]}
+            results = collection.get(
+                where=where,
+                limit=limit,
+                include=['documents', 'metadatas']
+            )
+            
+            return [
+                {
+                    'id': item_id,
+                    'content': document,
+                    'metadata': self._parse_metadata(metadata)
+                }
+                for item_id, document, metadata in zip(
+                    results['ids'], results['documents'], results['metadatas']
+                )
+            ]
+            
+        except Exception as e:
+            print(f"Error finding risk data: {e}")
+            return []
+    
+    def get_semantic_match(self, collection_type: str, embedding: List[float],
+                           max_distance: float, where: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+        """
+        Get the nearest stored item if it is within max_distance and not expired
+        
+        Only items whose metadata matches where (a Chroma where filter) are considered.
+        
+        Distances are Chroma's default squared L2; on the normalized MiniLM
+        embeddings that equals 2 * cosine distance.
+        """
+        try:
+            collection = self.get_risk_collection(collection_type)
+            if not collection:
+                return None
+            
+            results = collection.query(
+                query_embeddings=[embedding],
+                n_results=1,
+                where=where,
+                include=['documents', 'metadatas', 'distances']
+            )
+            if not results['ids'] or not results['ids'][0]:
+                return None
+            
+            distance = results['distances'][0][0]
+            metadata = results['metadatas'][0][0]
+            if distance > max_distance:
+                return None
+            expires_at = metadata.get('expires_at')
+            if expires_at and expires_at < time.time():
+                return None
+            
+            return {
+                'id': results['ids'][0][0],
+                'content': results['documents'][0][0],
+                'metadata': self._parse_metadata(metadata),
+                'distance': distance
+            }
+            
+        except Exception as e:
+            print(f"Error querying semantic match: {e}")
+            return None
+    
+    def upsert_semantic_entry(self, collection_type: str, item_id: str, embedding: List[float],
+                              text: str, metadata: Dict[str, Any], ttl_seconds: int) -> bool:
+        """Insert or replace a semantic cache entry that expires after ttl_seconds"""
+        try:
+            collection = self.get_risk_collection(collection_type)
+            if not collection:
+                return False
+            
+            collection.upsert(
+                ids=[item_id],
+                embeddings=[embedding],
+                documents=[text],
+                metadatas=[{
+                    **metadata,
+                    'created_at': datetime.now().isoformat(),
+                    'expires_at': time.time() + ttl_seconds,
+                    JSON_FIELDS_KEY: ''
+                }]
+            )
+            return True
+            
+        except Exception as e:
+            print(f"Error storing semantic cache entry: {e}")
+            return False
+    
     def get_risk_data_by_id(self, collection_type: str, item_id: str) -> Optional[Dict]:
         """Get specific risk data item by ID"""
         try:
@@ -178,30 +455,14 @@ class RiskChromaManager:
             if not collection:
                 return None
             
-            results = collection.get(ids=[item_id])
+            results = collection.get(ids=[item_id], include=['documents', 'metadatas'])
             if not results['ids']:
                 return None
             
-            # Parse metadata
-            metadata = results['metadatas'][0]
-            parsed_metadata = {}
-            for key, value in metadata.items():
-                if isinstance(value, str) and value:
-                    try:
-                        parsed = json.loads(value)
-                        if isinstance(parsed, (list, dict)):
-                            parsed_metadata[key] = parsed
-                        else:
-                            parsed_metadata[key] = value
-                    except (json.JSONDecodeError, ValueError):
-                        parsed_metadata[key] = value
-                else:
-                    parsed_metadata[key] = value
-            
             return {
                 'id': results['ids'][0],
                 'content': results['documents'][0],
-                'metadata': parsed_metadata
+                'metadata': self._parse_metadata(results['metadatas'][0])
             }
             
         except Exception as e:
@@ -223,15 +484,26 @@ class RiskChromaManager:
             
             # Update metadata
             new_metadata = existing['metadatas'][0].copy()
+            json_fields = None
+            if JSON_FIELDS_KEY in new_metadata:
+                json_fields = set(filter(None, new_metadata[JSON_FIELDS_KEY].split(',')))
             
             # Convert updates to JSON strings if needed
             for key, value in updates.items():
-                if isinstance(value, (list, dict)):
-                    new_metadata[key] = json.dumps(value)
+                is_json = isinstance(value, (list, dict))
+                if is_json:
+                    new_metadata[key] = _json_dumps(value)
                 elif value is None:
                     new_metadata[key] = ''
                 else:
                     new_metadata[key] = value
+                if json_fields is not None and is_json:
+                    json_fields.add(key)
+                elif json_fields is not None:
+                    json_fields.discard(key)
+            
+            if json_fields is not None:
+                new_metadata[JSON_FIELDS_KEY] = ','.join(sorted(json_fields))
             
             # Update in collection
             collection.update(
@@ -11,8 +11,12 @@ from ..nodes.bottleneck_ordering_nodes import order_bottlenecks_node
 from ..nodes.graph_generation_nodes import generate_graph_node
 
 
-class WhatIfSimulatorState(TypedDict):
-    """State for What If Simulator workflow."""
+class WhatIfSimulatorState(TypedDict, total=False):
+    """
+    State for What If Simulator workflow.
+    
+    Nodes return only the keys they change; LangGraph merges them into the state.
+    """
     project_id: str
     llm_manager: Any
     chroma_manager: Any
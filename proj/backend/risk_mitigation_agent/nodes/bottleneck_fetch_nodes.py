@@ -2,8 +2,11 @@
 Bottleneck Fetching Nodes for What If Simulator
 """
 
+import logging
 from typing import Dict, Any
 
+logger = logging.getLogger(__name__)
+
 
 def fetch_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -13,7 +16,7 @@ def fetch_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
         state: WhatIfSimulatorState
         
     Returns:
-        Updated state with bottlenecks
+        State update with bottlenecks
     """
     try:
         project_id = state.get('project_id')
@@ -22,10 +25,9 @@ def fetch_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
         performance_agent = state.get('performance_agent')
         
         if not what_if_simulator:
-            state['error'] = 'WhatIfSimulatorAgent not initialized'
-            return state
+            return {'error': 'WhatIfSimulatorAgent not initialized'}
         
-        print(f"📍 Fetching bottlenecks for project {project_id}...")
+        logger.debug("Fetching bottlenecks for project %s", project_id)
         
         llm_manager = state.get('llm_manager')
         bottlenecks = what_if_simulator.fetch_project_bottlenecks(
@@ -35,18 +37,11 @@ def fetch_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
             llm_manager=llm_manager
         )
         
-        state['bottlenecks'] = bottlenecks
-        state['bottlenecks_count'] = len(bottlenecks)
-        
-        print(f"✅ Fetched {len(bottlenecks)} bottlenecks")
+        logger.debug("Fetched %d bottlenecks", len(bottlenecks))
         
-        return state
+        return {'bottlenecks': bottlenecks, 'bottlenecks_count': len(bottlenecks)}
         
     except Exception as e:
-        print(f"❌ Error in fetch_bottlenecks_node: {e}")
-        import traceback
-        traceback.print_exc()
-        state['error'] = f"Error fetching bottlenecks: {str(e)}"
-        state['bottlenecks'] = []
-        return state
+        logger.exception("Error in fetch_bottlenecks_node")
+        return {'error': f"Error fetching bottlenecks: {str(e)}", 'bottlenecks': []}
 
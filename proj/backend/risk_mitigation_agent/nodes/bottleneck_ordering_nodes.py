@@ -2,8 +2,11 @@
 Bottleneck Ordering Nodes for What If Simulator
 """
 
+import logging
 from typing import Dict, Any
 
+logger = logging.getLogger(__name__)
+
 
 def order_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -13,7 +16,7 @@ def order_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
         state: WhatIfSimulatorState
         
     Returns:
-        Updated state with ordered_bottlenecks
+        State update with ordered_bottlenecks
     """
     try:
         bottlenecks = state.get('bottlenecks', [])
@@ -21,33 +24,30 @@ def order_bottlenecks_node(state: Dict[str, Any]) -> Dict[str, Any]:
         what_if_simulator = state.get('what_if_simulator')
         
         if not bottlenecks:
-            print("⚠️ No bottlenecks to order")
-            state['ordered_bottlenecks'] = []
-            return state
+            logger.debug("No bottlenecks to order")
+            return {'ordered_bottlenecks': []}
         
         if not what_if_simulator or not llm_manager:
-            state['error'] = 'WhatIfSimulatorAgent or LLMManager not initialized'
-            state['ordered_bottlenecks'] = bottlenecks
-            return state
+            return {
+                'error': 'WhatIfSimulatorAgent or LLMManager not initialized',
+                'ordered_bottlenecks': bottlenecks
+            }
         
-        print(f"📍 Ordering {len(bottlenecks)} bottlenecks by priority...")
+        logger.debug("Ordering %d bottlenecks by priority", len(bottlenecks))
         
         ordered_bottlenecks = what_if_simulator.order_bottlenecks_by_priority(
             bottlenecks,
             llm_manager
         )
         
-        state['ordered_bottlenecks'] = ordered_bottlenecks
-        
-        print(f"✅ Ordered {len(ordered_bottlenecks)} bottlenecks")
+        logger.debug("Ordered %d bottlenecks", len(ordered_bottlenecks))
         
-        return state
+        return {'ordered_bottlenecks': ordered_bottlenecks}
         
     except Exception as e:
-        print(f"❌ Error in order_bottlenecks_node: {e}")
-        import traceback
-        traceback.print_exc()
-        state['error'] = f"Error ordering bottlenecks: {str(e)}"
-        state['ordered_bottlenecks'] = state.get('bottlenecks', [])
-        return state
+        logger.exception("Error in order_bottlenecks_node")
+        return {
+            'error': f"Error ordering bottlenecks: {str(e)}",
+            'ordered_bottlenecks': state.get('bottlenecks', [])
+        }
 
@@ -2,8 +2,11 @@
 Graph Generation Nodes for What If Simulator
 """
 
+import logging
 from typing import Dict, Any
 
+logger = logging.getLogger(__name__)
+
 
 def generate_graph_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -13,39 +16,35 @@ def generate_graph_node(state: Dict[str, Any]) -> Dict[str, Any]:
         state: WhatIfSimulatorState
         
     Returns:
-        Updated state with graph_data
+        State update with graph_data
     """
     try:
         ordered_bottlenecks = state.get('ordered_bottlenecks', [])
         what_if_simulator = state.get('what_if_simulator')
         
         if not ordered_bottlenecks:
-            print("⚠️ No ordered bottlenecks to generate graph")
-            state['graph_data'] = {'nodes': [], 'edges': []}
-            return state
+            logger.debug("No ordered bottlenecks to generate graph")
+            return {'graph_data': {'nodes': [], 'edges': []}}
         
         if not what_if_simulator:
-            state['error'] = 'WhatIfSimulatorAgent not initialized'
-            state['graph_data'] = {'nodes': [], 'edges': []}
-            return state
+            return {
+                'error': 'WhatIfSimulatorAgent not initialized',
+                'graph_data': {'nodes': [], 'edges': []}
+            }
         
-        print(f"📍 Generating graph data for {len(ordered_bottlenecks)} bottlenecks...")
+        logger.debug("Generating graph data for %d bottlenecks", len(ordered_bottlenecks))
         
         graph_data = what_if_simulator.generate_graph_data(ordered_bottlenecks)
         
-        state['graph_data'] = graph_data
-        state['success'] = True
-        
-        print(f"✅ Generated graph with {len(graph_data.get('nodes', []))} nodes")
+        logger.debug("Generated graph with %d nodes", len(graph_data.get('nodes', [])))
         
-        return state
+        return {'graph_data': graph_data, 'success': True}
         
     except Exception as e:
-        print(f"❌ Error in generate_graph_node: {e}")
-        import traceback
-        traceback.print_exc()
-        state['error'] = f"Error generating graph: {str(e)}"
-        state['graph_data'] = {'nodes': [], 'edges': []}
-        state['success'] = False
-        return state
+        logger.exception("Error in generate_graph_node")
+        return {
+            'error': f"Error generating graph: {str(e)}",
+            'graph_data': {'nodes': [], 'edges': []},
+            'success': False
+        }
 
@@ -5,11 +5,44 @@ Manages risk analysis, prediction, and mitigation strategies for projects
 
 import os
 import json
+import logging
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import numpy as np
 from .agents.what_if_simulator_agent import WhatIfSimulatorAgent
 from .chroma_manager import RiskChromaManager
 
+logger = logging.getLogger(__name__)
+# Coordinator verbosity is tunable on its own, e.g. RISK_LOG=WARNING in production
+logger.setLevel(os.getenv('RISK_LOG', 'INFO').upper())
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Dashboard endpoints re-read the same project's bottlenecks and ordering
+# several times per render; keep them briefly instead of hitting ChromaDB each time
+_READ_CACHE_TTL_SECONDS = 60
+_READ_CACHE_MAX_ENTRIES = 128
+
+# Severity histogram slots and the risk score weight of each slot
+_SEVERITY_INDEX = {'Critical': 0, 'High': 1, 'Medium': 2, 'Low': 3}
+_SEVERITY_WEIGHTS = np.array([4, 3, 2, 1], dtype=np.int64)
+
+_NO_DATA_MESSAGE = 'No data available. Please run first-time generation.'
+
+
+class RiskDataMissing(Exception):
+    """Expected "nothing generated yet" condition; reported without a traceback"""
+
 
 class RiskMitigationAgent:
     """Main Risk Mitigation Agent coordinator"""
@@ -44,16 +77,103 @@ class RiskMitigationAgent:
         # Store references for direct access
         self.performance_agent = performance_agent
         
-        # Risk data storage
+        # (kind, project_id) -> (loaded_at, value) for cached bottlenecks and ordering
+        self._read_cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._read_cache_lock = threading.Lock()
+        
+        # Risk data storage (created on the first write, not for read-only requests)
         self.risk_data_dir = 'data/risk_mitigation'
-        self._ensure_risk_data_directory()
     
     def _ensure_risk_data_directory(self):
         """Create risk data directory if it doesn't exist"""
-        if not os.path.exists(self.risk_data_dir):
-            os.makedirs(self.risk_data_dir)
+        os.makedirs(self.risk_data_dir, exist_ok=True)
+    
+    def _read_cache_get(self, kind: str, project_id: str) -> Any:
+        """Value cached in the last _READ_CACHE_TTL_SECONDS, or None"""
+        with self._read_cache_lock:
+            entry = self._read_cache.get((kind, project_id))
+        if entry and time.monotonic() - entry[0] < _READ_CACHE_TTL_SECONDS:
+            return entry[1]
+        return None
+    
+    def _read_cache_put(self, kind: str, project_id: str, value: Any):
+        """Cache a non-empty value; empty results aren't pinned since generation may be about to run"""
+        if not value:
+            return
+        key = (kind, project_id)
+        with self._read_cache_lock:
+            self._read_cache.pop(key, None)
+            self._read_cache[key] = (time.monotonic(), value)
+            while len(self._read_cache) > _READ_CACHE_MAX_ENTRIES:
+                self._read_cache.pop(next(iter(self._read_cache)))
+    
+    def _cached_read(self, kind: str, project_id: str, loader: Callable[[str], Any]) -> Any:
+        """Return loader(project_id), reusing a result loaded in the last _READ_CACHE_TTL_SECONDS"""
+        value = self._read_cache_get(kind, project_id)
+        if value is None:
+            value = loader(project_id)
+            self._read_cache_put(kind, project_id, value)
+        return value
+    
+    def _get_cached_bottlenecks(self, project_id: str) -> List[Dict]:
+        """Cached enhanced bottlenecks for a project"""
+        return self._cached_read('bottlenecks', project_id, self.what_if_simulator._get_cached_bottlenecks)
+    
+    def _get_ordering_data(self, project_id: str) -> List[Dict]:
+        """Stored bottleneck ordering for a project"""
+        return self._cached_read(
+            'ordering', project_id, lambda pid: self.chroma_manager.get_risk_data('ordering', pid)
+        )
+    
+    def _get_bottlenecks_and_ordering(self, project_id: str) -> Tuple[List[Dict], List[Dict]]:
+        """Cached bottlenecks and ordering, reading whichever are missing from ChromaDB concurrently"""
+        bottlenecks = self._read_cache_get('bottlenecks', project_id)
+        ordering_data = self._read_cache_get('ordering', project_id)
+        if bottlenecks is not None and ordering_data is not None:
+            return bottlenecks, ordering_data
+        
+        bundle = self.chroma_manager.get_risk_data_bundle(['enhanced_bottlenecks', 'ordering'], project_id)
+        if bottlenecks is None:
+            bottlenecks = self.what_if_simulator.bottlenecks_from_cache_rows(bundle['enhanced_bottlenecks'])
+            self._read_cache_put('bottlenecks', project_id, bottlenecks)
+        if ordering_data is None:
+            ordering_data = bundle['ordering']
+            self._read_cache_put('ordering', project_id, ordering_data)
+        return bottlenecks, ordering_data
+    
+    def _get_project_bottlenecks(self, project_id: str) -> List[Dict]:
+        """Cached bottlenecks, falling back to a full fetch only when none are cached"""
+        return self._get_cached_bottlenecks(project_id) or self.what_if_simulator.fetch_project_bottlenecks(
+            project_id,
+            orchestrator=self.orchestrator,
+            performance_agent=self.performance_agent,
+            llm_manager=self.llm_manager
+        )
+    
+    def _get_bottleneck_index(self, project_id: str) -> Dict[str, Dict]:
+        """Project bottlenecks keyed by id, cached alongside the bottleneck list"""
+        index = self._read_cache_get('bottleneck_index', project_id)
+        if index is None:
+            index = {b['id']: b for b in self._get_project_bottlenecks(project_id)}
+            self._read_cache_put('bottleneck_index', project_id, index)
+        return index
+    
+    def _get_all_titles(self, project_id: str, bottlenecks: List[Dict]) -> List[str]:
+        """Bottleneck titles stored with the ordering, or taken from bottlenecks for older orderings"""
+        ordering_data = self._get_ordering_data(project_id)
+        if ordering_data:
+            titles = ordering_data[0].get('metadata', {}).get('bottleneck_titles')
+            if isinstance(titles, list):
+                return titles
+        return [b['bottleneck'] for b in bottlenecks]
+    
+    def _invalidate_read_cache(self, project_id: str):
+        """Drop cached bottlenecks and ordering after they are regenerated"""
+        with self._read_cache_lock:
+            for kind in ('bottlenecks', 'bottleneck_index', 'ordering'):
+                self._read_cache.pop((kind, project_id), None)
     
-    def initialize_risk_analysis(self, project_id: str) -> Dict[str, Any]:
+    def initialize_risk_analysis(self, project_id: str, force_regenerate: bool = False) -> Dict[str, Any]:
         """
         First-time initialization routine for Risk Mitigation Dashboard
         
@@ -68,19 +188,27 @@ class RiskMitigationAgent:
         Note: Risk Mitigation Agent doesn't extract data itself - it reads from Performance Agent.
         This initialization ensures bottlenecks have proper impacts, are ordered, and all suggestions/consequences are pre-generated.
         
+        Suggestions and consequences whose inputs (bottleneck title and the project's
+        bottleneck titles) are unchanged since the last run are reused instead of
+        regenerated, unless force_regenerate is True.
+        
         Args:
             project_id: Project identifier
+            force_regenerate: If True, call the LLM for every bottleneck
             
         Returns:
             Dict with initialization results
         """
         try:
-            print(f"\n{'='*80}")
-            print(f"🔮 RISK MITIGATION FIRST-TIME GENERATION - Project: {project_id}")
-            print(f"{'='*80}\n")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s", '=' * 80)
+            logger.info("Risk mitigation first-time generation - project: %s", project_id)
+            
+            self._ensure_risk_data_directory()
+            self._invalidate_read_cache(project_id)
             
             # Step 1: Fetch bottlenecks (this also enhances impacts automatically)
-            print("📍 STEP 1/5: Fetching & Enhancing Bottlenecks...")
+            logger.info("STEP 1/5: Fetching & enhancing bottlenecks")
             bottlenecks = self.what_if_simulator.fetch_project_bottlenecks(
                 project_id,
                 orchestrator=self.orchestrator,
@@ -96,94 +224,88 @@ class RiskMitigationAgent:
                     'bottlenecks_count': 0
                 }
             
-            print(f"   ✅ Found {len(bottlenecks)} bottlenecks")
+            logger.info("Found %d bottlenecks", len(bottlenecks))
             
             # Step 2: Order bottlenecks by priority
-            print("\n📍 STEP 2/5: Ordering Bottlenecks by Priority...")
+            logger.info("STEP 2/5: Ordering bottlenecks by priority")
             ordered_bottlenecks = self.what_if_simulator.order_bottlenecks_by_priority(
                 bottlenecks,
                 self.llm_manager
             )
-            print(f"   ✅ Ordered {len(ordered_bottlenecks)} bottlenecks")
+            logger.info("Ordered %d bottlenecks", len(ordered_bottlenecks))
             
             # Step 3: Store ordering for future use
-            print("\n📍 STEP 3/5: Storing Bottleneck Ordering...")
+            logger.info("STEP 3/5: Storing bottleneck ordering")
+            # The ordering keeps one fixed id per project and Chroma's add() ignores
+            # ids that already exist, so drop the previous run's record first
+            self.chroma_manager.delete_risk_data('ordering', f"ordering_{project_id}")
             self.chroma_manager.store_risk_data(
                 'ordering',
                 [{
                     'id': f"ordering_{project_id}",
-                    'text': json.dumps([b['id'] for b in ordered_bottlenecks]),
+                    'text': _json_dumps([b['id'] for b in ordered_bottlenecks]),
                     'metadata': {
                         'project_id': project_id,
-                        'ordered_count': len(ordered_bottlenecks)
+                        'ordered_count': len(ordered_bottlenecks),
+                        # Prompt context for on-demand generation, so it needs no extra query
+                        'bottleneck_titles': [b['bottleneck'] for b in bottlenecks]
                     }
                 }],
                 project_id
             )
-            print(f"   ✅ Stored ordering data")
+            logger.info("Stored ordering data")
             
-            # Step 4: Generate ALL mitigation suggestions
-            print("\n📍 STEP 4/5: Generating Mitigation Suggestions for All Bottlenecks...")
+            # Steps 4 and 5: each bottleneck's consequence call starts as soon as
+            # its suggestion returns, sharing one LLM concurrency limit
+            logger.info("STEP 4-5/5: Generating mitigation suggestions and consequences for all bottlenecks")
             all_bottleneck_titles = [b['bottleneck'] for b in bottlenecks]
+            suggestion_results, consequence_results = self.what_if_simulator.analyze_bottlenecks_pipelined(
+                ordered_bottlenecks,
+                all_bottleneck_titles,
+                self.llm_manager,
+                project_id=project_id,
+                force_regenerate=True,  # Skip the by-ID lookup during first-time
+                max_concurrency=max(1, int(os.getenv('RISK_LLM_CONCURRENCY', '16'))),
+                reuse_unchanged=not force_regenerate
+            )
+            
             suggestions_generated = 0
-            for i, bottleneck in enumerate(ordered_bottlenecks, 1):
-                try:
-                    print(f"   [{i}/{len(ordered_bottlenecks)}] Generating suggestions for: {bottleneck['bottleneck'][:50]}...")
-                    self.what_if_simulator.generate_mitigation_suggestions(
-                        bottleneck['id'],
-                        bottleneck['bottleneck'],
-                        all_bottleneck_titles,
-                        self.llm_manager,
-                        project_id=project_id,
-                        force_regenerate=True  # Force generation during first-time
-                    )
+            for bottleneck, result in zip(ordered_bottlenecks, suggestion_results):
+                if result.get('error'):
+                    logger.warning("Error generating suggestions for %s: %s", bottleneck['id'], result['error'])
+                else:
                     suggestions_generated += 1
-                except Exception as e:
-                    print(f"   ⚠️ Error generating suggestions for {bottleneck['id']}: {e}")
-            print(f"   ✅ Generated {suggestions_generated}/{len(ordered_bottlenecks)} mitigation suggestions")
+            logger.info("Generated %d/%d mitigation suggestions", suggestions_generated, len(ordered_bottlenecks))
             
-            # Step 5: Generate ALL consequences
-            print("\n📍 STEP 5/5: Generating Consequences for All Bottlenecks...")
             consequences_generated = 0
-            for i, bottleneck in enumerate(ordered_bottlenecks, 1):
-                try:
-                    print(f"   [{i}/{len(ordered_bottlenecks)}] Analyzing consequences for: {bottleneck['bottleneck'][:50]}...")
-                    self.what_if_simulator.analyze_consequences(
-                        bottleneck['id'],
-                        bottleneck['bottleneck'],
-                        all_bottleneck_titles,
-                        self.llm_manager,
-                        project_id=project_id,
-                        force_regenerate=True  # Force generation during first-time
-                    )
+            for bottleneck, result in zip(ordered_bottlenecks, consequence_results):
+                if result.get('error'):
+                    logger.warning("Error analyzing consequences for %s: %s", bottleneck['id'], result['error'])
+                else:
                     consequences_generated += 1
-                except Exception as e:
-                    print(f"   ⚠️ Error analyzing consequences for {bottleneck['id']}: {e}")
-            print(f"   ✅ Generated {consequences_generated}/{len(ordered_bottlenecks)} consequence analyses")
-            
-            print(f"\n{'='*80}")
-            print(f"✅ RISK MITIGATION FIRST-TIME GENERATION COMPLETE")
-            print(f"   Bottlenecks: {len(bottlenecks)}")
-            print(f"   High Severity: {sum(1 for b in bottlenecks if b.get('severity') in ['High', 'Critical'])}")
-            print(f"   Mitigation Suggestions: {suggestions_generated}")
-            print(f"   Consequences: {consequences_generated}")
-            print(f"{'='*80}\n")
+            logger.info("Generated %d/%d consequence analyses", consequences_generated, len(ordered_bottlenecks))
+            self._invalidate_read_cache(project_id)
+            
+            high_severity_count = sum(1 for b in bottlenecks if b.get('severity') in ['High', 'Critical'])
+            logger.info(
+                "Risk mitigation first-time generation complete: %d bottlenecks, %d high severity, "
+                "%d mitigation suggestions, %d consequences",
+                len(bottlenecks), high_severity_count, suggestions_generated, consequences_generated
+            )
             
             return {
                 'success': True,
                 'project_id': project_id,
                 'bottlenecks_count': len(bottlenecks),
                 'ordered_bottlenecks_count': len(ordered_bottlenecks),
-                'high_severity_count': sum(1 for b in bottlenecks if b.get('severity') in ['High', 'Critical']),
+                'high_severity_count': high_severity_count,
                 'suggestions_generated': suggestions_generated,
                 'consequences_generated': consequences_generated,
                 'timestamp': datetime.now().isoformat()
             }
             
         except Exception as e:
-            print(f"❌ Error in initialize_risk_analysis: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in initialize_risk_analysis")
             return {
                 'success': False,
                 'error': str(e),
@@ -201,8 +323,7 @@ class RiskMitigationAgent:
             Dict with has_data boolean
         """
         try:
-            ordering_data = self.chroma_manager.get_risk_data('ordering', project_id)
-            cached_bottlenecks = self.what_if_simulator._get_cached_bottlenecks(project_id)
+            cached_bottlenecks, ordering_data = self._get_bottlenecks_and_ordering(project_id)
             
             has_data = bool(ordering_data and cached_bottlenecks)
             
@@ -212,7 +333,7 @@ class RiskMitigationAgent:
                 'project_id': project_id
             }
         except Exception as e:
-            print(f"❌ Error checking generation status: {e}")
+            logger.error("Error checking generation status: %s", e)
             return {
                 'success': False,
                 'has_data': False,
@@ -231,76 +352,53 @@ class RiskMitigationAgent:
             Dict with bottlenecks, ordered_bottlenecks, and graph_data
         """
         try:
-            print(f"\n{'='*80}")
-            print(f"🔮 WHAT IF SIMULATOR - Project: {project_id}")
-            print(f"{'='*80}\n")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s", '=' * 80)
+            logger.info("What If Simulator - project: %s", project_id)
             
             # Retrieve cached bottlenecks ONLY (no generation)
-            print("📍 STEP 1/3: Retrieving Cached Bottlenecks...")
-            cached_bottlenecks = self.what_if_simulator._get_cached_bottlenecks(project_id)
+            logger.info("STEP 1/3: Retrieving cached bottlenecks")
+            cached_bottlenecks, ordering_data = self._get_bottlenecks_and_ordering(project_id)
             
             if not cached_bottlenecks:
-                print("   ⚠️ No cached bottlenecks found. User must run first-time generation.")
-                return {
-                    'success': False,
-                    'error': 'No data available. Please run first-time generation.',
-                    'bottlenecks': [],
-                    'ordered_bottlenecks': [],
-                    'graph_data': {'nodes': [], 'edges': []}
-                }
+                raise RiskDataMissing(_NO_DATA_MESSAGE)
             
             bottlenecks = cached_bottlenecks
-            print(f"   ✅ Retrieved {len(bottlenecks)} cached bottlenecks")
+            logger.info("Retrieved %d cached bottlenecks", len(bottlenecks))
             
             # Check if ordering exists in DB
-            print("\n📍 STEP 2/3: Checking for Existing Ordering...")
-            ordering_data = self.chroma_manager.get_risk_data('ordering', project_id)
+            logger.info("STEP 2/3: Checking for existing ordering")
             ordered_bottlenecks = None
             
             if ordering_data:
                 try:
                     # Get the ordering entry
                     ordering_entry = ordering_data[0]  # Should only be one per project
-                    ordered_ids = json.loads(ordering_entry.get('content', '[]'))
+                    ordered_ids = _json_loads(ordering_entry.get('content') or '[]')
                     
                     # Create a map of bottleneck IDs to bottleneck objects
                     bottleneck_map = {b['id']: b for b in bottlenecks}
                     
                     # Reorder bottlenecks according to stored ordering
-                    ordered_bottlenecks = []
-                    for bid in ordered_ids:
-                        if bid in bottleneck_map:
-                            ordered_bottlenecks.append(bottleneck_map[bid])
+                    ordered_bottlenecks = [bottleneck_map[bid] for bid in ordered_ids if bid in bottleneck_map]
                     
                     # Add any bottlenecks not in the ordering (new ones)
-                    for b in bottlenecks:
-                        if b['id'] not in ordered_ids:
-                            ordered_bottlenecks.append(b)
+                    ordered_id_set = set(ordered_ids)
+                    ordered_bottlenecks.extend(b for b in bottlenecks if b['id'] not in ordered_id_set)
                     
-                    print(f"   ✅ Retrieved ordering from DB ({len(ordered_bottlenecks)} bottlenecks)")
+                    logger.info("Retrieved ordering from DB (%d bottlenecks)", len(ordered_bottlenecks))
                 except Exception as e:
-                    print(f"   ⚠️ Error retrieving ordering from DB: {e}, generating new ordering...")
+                    logger.warning("Error retrieving ordering from DB: %s", e)
                     ordered_bottlenecks = None
             
             # If no ordering in DB, return error (user must run first-time generation)
             if not ordered_bottlenecks:
-                print("   ⚠️ No ordering found in DB. User must run first-time generation.")
-                return {
-                    'success': False,
-                    'error': 'No ordering data. Please run first-time generation.',
-                    'bottlenecks': [],
-                    'ordered_bottlenecks': [],
-                    'graph_data': {'nodes': [], 'edges': []}
-                }
+                raise RiskDataMissing('No ordering data. Please run first-time generation.')
             
             # Generate graph data
-            print("\n📍 STEP 3/3: Generating Graph Data...")
+            logger.info("STEP 3/3: Generating graph data")
             graph_data = self.what_if_simulator.generate_graph_data(ordered_bottlenecks)
-            print(f"   ✅ Generated graph with {len(graph_data['nodes'])} nodes")
-            
-            print(f"\n{'='*80}")
-            print(f"✅ WHAT IF SIMULATOR DATA READY")
-            print(f"{'='*80}\n")
+            logger.info("Generated graph with %d nodes", len(graph_data['nodes']))
             
             return {
                 'success': True,
@@ -311,10 +409,17 @@ class RiskMitigationAgent:
                 'timestamp': datetime.now().isoformat()
             }
             
+        except RiskDataMissing as e:
+            logger.info("What If Simulator data missing for %s: %s", project_id, e)
+            return {
+                'success': False,
+                'error': str(e),
+                'bottlenecks': [],
+                'ordered_bottlenecks': [],
+                'graph_data': {'nodes': [], 'edges': []}
+            }
         except Exception as e:
-            print(f"❌ Error in get_what_if_simulator_data: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in get_what_if_simulator_data")
             return {
                 'success': False,
                 'error': str(e),
@@ -339,7 +444,7 @@ class RiskMitigationAgent:
             # Try to get from DB first
             cached = self.what_if_simulator.get_mitigation_suggestions_from_db(bottleneck_id, project_id)
             if cached:
-                print(f"✅ Retrieved mitigation suggestions from DB for {bottleneck_id[:20]}...")
+                logger.info("Retrieved mitigation suggestions from DB for %s", bottleneck_id)
                 return {
                     'success': True,
                     'project_id': project_id,
@@ -348,27 +453,16 @@ class RiskMitigationAgent:
                 }
             
             # If not in DB, generate it (shouldn't happen if first-time generation was run)
-            print(f"⚠️ Mitigation suggestions not found in DB, generating on-demand...")
-            
-            # Get bottleneck details
-            bottlenecks = self.what_if_simulator.fetch_project_bottlenecks(
-                project_id,
-                orchestrator=self.orchestrator,
-                performance_agent=self.performance_agent,
-                llm_manager=self.llm_manager
-            )
+            logger.warning("Mitigation suggestions not found in DB, generating on-demand")
             
             # Find the specific bottleneck
-            bottleneck = next((b for b in bottlenecks if b['id'] == bottleneck_id), None)
+            bottleneck_index = self._get_bottleneck_index(project_id)
+            bottleneck = bottleneck_index.get(bottleneck_id)
             if not bottleneck:
-                return {
-                    'success': False,
-                    'error': 'Bottleneck not found',
-                    'mitigation_points': []
-                }
+                raise RiskDataMissing('Bottleneck not found')
             
             # Get all bottleneck titles for context
-            all_bottleneck_titles = [b['bottleneck'] for b in bottlenecks]
+            all_bottleneck_titles = self._get_all_titles(project_id, list(bottleneck_index.values()))
             
             # Generate mitigation suggestions
             result = self.what_if_simulator.generate_mitigation_suggestions(
@@ -386,10 +480,15 @@ class RiskMitigationAgent:
                 **result
             }
             
+        except RiskDataMissing as e:
+            logger.info("%s: %s", e, bottleneck_id)
+            return {
+                'success': False,
+                'error': str(e),
+                'mitigation_points': []
+            }
         except Exception as e:
-            print(f"Error getting mitigation suggestions: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting mitigation suggestions")
             return {
                 'success': False,
                 'error': str(e),
@@ -412,7 +511,7 @@ class RiskMitigationAgent:
             # Try to get from DB first
             cached = self.what_if_simulator.get_consequences_from_db(bottleneck_id, project_id)
             if cached:
-                print(f"✅ Retrieved consequences from DB for {bottleneck_id[:20]}...")
+                logger.info("Retrieved consequences from DB for %s", bottleneck_id)
                 return {
                     'success': True,
                     'project_id': project_id,
@@ -421,27 +520,16 @@ class RiskMitigationAgent:
                 }
             
             # If not in DB, generate it (shouldn't happen if first-time generation was run)
-            print(f"⚠️ Consequences not found in DB, generating on-demand...")
-            
-            # Get bottleneck details
-            bottlenecks = self.what_if_simulator.fetch_project_bottlenecks(
-                project_id,
-                orchestrator=self.orchestrator,
-                performance_agent=self.performance_agent,
-                llm_manager=self.llm_manager
-            )
+            logger.warning("Consequences not found in DB, generating on-demand")
             
             # Find the specific bottleneck
-            bottleneck = next((b for b in bottlenecks if b['id'] == bottleneck_id), None)
+            bottleneck_index = self._get_bottleneck_index(project_id)
+            bottleneck = bottleneck_index.get(bottleneck_id)
             if not bottleneck:
-                return {
-                    'success': False,
-                    'error': 'Bottleneck not found',
-                    'consequence_points': []
-                }
+                raise RiskDataMissing('Bottleneck not found')
             
             # Get all bottleneck titles for context
-            all_bottleneck_titles = [b['bottleneck'] for b in bottlenecks]
+            all_bottleneck_titles = self._get_all_titles(project_id, list(bottleneck_index.values()))
             
             # Analyze consequences
             result = self.what_if_simulator.analyze_consequences(
@@ -459,10 +547,15 @@ class RiskMitigationAgent:
                 **result
             }
             
+        except RiskDataMissing as e:
+            logger.info("%s: %s", e, bottleneck_id)
+            return {
+                'success': False,
+                'error': str(e),
+                'consequence_points': []
+            }
         except Exception as e:
-            print(f"Error getting consequences: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting consequences")
             return {
                 'success': False,
                 'error': str(e),
@@ -481,45 +574,31 @@ class RiskMitigationAgent:
         """
         try:
             # Get cached bottlenecks ONLY (no generation)
-            cached_bottlenecks = self.what_if_simulator._get_cached_bottlenecks(project_id)
+            cached_bottlenecks = self._get_cached_bottlenecks(project_id)
             
             if not cached_bottlenecks:
-                return {
-                    'success': False,
-                    'error': 'No data available. Please run first-time generation.',
-                    'total_bottlenecks': 0,
-                    'high_severity': 0,
-                    'medium_severity': 0,
-                    'low_severity': 0,
-                    'risk_score': 0.0,
-                    'last_updated': datetime.now().isoformat()
-                }
+                raise RiskDataMissing(_NO_DATA_MESSAGE)
             
             bottlenecks = cached_bottlenecks
             
-            # Calculate risk metrics
+            # Calculate risk metrics from a severity histogram
             total_bottlenecks = len(bottlenecks)
+            severity_idx = np.fromiter(
+                (_SEVERITY_INDEX.get(b.get('severity'), -1) for b in bottlenecks),
+                dtype=np.int8,
+                count=total_bottlenecks
+            )
+            counts = np.bincount(severity_idx[severity_idx >= 0], minlength=4)
+            critical_count, high_only_count, medium_severity, low_severity = (int(c) for c in counts)
             # Count High and Critical as high severity
-            high_severity = sum(1 for b in bottlenecks if b.get('severity') in ['High', 'Critical'])
-            medium_severity = sum(1 for b in bottlenecks if b.get('severity') == 'Medium')
-            low_severity = sum(1 for b in bottlenecks if b.get('severity') == 'Low')
+            high_severity = critical_count + high_only_count
             
             # Calculate risk score (weighted by severity)
-            # Formula: (High×4 + Critical×4 + Medium×2 + Low×1) / (total × 4) × 100
-            # This gives a score from 0-100% where:
-            # - All High/Critical = 100%
-            # - All Medium = 50%
-            # - All Low = 25%
-            risk_score = 0.0
-            if total_bottlenecks > 0:
-                # Count Critical separately for weighting (Critical = 4, High = 3, Medium = 2, Low = 1)
-                critical_count = sum(1 for b in bottlenecks if b.get('severity') == 'Critical')
-                high_only_count = sum(1 for b in bottlenecks if b.get('severity') == 'High')
-                
-                # Weighted calculation: Critical×4, High×3, Medium×2, Low×1
-                total_weighted_score = (critical_count * 4) + (high_only_count * 3) + (medium_severity * 2) + (low_severity * 1)
-                max_possible_score = total_bottlenecks * 4  # If all were Critical
-                risk_score = (total_weighted_score / max_possible_score) * 100
+            # Weighted calculation: Critical×4, High×3, Medium×2, Low×1, divided by
+            # (total × 4) × 100 for a 0-100% score where all Critical = 100%
+            total_weighted_score = int(counts @ _SEVERITY_WEIGHTS)
+            max_possible_score = total_bottlenecks * 4  # If all were Critical
+            risk_score = (total_weighted_score / max_possible_score) * 100
             
             return {
                 'success': True,
@@ -532,8 +611,20 @@ class RiskMitigationAgent:
                 'last_updated': datetime.now().isoformat()
             }
             
+        except RiskDataMissing as e:
+            logger.info("Risk summary unavailable for %s: %s", project_id, e)
+            return {
+                'success': False,
+                'error': str(e),
+                'total_bottlenecks': 0,
+                'high_severity': 0,
+                'medium_severity': 0,
+                'low_severity': 0,
+                'risk_score': 0.0,
+                'last_updated': datetime.now().isoformat()
+            }
         except Exception as e:
-            print(f"Error getting risk summary: {e}")
+            logger.error("Error getting risk summary: %s", e)
             return {
                 'success': False,
                 'error': str(e),
@@ -0,0 +1,202 @@
+"""
+Service Utilities
+Helpers shared by the agent Flask services (services/*/main.py).
+"""
+
+import functools
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+# Serialize JSON responses with orjson when it is installed (Flask's stdlib provider otherwise)
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class ORJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson (used by jsonify and request.get_json)"""
+
+        def dumps(self, obj, **kwargs):
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+except ImportError:
+    ORJSONProvider = None
+
+
+def lazy_singleton(factory):
+    """Build factory() once, on first call; concurrent first callers share the one instance"""
+    lock = threading.Lock()
+    instance = []
+    
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+    return get
+
+
+def wants_async() -> bool:
+    """True if the caller asked for the graph run to be queued (?async=true)"""
+    return request.args.get('async', 'false').lower() == 'true'
+
+
+class JobTable:
+    """
+    Graph runs queued on a bounded thread pool and looked up by job id.
+
+    Endpoints called with ?async=true submit their run here and return 202 with
+    the job id at once; clients poll /jobs/<job_id> for the response they'd
+    otherwise have got.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str, max_jobs: int = 256):
+        """
+        Args:
+            max_workers: Graph runs executed at the same time
+            thread_name_prefix: Name prefix for the pool's threads
+            max_jobs: Jobs remembered before the oldest finished ones are forgotten
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._max_jobs = max_jobs
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args) -> str:
+        """Queue fn(*args) on the pool and return its job id"""
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(fn, *args)
+        with self._lock:
+            self._jobs[job_id] = future
+            # Forget the oldest finished jobs once the table is full
+            if len(self._jobs) > self._max_jobs:
+                finished = [jid for jid, f in self._jobs.items() if f.done()]
+                for jid in finished[:len(self._jobs) - self._max_jobs]:
+                    del self._jobs[jid]
+        return job_id
+
+    def status(self, job_id: str) -> Tuple[Dict[str, Any], int]:
+        """
+        Response body and HTTP status for GET /jobs/<job_id>
+
+        Args:
+            job_id: Job identifier returned by submit()
+
+        Returns:
+            (body, status): 404 for unknown jobs, the run's result once done,
+            or 500 with the error if the run raised
+        """
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future is None:
+            return {"error": "Unknown job_id"}, 404
+        if not future.done():
+            return {"job_id": job_id, "done": False}, 200
+
+        try:
+            return {"job_id": job_id, "done": True, "result": future.result()}, 200
+        except Exception as e:
+            logger.error("Error in job %s: %s", job_id, e, exc_info=True)
+            return {"job_id": job_id, "done": True, "error": str(e)}, 500
+
+
+class StatusCache:
+    """
+    Per-(kind, project_id) cache of status reads.
+    
+    Entries are reused for ttl seconds and dropped for a project as soon as a
+    generation or refresh rewrites its data; the least recently read entries
+    are evicted first once max_entries is reached. A read that was already
+    loading when its project was invalidated returns its value but doesn't
+    cache it, so pre-refresh data can't be put back for another ttl.
+    """
+    
+    def __init__(self, ttl: float, kinds: Iterable[str], max_entries: int = 1024):
+        """
+        Args:
+            ttl: Seconds a loaded value is reused
+            kinds: Every kind cached, so invalidate() can drop them all
+            max_entries: Entries kept before the least recently read are evicted
+        """
+        self._ttl = ttl
+        self._kinds = tuple(kinds)
+        self._max_entries = max_entries
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        # project_id -> number of invalidations, checked before storing a loaded value
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, kind: str, project_id: str, loader: Callable[[str], Any]) -> Any:
+        """Return loader(project_id), reusing a result loaded in the last ttl seconds"""
+        key = (kind, project_id)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry and time.monotonic() - entry[0] < self._ttl:
+                # Re-insert so the least recently read entries are evicted first
+                self._entries[key] = entry
+                return entry[1]
+            generation = self._generations.get(project_id, 0)
+        
+        value = loader(project_id)
+        with self._lock:
+            if self._generations.get(project_id, 0) != generation:
+                return value  # Invalidated while loading; may predate the change
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self._max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        return value
+    
+    def invalidate(self, project_id: str):
+        """Drop a project's cached reads after its data changes"""
+        with self._lock:
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+            for kind in self._kinds:
+                self._entries.pop((kind, project_id), None)
+
+
+class SingleFlight:
+    """
+    Runs keyed calls once at a time per key.
+    
+    A caller that arrives while a call for its key is already running waits
+    for that call and gets its result (or exception) instead of starting a
+    second one.
+    """
+    
+    def __init__(self):
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+    
+    def run(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        """Return fn(*args), sharing the run with concurrent callers for the same key"""
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                future = self._in_flight[key] = Future()
+        if in_flight is not None:
+            return in_flight.result()
+        
+        try:
+            result = fn(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
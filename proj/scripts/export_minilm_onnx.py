@@ -0,0 +1,50 @@
+"""
+One-time export of all-MiniLM-L6-v2 to ONNX with dynamic int8 weights.
+
+Writes model_quantized.onnx plus the tokenizer files to the directory the
+risk agent reads (RISK_ONNX_MODEL_DIR, default data/onnx_minilm). Run from
+the proj directory:
+
+    python scripts/export_minilm_onnx.py
+"""
+
+import os
+import sys
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModel, AutoTokenizer
+
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+OUT_DIR = os.getenv('RISK_ONNX_MODEL_DIR', os.path.join('data', 'onnx_minilm'))
+
+
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME)
+    model.eval()
+
+    dummy = tokenizer(["export sample"], return_tensors='pt')
+    fp32_path = os.path.join(OUT_DIR, 'model.onnx')
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in dummy.keys()}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    torch.onnx.export(
+        model,
+        (dict(dummy),),
+        fp32_path,
+        input_names=list(dummy.keys()),
+        output_names=['last_hidden_state'],
+        dynamic_axes=dynamic_axes,
+        opset_version=14
+    )
+    print("Exported", fp32_path)
+
+    quantized_path = os.path.join(OUT_DIR, 'model_quantized.onnx')
+    quantize_dynamic(fp32_path, quantized_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(OUT_DIR)
+    print("Wrote", quantized_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
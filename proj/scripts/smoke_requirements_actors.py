@@ -1,19 +1,34 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE = "http://localhost:5000"
 
-def check_health():
-    r = requests.get(f"{BASE}/health", timeout=5)
+def make_session():
+    # Keep-alive session so every check reuses one connection
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.1)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def check_health(session):
+    r = session.get(f"{BASE}/health", timeout=5)
     print("/health", r.status_code, r.text[:200])
 
-def post_expect_400(path):
-    r = requests.post(f"{BASE}{path}", json={}, timeout=5)
+def post_expect_400(session, path):
+    r = session.post(f"{BASE}{path}", json={}, timeout=5)
     print(path, r.status_code, r.text[:200])
 
 def main():
-    check_health()
-    post_expect_400("/performance_agent/extract_requirements")
-    post_expect_400("/performance_agent/extract_actors")
+    with make_session() as session:
+        check_health(session)
+        post_expect_400(session, "/performance_agent/extract_requirements")
+        post_expect_400(session, "/performance_agent/extract_actors")
 
 if __name__ == "__main__":
     main()
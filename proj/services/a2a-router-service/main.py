@@ -5,9 +5,20 @@ Flask service exposing A2A router functionality via HTTP endpoints.
 
 import sys
 import os
-from flask import Flask, request, jsonify
+import json
+from flask import Flask, Response, request, jsonify, stream_with_context
 import logging
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 # Add project root to path to import backend modules
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.insert(0, project_root)
@@ -105,7 +116,9 @@ def send_message():
     Expected JSON: A2AMessage dictionary
     """
     try:
-        data = request.get_json()
+        # Decode the raw body once; invalid JSON surfaces as a ValueError (400)
+        body = request.get_data()
+        data = _json_loads(body) if body else None
         if not data:
             return jsonify({"error": "Request body is required"}), 400
         
@@ -160,10 +173,14 @@ def get_history():
             message_type=message_type
         )
         
-        return jsonify({
-            "history": history,
-            "count": len(history)
-        }), 200
+        # Stream entries one at a time rather than serializing the whole list at once
+        def generate():
+            yield '{"count": %d, "history": [' % len(history)
+            for i, entry in enumerate(history):
+                yield (',' if i else '') + _json_dumps(entry)
+            yield ']}'
+        
+        return Response(stream_with_context(generate()), mimetype='application/json'), 200
     except Exception as e:
         logger.error(f"Error getting history: {e}")
         return jsonify({"error": str(e)}), 500
@@ -196,4 +213,14 @@ def clear_history():
 
 if __name__ == '__main__':
     logger.info("Starting A2A Router Service on port 8004")
-    app.run(host='0.0.0.0', port=8004, debug=True)
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve:
+        # Production WSGI server; handles requests on a thread pool
+        serve(app, host='0.0.0.0', port=8004, threads=int(os.getenv('ROUTER_THREADS', '16')))
+    else:
+        logger.warning("waitress not installed, falling back to the threaded Flask server")
+        app.run(host='0.0.0.0', port=8004, threaded=True)
@@ -5,6 +5,8 @@ Flask service for CSV Analysis Agent with A2A integration.
 
 import sys
 import os
+import shutil
+import tempfile
 
 # Add project root to path FIRST
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -14,29 +16,54 @@ sys.path.insert(0, project_root)
 from backend.chromadb_patch import chromadb
 
 from flask import Flask, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
 import logging
 
-from backend.csv_analysis_agent.csv_analysis_agent import CSVAnalysisAgent
 from backend.a2a_router.router import A2ARouter
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
-from backend.llm_manager import LLMManager
-from backend.financial_agent.agents.anomaly_detection_agent import AnomalyDetectionAgent
-from backend.financial_agent.chroma_manager import FinancialChromaManager
+from backend.service_utils import ORJSONProvider, lazy_singleton
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+if ORJSONProvider:
+    app.json = ORJSONProvider(app)
+# Cap request bodies (mainly CSV uploads) so oversized uploads can't fill the temp dir
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('CSV_MAX_UPLOAD_BYTES', str(200 * 1024 * 1024)))
 
-# Initialize managers
-llm_manager = LLMManager()
+# The A2A router is cheap and needed for registration below
 a2a_router = A2ARouter()
-chroma_manager = FinancialChromaManager()
-anomaly_agent = AnomalyDetectionAgent(chroma_manager)
 
-# Initialize CSV Analysis Agent with A2A router
-csv_analysis_agent = CSVAnalysisAgent(llm_manager, a2a_router, anomaly_agent)
+
+# The LLM, embedding model and ChromaDB-backed agents are built on first use,
+# so the service starts (and answers /health) without waiting for them
+@lazy_singleton
+def _llm_manager():
+    from backend.llm_manager import LLMManager
+    return LLMManager()
+
+
+@lazy_singleton
+def _chroma_manager():
+    from backend.financial_agent.chroma_manager import FinancialChromaManager
+    return FinancialChromaManager()
+
+
+@lazy_singleton
+def _anomaly_agent():
+    from backend.financial_agent.agents.anomaly_detection_agent import AnomalyDetectionAgent
+    return AnomalyDetectionAgent(_chroma_manager())
+
+
+@lazy_singleton
+def _csv_agent():
+    """CSV Analysis Agent wired to the shared A2A router"""
+    from backend.csv_analysis_agent.csv_analysis_agent import CSVAnalysisAgent
+    return CSVAnalysisAgent(_llm_manager(), a2a_router, _anomaly_agent())
+
 
 # Register with A2A router
 a2a_router.register_agent(
@@ -46,6 +73,28 @@ a2a_router.register_agent(
 )
 
 
+MAX_JSON_BODY_BYTES = int(os.getenv('CSV_MAX_JSON_BYTES', str(16 * 1024 * 1024)))
+
+
+def _get_json_body():
+    """
+    Parse the request's JSON body once, checking its declared size first.
+    
+    Returns:
+        (data, None) for a usable body, or (None, error response) when it is
+        too large, malformed or missing
+    """
+    if request.content_length is not None and request.content_length > MAX_JSON_BODY_BYTES:
+        return None, (jsonify({"error": "Request body too large"}), 413)
+    
+    data = request.get_json(cache=True, silent=True)
+    if data is None:
+        return None, (jsonify({"error": "Invalid or missing JSON body"}), 400)
+    if not data:
+        return None, (jsonify({"error": "Request body is required"}), 400)
+    return data, None
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -77,30 +126,23 @@ def upload():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Save uploaded file temporarily
-        import tempfile
-        import uuid
-        temp_dir = tempfile.gettempdir()
-        temp_filename = f"{uuid.uuid4()}_{file.filename}"
-        temp_path = os.path.join(temp_dir, temp_filename)
-        file.save(temp_path)
+        # Copy the upload to a temp file in 1 MiB chunks; the name is sanitized
+        # since it comes from the client
+        with tempfile.NamedTemporaryFile(suffix=f"_{secure_filename(file.filename)}", delete=False,
+                                         buffering=0) as temp_file:
+            shutil.copyfileobj(file.stream, temp_file, length=1 << 20)
+            temp_path = temp_file.name
         
         try:
             # Process CSV
-            result = csv_analysis_agent.upload_csv(project_id, temp_path)
-            
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            
+            result = _csv_agent().upload_csv(project_id, temp_path)
             return jsonify(result), 200
-            
-        except Exception as e:
-            # Clean up temp file on error
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            raise e
+        finally:
+            # Clean up temp file
+            os.unlink(temp_path)
         
+    except RequestEntityTooLarge:
+        return jsonify({"error": "File too large"}), 413
     except Exception as e:
         logger.error(f"Error in upload: {e}")
         return jsonify({"error": str(e)}), 500
@@ -120,20 +162,20 @@ def ask():
     }
     """
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
+        data, error_response = _get_json_body()
+        if error_response:
+            return error_response
         
         project_id = data.get('project_id')
         session_id = data.get('session_id')
         question = data.get('question')
         selected_cells = data.get('selected_cells', [])
         
-        if not all([project_id, session_id, question]):
+        if not (project_id and session_id and question):
             return jsonify({"error": "project_id, session_id, and question are required"}), 400
         
         # Ask question
-        result = csv_analysis_agent.ask_question(
+        result = _csv_agent().ask_question(
             project_id, session_id, question, selected_cells
         )
         
@@ -156,18 +198,18 @@ def export():
     }
     """
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
+        data, error_response = _get_json_body()
+        if error_response:
+            return error_response
         
         project_id = data.get('project_id')
         session_id = data.get('session_id')
         
-        if not all([project_id, session_id]):
+        if not (project_id and session_id):
             return jsonify({"error": "project_id and session_id are required"}), 400
         
         # Export CSV
-        result = csv_analysis_agent.export_csv(project_id, session_id)
+        result = _csv_agent().export_csv(project_id, session_id)
         
         return jsonify(result), 200
         
@@ -189,11 +231,11 @@ def get_data():
         project_id = request.args.get('project_id')
         session_id = request.args.get('session_id')
         
-        if not all([project_id, session_id]):
+        if not (project_id and session_id):
             return jsonify({"error": "project_id and session_id are required"}), 400
         
         # Get CSV data
-        result = csv_analysis_agent.get_csv_data(project_id, session_id)
+        result = _csv_agent().get_csv_data(project_id, session_id)
         
         return jsonify(result), 200
         
@@ -210,9 +252,9 @@ def handle_a2a_message():
     Expected JSON: A2AMessage dictionary
     """
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
+        data, error_response = _get_json_body()
+        if error_response:
+            return error_response
         
         message = A2AMessage.from_dict(data)
         
@@ -237,4 +279,16 @@ def handle_a2a_message():
 
 if __name__ == '__main__':
     logger.info("Starting CSV Analysis Service on port 8003")
-    app.run(host='0.0.0.0', port=8003, debug=True)
+    debug_mode = os.getenv('CSV_ANALYSIS_DEBUG', 'False').lower() == 'true'
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve and not debug_mode:
+        # Production WSGI server; handles requests on a thread pool
+        serve(app, host='0.0.0.0', port=8003, threads=int(os.getenv('CSV_ANALYSIS_THREADS', '32')))
+    else:
+        if not serve:
+            logger.warning("waitress not installed, falling back to the threaded Flask server")
+        app.run(host='0.0.0.0', port=8003, debug=debug_mode, threaded=True)
@@ -5,6 +5,8 @@ Flask service for Financial Agent with LangGraph workflows.
 
 import sys
 import os
+import functools
+from typing import Any, Dict, List
 
 # Add project root to path FIRST
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -13,14 +15,15 @@ sys.path.insert(0, project_root)
 # CRITICAL: Import chromadb patch FIRST before any other imports
 from backend.chromadb_patch import chromadb
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import logging
 
 from backend.financial_agent.graphs.first_time_generation_graph import first_time_generation_graph, FirstTimeGenerationState
 from backend.financial_agent.graphs.refresh_graph import refresh_graph, RefreshState
-from backend.financial_agent.chroma_manager import FinancialChromaManager
+from backend.financial_agent.chroma_manager import FinancialChromaManager, TRANSACTION_EXPENSE, TRANSACTION_REVENUE
 from backend.a2a_router.router import A2ARouter
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
+from backend.service_utils import JobTable, ORJSONProvider, SingleFlight, StatusCache, lazy_singleton, wants_async
 from backend.llm_manager import LLMManager
 from backend.embeddings import EmbeddingsManager
 from backend.database import DatabaseManager
@@ -30,6 +33,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+if ORJSONProvider:
+    app.json = ORJSONProvider(app)
+
+# /health is polled constantly and never changes, so its body is encoded once.
+# Each hit still gets its own Response, since Flask finalizes responses in place.
+_HEALTH_BODY = app.json.dumps({
+    "status": "healthy",
+    "service": "financial-service",
+    "port": 8001
+}) + "\n"
 
 # Initialize managers
 llm_manager = LLMManager()
@@ -38,22 +51,173 @@ db_manager = DatabaseManager()
 chroma_manager = FinancialChromaManager()
 a2a_router = A2ARouter()
 
-# Register with A2A router
+# Register with A2A router. This stays at import time: it's an in-memory insert
+# into this process's router (no network or disk I/O), and the graphs send
+# through the router from the first request on.
 a2a_router.register_agent(
     agent_id="financial-service",
     agent_url="http://localhost:8001",
     metadata={"service": "financial", "version": "1.0"}
 )
 
+# Graph inputs are shallow copies of these templates; the per-request fields
+# and the mutable containers are filled in fresh by _generation_state/_refresh_state
+_GENERATION_STATE_TEMPLATE: FirstTimeGenerationState = {
+    "project_id": "",
+    "document_id": "",
+    "llm_manager": llm_manager,
+    "embeddings_manager": embeddings_manager,
+    "chroma_manager": chroma_manager,
+    "orchestrator": None,  # Can be added later
+    "a2a_router": a2a_router,
+    "financial_details_result": {},
+    "transactions_result": {},
+    "expenses_result": {},
+    "revenue_result": {},
+    "anomaly_result": {},
+    "overall_success": False,
+    "error": ""
+}
+_GENERATION_RESULT_KEYS = (
+    "financial_details_result", "transactions_result", "expenses_result",
+    "revenue_result", "anomaly_result"
+)
+
+_REFRESH_STATE_TEMPLATE: RefreshState = {
+    "project_id": "",
+    "llm_manager": llm_manager,
+    "embeddings_manager": embeddings_manager,
+    "chroma_manager": chroma_manager,
+    "db_manager": db_manager,
+    "orchestrator": None,
+    "a2a_router": a2a_router,
+    "new_documents": [],
+    "last_update": "",
+    "refresh_result": {},
+    "success": False,
+    "error": "",
+    "financial_data_dir": "data/financial"
+}
+
+
+def _generation_state(project_id: str, document_id: str) -> FirstTimeGenerationState:
+    """Initial state for a first-time generation run"""
+    state = _GENERATION_STATE_TEMPLATE.copy()
+    state["project_id"] = project_id
+    state["document_id"] = document_id
+    for key in _GENERATION_RESULT_KEYS:
+        state[key] = {}
+    return state
+
+
+def _refresh_state(project_id: str) -> RefreshState:
+    """Initial state for a refresh run"""
+    state = _REFRESH_STATE_TEMPLATE.copy()
+    state["project_id"] = project_id
+    state["new_documents"] = []
+    state["refresh_result"] = {}
+    return state
+
+# /status reads are cached per (kind, project_id) for STATUS_CACHE_TTL seconds
+# and dropped as soon as a generation or refresh rewrites the project's data
+STATUS_CACHE_TTL = float(os.getenv('FINANCIAL_STATUS_CACHE_TTL', '30'))  # seconds
+_status_cache = StatusCache(STATUS_CACHE_TTL, ('financial_details',))
+
+
+# Agents used by the A2A data actions are built once, on first use, and shared
+@lazy_singleton
+def _fin_interface():
+    """FinancialDataInterface over a shared FinancialAgent"""
+    from backend.financial_agent.financial_agent import FinancialAgent
+    from backend.financial_agent.data_interface import FinancialDataInterface
+    return FinancialDataInterface(FinancialAgent(llm_manager, embeddings_manager, db_manager))
+
+
+@lazy_singleton
+def _anomaly_agent():
+    from backend.financial_agent.agents.anomaly_detection_agent import AnomalyDetectionAgent
+    return AnomalyDetectionAgent(chroma_manager)
+
+
+# Graph runs requested with ?async=true go to this pool and return 202 with a
+# job id at once; clients poll /jobs/<job_id> for the response they'd otherwise get
+GRAPH_WORKERS = int(os.getenv('FINANCIAL_GRAPH_WORKERS', '4'))
+_graph_jobs = JobTable(GRAPH_WORKERS, 'financial-graph')
+
+
+def _run_generation(project_id: str, document_id: str) -> Dict[str, Any]:
+    """Run first-time generation for a project and format the endpoint response"""
+    initial_state = _generation_state(project_id, document_id)
+    
+    # Run graph
+    result = first_time_generation_graph.invoke(initial_state)
+    _status_cache.invalidate(project_id)
+    
+    # Format response
+    response = {
+        "success": result.get("overall_success", False),
+        "project_id": project_id,
+        "document_id": document_id,
+        "financial_details": result.get("financial_details_result", {}),
+        "transactions": result.get("transactions_result", {}),
+        "expenses": result.get("expenses_result", {}),
+        "revenue": result.get("revenue_result", {}),
+        "anomaly_detection": result.get("anomaly_result", {})
+    }
+    
+    if result.get("error"):
+        response["error"] = result["error"]
+    
+    return response
+
+
+# Refreshes are shared between concurrent callers for the same project
+_refreshes = SingleFlight()
+
+
+def _run_refresh(project_id: str) -> Dict[str, Any]:
+    """
+    Refresh a project, sharing one run between concurrent callers.
+    
+    The REST and A2A refresh entry points both come through here; a caller
+    that arrives while the project is already refreshing waits for that run
+    and gets its result instead of starting a second one.
+    
+    Args:
+        project_id: Project identifier
+        
+    Returns:
+        The /refresh response for the run
+    """
+    return _refreshes.run(project_id, _refresh_once, project_id)
+
+
+def _refresh_once(project_id: str) -> Dict[str, Any]:
+    """Run the refresh graph for a project and format the endpoint response"""
+    initial_state = _refresh_state(project_id)
+    
+    # Run graph
+    result = refresh_graph.invoke(initial_state)
+    _status_cache.invalidate(project_id)
+    
+    # Format response
+    response = {
+        "success": result.get("success", False),
+        "project_id": project_id,
+        "new_documents_processed": len(result.get("new_documents", [])),
+        "refresh_result": result.get("refresh_result", {})
+    }
+    
+    if result.get("error"):
+        response["error"] = result["error"]
+    
+    return response
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        "status": "healthy",
-        "service": "financial-service",
-        "port": 8001
-    }), 200
+    return Response(_HEALTH_BODY, status=200, mimetype='application/json')
 
 
 @app.route('/first_generation', methods=['POST'])
@@ -75,46 +239,14 @@ def first_generation():
         project_id = data['project_id']
         document_id = data['document_id']
         
-        # Initialize state
-        initial_state: FirstTimeGenerationState = {
-            "project_id": project_id,
-            "document_id": document_id,
-            "llm_manager": llm_manager,
-            "embeddings_manager": embeddings_manager,
-            "chroma_manager": chroma_manager,
-            "orchestrator": None,  # Can be added later
-            "a2a_router": a2a_router,
-            "financial_details_result": {},
-            "transactions_result": {},
-            "expenses_result": {},
-            "revenue_result": {},
-            "anomaly_result": {},
-            "overall_success": False,
-            "error": ""
-        }
-        
-        # Run graph
-        result = first_time_generation_graph.invoke(initial_state)
-        
-        # Format response
-        response = {
-            "success": result.get("overall_success", False),
-            "project_id": project_id,
-            "document_id": document_id,
-            "financial_details": result.get("financial_details_result", {}),
-            "transactions": result.get("transactions_result", {}),
-            "expenses": result.get("expenses_result", {}),
-            "revenue": result.get("revenue_result", {}),
-            "anomaly_detection": result.get("anomaly_result", {})
-        }
-        
-        if result.get("error"):
-            response["error"] = result["error"]
+        if wants_async():
+            job_id = _graph_jobs.submit(_run_generation, project_id, document_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
         
-        return jsonify(response), 200
+        return jsonify(_run_generation(project_id, document_id)), 200
         
     except Exception as e:
-        logger.error(f"Error in first_generation: {e}")
+        logger.error("Error in first_generation: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -127,41 +259,14 @@ def refresh(project_id: str):
         project_id: Project identifier
     """
     try:
-        # Initialize state
-        initial_state: RefreshState = {
-            "project_id": project_id,
-            "llm_manager": llm_manager,
-            "embeddings_manager": embeddings_manager,
-            "chroma_manager": chroma_manager,
-            "db_manager": db_manager,
-            "orchestrator": None,
-            "a2a_router": a2a_router,
-            "new_documents": [],
-            "last_update": "",
-            "refresh_result": {},
-            "success": False,
-            "error": "",
-            "financial_data_dir": "data/financial"
-        }
+        if wants_async():
+            job_id = _graph_jobs.submit(_run_refresh, project_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
         
-        # Run graph
-        result = refresh_graph.invoke(initial_state)
-        
-        # Format response
-        response = {
-            "success": result.get("success", False),
-            "project_id": project_id,
-            "new_documents_processed": len(result.get("new_documents", [])),
-            "refresh_result": result.get("refresh_result", {})
-        }
-        
-        if result.get("error"):
-            response["error"] = result["error"]
-        
-        return jsonify(response), 200
+        return jsonify(_run_refresh(project_id)), 200
         
     except Exception as e:
-        logger.error(f"Error in refresh: {e}")
+        logger.error("Error in refresh: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -175,26 +280,23 @@ def status(project_id: str):
     """
     try:
         # Get current financial data
-        financial_details = chroma_manager.get_financial_data('financial_details', project_id)
-        transactions = chroma_manager.get_financial_data('transactions', project_id)
-        
-        # Calculate totals
-        total_expenses = sum(
-            float(t.get('metadata', {}).get('amount', 0))
-            for t in transactions
-            if t.get('metadata', {}).get('transaction_type') == 'expense'
+        financial_details = _status_cache.get(
+            'financial_details', project_id,
+            lambda pid: chroma_manager.get_financial_data('financial_details', pid)
         )
+        # FinancialChromaManager keeps these columns itself, dropping them on writes
+        transactions = chroma_manager.get_transaction_columns(project_id)
+        amounts = transactions['amounts']
+        transaction_types = transactions['transaction_types']
         
-        total_revenue = sum(
-            float(t.get('metadata', {}).get('amount', 0))
-            for t in transactions
-            if t.get('metadata', {}).get('transaction_type') == 'revenue'
-        )
+        # Calculate totals as vectorized reductions over the amount column
+        total_expenses = float(amounts[transaction_types == TRANSACTION_EXPENSE].sum())
+        total_revenue = float(amounts[transaction_types == TRANSACTION_REVENUE].sum())
         
         response = {
             "project_id": project_id,
             "financial_details_count": len(financial_details),
-            "transactions_count": len(transactions),
+            "transactions_count": len(amounts),
             "total_expenses": total_expenses,
             "total_revenue": total_revenue
         }
@@ -202,10 +304,152 @@ def status(project_id: str):
         return jsonify(response), 200
         
     except Exception as e:
-        logger.error(f"Error in status: {e}")
+        logger.error("Error in status: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    """
+    Get the state of a queued first_generation/refresh run.
+    
+    Args:
+        job_id: Job identifier returned with the 202 response
+    """
+    body, status_code = _graph_jobs.status(job_id)
+    return jsonify(body), status_code
+
+
+def _a2a_response(message: A2AMessage, payload: Dict[str, Any]):
+    """JSON response carrying an A2A reply to message"""
+    response_msg = A2AMessage.create_response(
+        sender_agent="financial-service",
+        recipient_agent=message.sender_agent,
+        payload=payload,
+        correlation_id=message.message_id
+    )
+    return jsonify(response_msg.to_dict()), 200
+
+
+# Items serialized per chunk when streaming a list payload
+_STREAM_BATCH_SIZE = 256
+
+
+def _stream_a2a_response(message: A2AMessage, key: str, items: List[Any]):
+    """
+    Streamed JSON response carrying an A2A reply whose payload is {key: items}.
+    
+    The envelope is serialized once and the list is encoded in batches as the
+    response is written, so a large list is never held as one JSON string.
+    
+    Args:
+        message: Message being replied to
+        key: Payload key for the list
+        items: JSON-serializable items
+    """
+    envelope = A2AMessage.create_response(
+        sender_agent="financial-service",
+        recipient_agent=message.sender_agent,
+        payload={},
+        correlation_id=message.message_id
+    ).to_dict()
+    del envelope['payload']
+    dumps = app.json.dumps
+    
+    def generate():
+        yield f'{dumps(envelope)[:-1]},"payload":{{{dumps(key)}:['
+        for start in range(0, len(items), _STREAM_BATCH_SIZE):
+            batch = ','.join(dumps(item) for item in items[start:start + _STREAM_BATCH_SIZE])
+            yield f',{batch}' if start else batch
+        yield ']}}'
+    
+    return Response(generate(), status=200, mimetype='application/json')
+
+
+def _a2a_safe(activity: str):
+    """Report exceptions raised by an A2A action handler as an A2A error reply"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(message: A2AMessage, project_id: str):
+            try:
+                return handler(message, project_id)
+            except Exception as e:
+                logger.error("Error %s: %s", activity, e, exc_info=True)
+                error_msg = A2AMessage.create_error(
+                    sender_agent="financial-service",
+                    recipient_agent=message.sender_agent,
+                    error_message=str(e),
+                    correlation_id=message.message_id
+                )
+                return jsonify(error_msg.to_dict()), 500
+        return wrapper
+    return decorator
+
+
+def _handle_refresh(message: A2AMessage, project_id: str):
+    """Run the refresh graph for a project (e.g. on the scheduler's request)"""
+    if not project_id:
+        return jsonify({"error": "Unknown action"}), 400
+    
+    result = _run_refresh(project_id)
+    return _a2a_response(message, {
+        "success": result["success"],
+        "project_id": project_id
+    })
+
+
+# data_type -> FinancialDataInterface getter for get_financial_data
+_FINANCIAL_DATA_GETTERS = {
+    "expenses": "get_expenses",
+    "revenue": "get_revenue",
+    "budget": "get_budget_info",
+    "health": "get_financial_health"
+}
+
+
+@_a2a_safe("getting financial data")
+def _handle_get_financial_data(message: A2AMessage, project_id: str):
+    """Get financial data (expenses, revenue, budget, health)"""
+    data_type = message.payload.get("data_type")
+    if not project_id or not data_type:
+        return jsonify({"error": "project_id and data_type required"}), 400
+    
+    getter = _FINANCIAL_DATA_GETTERS.get(data_type)
+    if not getter:
+        return jsonify({"error": f"Unknown data_type: {data_type}"}), 400
+    
+    data = getattr(_fin_interface(), getter)(project_id)
+    return _a2a_response(message, {"data": data})
+
+
+@_a2a_safe("getting transactions")
+def _handle_get_transactions(message: A2AMessage, project_id: str):
+    """Get transactions with optional filters"""
+    if not project_id:
+        return jsonify({"error": "project_id required"}), 400
+    
+    transactions = _fin_interface().get_transactions(project_id, message.payload.get("filters"))
+    return _stream_a2a_response(message, "transactions", transactions)
+
+
+@_a2a_safe("getting anomalies")
+def _handle_get_anomalies(message: A2AMessage, project_id: str):
+    """Get detected anomalies, optionally filtered by severity"""
+    if not project_id:
+        return jsonify({"error": "project_id required"}), 400
+    
+    result = _anomaly_agent().get_anomalies(project_id, message.payload.get("severity_filter", "all"))
+    return _a2a_response(message, {"result": result})
+
+
+_ACTION_HANDLERS = {
+    "refresh": _handle_refresh,
+    "get_financial_data": _handle_get_financial_data,
+    "get_transactions": _handle_get_transactions,
+    "get_anomalies": _handle_get_anomalies
+}
+
+
 @app.route('/a2a/message', methods=['POST'])
 def handle_a2a_message():
     """
@@ -220,158 +464,30 @@ def handle_a2a_message():
         
         message = A2AMessage.from_dict(data)
         
-        # Handle different action types
-        if message.message_type == MessageType.REQUEST:
-            action = message.payload.get("action")
-            project_id = message.payload.get("project_id")
-            
-            if action == "refresh":
-                if project_id:
-                    # Trigger refresh
-                    initial_state: RefreshState = {
-                        "project_id": project_id,
-                        "llm_manager": llm_manager,
-                        "embeddings_manager": embeddings_manager,
-                        "chroma_manager": chroma_manager,
-                        "db_manager": db_manager,
-                        "orchestrator": None,
-                        "a2a_router": a2a_router,
-                        "new_documents": [],
-                        "last_update": "",
-                        "refresh_result": {},
-                        "success": False,
-                        "error": "",
-                        "financial_data_dir": "data/financial"
-                    }
-                    
-                    result = refresh_graph.invoke(initial_state)
-                    
-                    # Send response
-                    response_msg = A2AMessage.create_response(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        payload={
-                            "success": result.get("success", False),
-                            "project_id": project_id
-                        },
-                        correlation_id=message.message_id
-                    )
-                    
-                    return jsonify(response_msg.to_dict()), 200
-            
-            elif action == "get_financial_data":
-                # Get financial data (expenses, revenue, budget, health)
-                data_type = message.payload.get("data_type")
-                if not project_id or not data_type:
-                    return jsonify({"error": "project_id and data_type required"}), 400
-                
-                try:
-                    from backend.financial_agent.data_interface import FinancialDataInterface
-                    from backend.financial_agent.financial_agent import FinancialAgent
-                    
-                    # Create temporary financial agent for data access
-                    financial_agent = FinancialAgent(llm_manager, embeddings_manager, db_manager)
-                    fin_interface = FinancialDataInterface(financial_agent)
-                    
-                    if data_type == "expenses":
-                        data = fin_interface.get_expenses(project_id)
-                    elif data_type == "revenue":
-                        data = fin_interface.get_revenue(project_id)
-                    elif data_type == "budget":
-                        data = fin_interface.get_budget_info(project_id)
-                    elif data_type == "health":
-                        data = fin_interface.get_financial_health(project_id)
-                    else:
-                        return jsonify({"error": f"Unknown data_type: {data_type}"}), 400
-                    
-                    response_msg = A2AMessage.create_response(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        payload={"data": data},
-                        correlation_id=message.message_id
-                    )
-                    
-                    return jsonify(response_msg.to_dict()), 200
-                except Exception as e:
-                    logger.error(f"Error getting financial data: {e}")
-                    error_msg = A2AMessage.create_error(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        error_message=str(e),
-                        correlation_id=message.message_id
-                    )
-                    return jsonify(error_msg.to_dict()), 500
-            
-            elif action == "get_transactions":
-                # Get transactions with optional filters
-                filters = message.payload.get("filters")
-                if not project_id:
-                    return jsonify({"error": "project_id required"}), 400
-                
-                try:
-                    from backend.financial_agent.data_interface import FinancialDataInterface
-                    from backend.financial_agent.financial_agent import FinancialAgent
-                    
-                    financial_agent = FinancialAgent(llm_manager, embeddings_manager, db_manager)
-                    fin_interface = FinancialDataInterface(financial_agent)
-                    
-                    transactions = fin_interface.get_transactions(project_id, filters)
-                    
-                    response_msg = A2AMessage.create_response(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        payload={"transactions": transactions},
-                        correlation_id=message.message_id
-                    )
-                    
-                    return jsonify(response_msg.to_dict()), 200
-                except Exception as e:
-                    logger.error(f"Error getting transactions: {e}")
-                    error_msg = A2AMessage.create_error(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        error_message=str(e),
-                        correlation_id=message.message_id
-                    )
-                    return jsonify(error_msg.to_dict()), 500
-            
-            elif action == "get_anomalies":
-                # Get anomalies
-                severity_filter = message.payload.get("severity_filter", "all")
-                if not project_id:
-                    return jsonify({"error": "project_id required"}), 400
-                
-                try:
-                    from backend.financial_agent.agents.anomaly_detection_agent import AnomalyDetectionAgent
-                    
-                    anomaly_agent = AnomalyDetectionAgent(chroma_manager)
-                    result = anomaly_agent.get_anomalies(project_id, severity_filter)
-                    
-                    response_msg = A2AMessage.create_response(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        payload={"result": result},
-                        correlation_id=message.message_id
-                    )
-                    
-                    return jsonify(response_msg.to_dict()), 200
-                except Exception as e:
-                    logger.error(f"Error getting anomalies: {e}")
-                    error_msg = A2AMessage.create_error(
-                        sender_agent="financial-service",
-                        recipient_agent=message.sender_agent,
-                        error_message=str(e),
-                        correlation_id=message.message_id
-                    )
-                    return jsonify(error_msg.to_dict()), 500
+        if message.message_type is MessageType.REQUEST:
+            handler = _ACTION_HANDLERS.get(message.payload.get("action"))
+            if handler:
+                return handler(message, message.payload.get("project_id"))
         
         return jsonify({"error": "Unknown action"}), 400
         
     except Exception as e:
-        logger.error(f"Error handling A2A message: {e}")
+        logger.error("Error handling A2A message: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
 if __name__ == '__main__':
     logger.info("Starting Financial Service on port 8001")
-    app.run(host='0.0.0.0', port=8001, debug=True)
+    debug_mode = os.getenv('FINANCIAL_DEBUG', 'False').lower() == 'true'
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve and not debug_mode:
+        # Production WSGI server; graph runs block on LLM/ChromaDB I/O, so serve them on a thread pool
+        serve(app, host='0.0.0.0', port=8001, threads=int(os.getenv('FINANCIAL_THREADS', '16')))
+    else:
+        if not serve:
+            logger.warning("waitress not installed, falling back to the threaded Flask server")
+        app.run(host='0.0.0.0', port=8001, debug=debug_mode, threaded=True)
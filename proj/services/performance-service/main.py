@@ -5,6 +5,7 @@ Flask service for Performance Agent with LangGraph workflows.
 
 import sys
 import os
+from typing import Any, Dict
 
 # Add project root to path FIRST
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -13,7 +14,7 @@ sys.path.insert(0, project_root)
 # CRITICAL: Import chromadb patch FIRST before any other imports
 from backend.chromadb_patch import chromadb
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import logging
 
 from backend.performance_agent.graphs.first_time_generation_graph import first_time_generation_graph, PerformanceGenerationState
@@ -21,6 +22,7 @@ from backend.performance_agent.graphs.refresh_graph import refresh_graph, Perfor
 from backend.performance_agent.chroma_manager import PerformanceChromaManager
 from backend.a2a_router.router import A2ARouter
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
+from backend.service_utils import JobTable, ORJSONProvider, SingleFlight, StatusCache, lazy_singleton, wants_async
 from backend.llm_manager import LLMManager
 from backend.embeddings import EmbeddingsManager
 from backend.database import DatabaseManager
@@ -30,6 +32,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+if ORJSONProvider:
+    app.json = ORJSONProvider(app)
+
+# /health is polled constantly and never changes, so its body is encoded once.
+# Each hit still gets its own Response, since Flask finalizes responses in place.
+_HEALTH_BODY = app.json.dumps({
+    "status": "healthy",
+    "service": "performance-service",
+    "port": 8002
+}) + "\n"
 
 # Initialize managers
 llm_manager = LLMManager()
@@ -38,22 +50,181 @@ db_manager = DatabaseManager()
 chroma_manager = PerformanceChromaManager()
 a2a_router = A2ARouter()
 
-# Register with A2A router
+# Register with A2A router. This stays at import time: it's an in-memory insert
+# into this process's router (no network or disk I/O), and the graphs send
+# through the router from the first request on.
 a2a_router.register_agent(
     agent_id="performance-service",
     agent_url="http://localhost:8002",
     metadata={"service": "performance", "version": "1.0"}
 )
 
+# Graph inputs are shallow copies of these templates; the per-request fields
+# and the mutable containers are filled in fresh by _generation_state/_refresh_state
+_GENERATION_STATE_TEMPLATE: PerformanceGenerationState = {
+    "project_id": "",
+    "document_id": "",
+    "llm_manager": llm_manager,
+    "embeddings_manager": embeddings_manager,
+    "chroma_manager": chroma_manager,
+    "db_manager": db_manager,
+    "orchestrator": None,  # Can be added later
+    "a2a_router": a2a_router,
+    "milestones_result": {},
+    "tasks_result": {},
+    "bottlenecks_result": {},
+    "requirements_result": {},
+    "actors_result": {},
+    "details_result": {},
+    "suggestions_result": {},
+    "completion_score": 0.0,
+    "overall_success": False,
+    "error": ""
+}
+_GENERATION_RESULT_KEYS = (
+    "milestones_result", "tasks_result", "bottlenecks_result", "requirements_result",
+    "actors_result", "details_result", "suggestions_result"
+)
+
+_REFRESH_STATE_TEMPLATE: PerformanceRefreshState = {
+    "project_id": "",
+    "llm_manager": llm_manager,
+    "embeddings_manager": embeddings_manager,
+    "chroma_manager": chroma_manager,
+    "db_manager": db_manager,
+    "orchestrator": None,
+    "a2a_router": a2a_router,
+    "performance_data_dir": "data/performance",
+    "new_documents": [],
+    "last_update": "",
+    "refresh_result": {},
+    "success": False,
+    "error": ""
+}
+
+
+def _generation_state(project_id: str, document_id: str) -> PerformanceGenerationState:
+    """Initial state for a first-time generation run"""
+    state = _GENERATION_STATE_TEMPLATE.copy()
+    state["project_id"] = project_id
+    state["document_id"] = document_id
+    for key in _GENERATION_RESULT_KEYS:
+        state[key] = {}
+    return state
+
+
+def _refresh_state(project_id: str) -> PerformanceRefreshState:
+    """Initial state for a refresh run"""
+    state = _REFRESH_STATE_TEMPLATE.copy()
+    state["project_id"] = project_id
+    state["new_documents"] = []
+    state["refresh_result"] = {}
+    return state
+
+# /status reads are cached per (kind, project_id) for STATUS_CACHE_TTL seconds
+# and dropped as soon as a generation or refresh rewrites the project's data
+STATUS_CACHE_TTL = float(os.getenv('PERFORMANCE_STATUS_CACHE_TTL', '30'))  # seconds
+_status_cache = StatusCache(STATUS_CACHE_TTL, ('milestones', 'tasks', 'bottlenecks'))
+
+
+# Agents are built once, on first use, and shared across requests
+@lazy_singleton
+def _performance_agent():
+    from backend.performance_agent.performance_agent import PerformanceAgent
+    return PerformanceAgent(llm_manager, embeddings_manager, db_manager)
+
+
+@lazy_singleton
+def _status_agents():
+    """Milestone, task and bottleneck agents over the service's chroma manager"""
+    from backend.performance_agent.agents.milestone_agent import MilestoneAgent
+    from backend.performance_agent.agents.task_agent import TaskAgent
+    from backend.performance_agent.agents.bottleneck_agent import BottleneckAgent
+    return MilestoneAgent(chroma_manager), TaskAgent(chroma_manager), BottleneckAgent(chroma_manager)
+
+
+# Graph runs requested with ?async=true go to this pool and return 202 with a
+# job id at once; clients poll /jobs/<job_id> for the response they'd otherwise get
+GRAPH_WORKERS = int(os.getenv('PERFORMANCE_GRAPH_WORKERS', '4'))
+_graph_jobs = JobTable(GRAPH_WORKERS, 'performance-graph')
+
+
+def _run_generation(project_id: str, document_id: str) -> Dict[str, Any]:
+    """Run first-time generation for a project and format the endpoint response"""
+    initial_state = _generation_state(project_id, document_id)
+    
+    # Run graph
+    result = first_time_generation_graph.invoke(initial_state)
+    _status_cache.invalidate(project_id)
+    
+    # Format response
+    response = {
+        "success": result.get("overall_success", False),
+        "project_id": project_id,
+        "document_id": document_id,
+        "milestones": result.get("milestones_result", {}),
+        "tasks": result.get("tasks_result", {}),
+        "bottlenecks": result.get("bottlenecks_result", {}),
+        "requirements": result.get("requirements_result", {}),
+        "actors": result.get("actors_result", {}),
+        "details": result.get("details_result", {}),
+        "suggestions": result.get("suggestions_result", {}),
+        "completion_score": result.get("completion_score", 0.0)
+    }
+    
+    if result.get("error"):
+        response["error"] = result["error"]
+    
+    return response
+
+
+# Refreshes are shared between concurrent callers for the same project
+_refreshes = SingleFlight()
+
+
+def _run_refresh(project_id: str) -> Dict[str, Any]:
+    """
+    Refresh a project, sharing one run between concurrent callers.
+    
+    The REST and A2A refresh entry points both come through here; a caller
+    that arrives while the project is already refreshing waits for that run
+    and gets its result instead of starting a second one.
+    
+    Args:
+        project_id: Project identifier
+        
+    Returns:
+        The /refresh response for the run
+    """
+    return _refreshes.run(project_id, _refresh_once, project_id)
+
+
+def _refresh_once(project_id: str) -> Dict[str, Any]:
+    """Run the refresh graph for a project and format the endpoint response"""
+    initial_state = _refresh_state(project_id)
+    
+    # Run graph
+    result = refresh_graph.invoke(initial_state)
+    _status_cache.invalidate(project_id)
+    
+    # Format response
+    response = {
+        "success": result.get("success", False),
+        "project_id": project_id,
+        "new_documents_processed": len(result.get("new_documents", [])),
+        "refresh_result": result.get("refresh_result", {})
+    }
+    
+    if result.get("error"):
+        response["error"] = result["error"]
+    
+    return response
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        "status": "healthy",
-        "service": "performance-service",
-        "port": 8002
-    }), 200
+    return Response(_HEALTH_BODY, status=200, mimetype='application/json')
 
 
 @app.route('/first_generation', methods=['POST'])
@@ -75,53 +246,14 @@ def first_generation():
         project_id = data['project_id']
         document_id = data['document_id']
         
-        # Initialize state
-        initial_state: PerformanceGenerationState = {
-            "project_id": project_id,
-            "document_id": document_id,
-            "llm_manager": llm_manager,
-            "embeddings_manager": embeddings_manager,
-            "chroma_manager": chroma_manager,
-            "db_manager": db_manager,
-            "orchestrator": None,  # Can be added later
-            "a2a_router": a2a_router,
-            "milestones_result": {},
-            "tasks_result": {},
-            "bottlenecks_result": {},
-            "requirements_result": {},
-            "actors_result": {},
-            "details_result": {},
-            "suggestions_result": {},
-            "completion_score": 0.0,
-            "overall_success": False,
-            "error": ""
-        }
+        if wants_async():
+            job_id = _graph_jobs.submit(_run_generation, project_id, document_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
         
-        # Run graph
-        result = first_time_generation_graph.invoke(initial_state)
-        
-        # Format response
-        response = {
-            "success": result.get("overall_success", False),
-            "project_id": project_id,
-            "document_id": document_id,
-            "milestones": result.get("milestones_result", {}),
-            "tasks": result.get("tasks_result", {}),
-            "bottlenecks": result.get("bottlenecks_result", {}),
-            "requirements": result.get("requirements_result", {}),
-            "actors": result.get("actors_result", {}),
-            "details": result.get("details_result", {}),
-            "suggestions": result.get("suggestions_result", {}),
-            "completion_score": result.get("completion_score", 0.0)
-        }
-        
-        if result.get("error"):
-            response["error"] = result["error"]
-        
-        return jsonify(response), 200
+        return jsonify(_run_generation(project_id, document_id)), 200
         
     except Exception as e:
-        logger.error(f"Error in first_generation: {e}")
+        logger.error("Error in first_generation: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -135,12 +267,10 @@ def extract_requirements():
         if not all([project_id, document_id]):
             return jsonify({"error": "project_id and document_id are required"}), 400
         # Directly use agent (PerformanceAgent coordinates internally)
-        from backend.performance_agent.performance_agent import PerformanceAgent
-        perf_agent = PerformanceAgent(llm_manager, embeddings_manager, db_manager)
-        result = perf_agent.requirements_agent.extract_requirements_from_document(project_id, document_id, llm_manager)
+        result = _performance_agent().requirements_agent.extract_requirements_from_document(project_id, document_id, llm_manager)
         return jsonify(result), 200 if result.get('success') else 500
     except Exception as e:
-        logger.error(f"Error in extract_requirements: {e}")
+        logger.error("Error in extract_requirements: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -153,12 +283,10 @@ def extract_actors():
         document_id = data.get('document_id')
         if not all([project_id, document_id]):
             return jsonify({"error": "project_id and document_id are required"}), 400
-        from backend.performance_agent.performance_agent import PerformanceAgent
-        perf_agent = PerformanceAgent(llm_manager, embeddings_manager, db_manager)
-        result = perf_agent.actors_agent.extract_actors_from_document(project_id, document_id, llm_manager)
+        result = _performance_agent().actors_agent.extract_actors_from_document(project_id, document_id, llm_manager)
         return jsonify(result), 200 if result.get('success') else 500
     except Exception as e:
-        logger.error(f"Error in extract_actors: {e}")
+        logger.error("Error in extract_actors: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -169,7 +297,7 @@ def get_requirements(project_id: str):
         data = chroma_manager.get_performance_data('requirements', project_id)
         return jsonify({'requirements': data}), 200
     except Exception as e:
-        logger.error(f"Error fetching requirements: {e}")
+        logger.error("Error fetching requirements: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -180,7 +308,7 @@ def get_actors(project_id: str):
         data = chroma_manager.get_performance_data('actors', project_id)
         return jsonify({'actors': data}), 200
     except Exception as e:
-        logger.error(f"Error fetching actors: {e}")
+        logger.error("Error fetching actors: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -193,41 +321,14 @@ def refresh(project_id: str):
         project_id: Project identifier
     """
     try:
-        # Initialize state
-        initial_state: PerformanceRefreshState = {
-            "project_id": project_id,
-            "llm_manager": llm_manager,
-            "embeddings_manager": embeddings_manager,
-            "chroma_manager": chroma_manager,
-            "db_manager": db_manager,
-            "orchestrator": None,
-            "a2a_router": a2a_router,
-            "performance_data_dir": "data/performance",
-            "new_documents": [],
-            "last_update": "",
-            "refresh_result": {},
-            "success": False,
-            "error": ""
-        }
+        if wants_async():
+            job_id = _graph_jobs.submit(_run_refresh, project_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
         
-        # Run graph
-        result = refresh_graph.invoke(initial_state)
-        
-        # Format response
-        response = {
-            "success": result.get("success", False),
-            "project_id": project_id,
-            "new_documents_processed": len(result.get("new_documents", [])),
-            "refresh_result": result.get("refresh_result", {})
-        }
-        
-        if result.get("error"):
-            response["error"] = result["error"]
-        
-        return jsonify(response), 200
+        return jsonify(_run_refresh(project_id)), 200
         
     except Exception as e:
-        logger.error(f"Error in refresh: {e}")
+        logger.error("Error in refresh: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
@@ -240,18 +341,12 @@ def status(project_id: str):
         project_id: Project identifier
     """
     try:
-        from backend.performance_agent.agents.milestone_agent import MilestoneAgent
-        from backend.performance_agent.agents.task_agent import TaskAgent
-        from backend.performance_agent.agents.bottleneck_agent import BottleneckAgent
+        milestone_agent, task_agent, bottleneck_agent = _status_agents()
         
         # Get entities
-        milestone_agent = MilestoneAgent(chroma_manager)
-        task_agent = TaskAgent(chroma_manager)
-        bottleneck_agent = BottleneckAgent(chroma_manager)
-        
-        milestones = milestone_agent.get_project_milestones(project_id)
-        tasks = task_agent.get_project_tasks(project_id)
-        bottlenecks = bottleneck_agent.get_project_bottlenecks(project_id)
+        milestones = _status_cache.get('milestones', project_id, milestone_agent.get_project_milestones)
+        tasks = _status_cache.get('tasks', project_id, task_agent.get_project_tasks)
+        bottlenecks = _status_cache.get('bottlenecks', project_id, bottleneck_agent.get_project_bottlenecks)
         
         response = {
             "project_id": project_id,
@@ -263,10 +358,22 @@ def status(project_id: str):
         return jsonify(response), 200
         
     except Exception as e:
-        logger.error(f"Error in status: {e}")
+        logger.error("Error in status: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    """
+    Get the state of a queued first_generation/refresh run.
+    
+    Args:
+        job_id: Job identifier returned with the 202 response
+    """
+    body, status_code = _graph_jobs.status(job_id)
+    return jsonify(body), status_code
+
+
 @app.route('/a2a/message', methods=['POST'])
 def handle_a2a_message():
     """
@@ -282,35 +389,19 @@ def handle_a2a_message():
         message = A2AMessage.from_dict(data)
         
         # Handle refresh request
-        if message.message_type == MessageType.REQUEST:
+        if message.message_type is MessageType.REQUEST:
             if message.payload.get("action") == "refresh":
                 project_id = message.payload.get("project_id")
                 if project_id:
                     # Trigger refresh
-                    initial_state: PerformanceRefreshState = {
-                        "project_id": project_id,
-                        "llm_manager": llm_manager,
-                        "embeddings_manager": embeddings_manager,
-                        "chroma_manager": chroma_manager,
-                        "db_manager": db_manager,
-                        "orchestrator": None,
-                        "a2a_router": a2a_router,
-                        "performance_data_dir": "data/performance",
-                        "new_documents": [],
-                        "last_update": "",
-                        "refresh_result": {},
-                        "success": False,
-                        "error": ""
-                    }
-                    
-                    result = refresh_graph.invoke(initial_state)
+                    result = _run_refresh(project_id)
                     
                     # Send response
                     response_msg = A2AMessage.create_response(
                         sender_agent="performance-service",
                         recipient_agent=message.sender_agent,
                         payload={
-                            "success": result.get("success", False),
+                            "success": result["success"],
                             "project_id": project_id
                         },
                         correlation_id=message.message_id
@@ -321,10 +412,22 @@ def handle_a2a_message():
         return jsonify({"error": "Unknown action"}), 400
         
     except Exception as e:
-        logger.error(f"Error handling A2A message: {e}")
+        logger.error("Error handling A2A message: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
 if __name__ == '__main__':
     logger.info("Starting Performance Service on port 8002")
-    app.run(host='0.0.0.0', port=8002, debug=True)
+    debug_mode = os.getenv('PERFORMANCE_DEBUG', 'False').lower() == 'true'
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve and not debug_mode:
+        # Production WSGI server; graph runs block on LLM/ChromaDB I/O, so serve them on a thread pool
+        serve(app, host='0.0.0.0', port=8002, threads=int(os.getenv('PERFORMANCE_THREADS', '16')))
+    else:
+        if not serve:
+            logger.warning("waitress not installed, falling back to the threaded Flask server")
+        app.run(host='0.0.0.0', port=8002, debug=debug_mode, threaded=True)
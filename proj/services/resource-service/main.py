@@ -5,6 +5,9 @@ Flask service for Resource Agent with LangGraph workflows.
 
 import sys
 import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
 
 # Add project root to path FIRST
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -21,6 +24,7 @@ from backend.resource_agent.graphs.refresh_graph import refresh_graph, ResourceR
 from backend.resource_agent.chroma_manager import ResourceChromaManager
 from backend.a2a_router.router import A2ARouter
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
+from backend.service_utils import JobTable, lazy_singleton, wants_async
 from backend.llm_manager import LLMManager
 from backend.embeddings import EmbeddingsManager
 from backend.database import DatabaseManager
@@ -46,6 +50,147 @@ a2a_router.register_agent(
 )
 
 
+def _generation_state(project_id: str, document_id: str) -> ResourceGenerationState:
+    """Initial state for the first-time generation graph"""
+    return {
+        "project_id": project_id,
+        "document_id": document_id,
+        "llm_manager": llm_manager,
+        "embeddings_manager": embeddings_manager,
+        "chroma_manager": chroma_manager,
+        "db_manager": db_manager,
+        "orchestrator": None,
+        "a2a_router": a2a_router,
+        "tasks_retrieved": [],
+        "tasks_count": 0,
+        "task_analysis_result": {},
+        "dependencies_result": {},
+        "critical_path_result": {},
+        "overall_success": False,
+        "error": ""
+    }
+
+
+def _refresh_state(project_id: str) -> ResourceRefreshState:
+    """Initial state for the refresh graph"""
+    return {
+        "project_id": project_id,
+        "llm_manager": llm_manager,
+        "chroma_manager": chroma_manager,
+        "db_manager": db_manager,
+        "a2a_router": a2a_router,
+        "new_tasks_found": False,
+        "tasks_retrieved": [],
+        "task_analysis_result": {},
+        "dependencies_result": {},
+        "critical_path_result": {},
+        "refresh_result": {},
+        "success": False,
+        "error": ""
+    }
+
+
+# GET reads are cached per (kind, project_id) for READ_CACHE_TTL seconds and
+# dropped as soon as a generation, refresh or work team change touches the data
+READ_CACHE_TTL = float(os.getenv('RESOURCE_READ_CACHE_TTL', '30'))  # seconds
+_READ_CACHE_MAX_ENTRIES = 1024
+_read_cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+_read_cache_lock = threading.Lock()
+
+
+def _cached_read(kind: str, project_id: str, loader: Callable[[str], Any]) -> Any:
+    """Return loader(project_id), reusing a result loaded in the last READ_CACHE_TTL seconds"""
+    key = (kind, project_id)
+    with _read_cache_lock:
+        entry = _read_cache.pop(key, None)
+        if entry and time.monotonic() - entry[0] < READ_CACHE_TTL:
+            # Re-insert so the least recently read entries are evicted first
+            _read_cache[key] = entry
+            return entry[1]
+    
+    value = loader(project_id)
+    with _read_cache_lock:
+        _read_cache[key] = (time.monotonic(), value)
+        while len(_read_cache) > _READ_CACHE_MAX_ENTRIES:
+            _read_cache.pop(next(iter(_read_cache)))
+    return value
+
+
+def _invalidate_read_cache(project_id: Optional[str] = None):
+    """
+    Drop cached reads after resource data changes.
+    
+    Args:
+        project_id: Project whose reads to drop; None drops every project's
+            (work team member updates only know the member id)
+    """
+    with _read_cache_lock:
+        if project_id is None:
+            _read_cache.clear()
+        else:
+            for key in [k for k in _read_cache if k[1] == project_id]:
+                del _read_cache[key]
+
+
+# Agents are built once, on first use, and shared across requests
+@lazy_singleton
+def _resource_agent():
+    from backend.resource_agent.resource_agent import ResourceAgent
+    return ResourceAgent(llm_manager, embeddings_manager, db_manager)
+
+
+# Graph runs requested with ?async=true go to this pool and return 202 with a
+# job id at once; clients poll /jobs/<job_id> for the response they'd otherwise get
+GRAPH_WORKERS = int(os.getenv('RESOURCE_GRAPH_WORKERS', '4'))
+_graph_jobs = JobTable(GRAPH_WORKERS, 'resource-graph')
+
+
+def _run_generation(project_id: str, document_id: str) -> Dict[str, Any]:
+    """Run first-time generation for a project and format the endpoint response"""
+    initial_state = _generation_state(project_id, document_id)
+    
+    # Run graph
+    result = first_time_generation_graph.invoke(initial_state)
+    _invalidate_read_cache(project_id)
+    
+    # Format response
+    response = {
+        "success": result.get("overall_success", False),
+        "project_id": project_id,
+        "document_id": document_id,
+        "task_analysis": result.get("task_analysis_result", {}),
+        "dependencies": result.get("dependencies_result", {}),
+        "critical_path": result.get("critical_path_result", {})
+    }
+    
+    if result.get("error"):
+        response["error"] = result["error"]
+    
+    return response
+
+
+def _run_refresh(project_id: str) -> Dict[str, Any]:
+    """Run the refresh graph for a project and format the endpoint response"""
+    initial_state = _refresh_state(project_id)
+    
+    # Run graph
+    result = refresh_graph.invoke(initial_state)
+    _invalidate_read_cache(project_id)
+    
+    # Format response
+    response = {
+        "success": result.get("success", False),
+        "project_id": project_id,
+        "new_tasks_found": result.get("new_tasks_found", False),
+        "refresh_result": result.get("refresh_result", {})
+    }
+    
+    if result.get("error"):
+        response["error"] = result["error"]
+    
+    return response
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -75,42 +220,11 @@ def first_generation():
         project_id = data['project_id']
         document_id = data['document_id']
         
-        # Initialize state
-        initial_state: ResourceGenerationState = {
-            "project_id": project_id,
-            "document_id": document_id,
-            "llm_manager": llm_manager,
-            "embeddings_manager": embeddings_manager,
-            "chroma_manager": chroma_manager,
-            "db_manager": db_manager,
-            "orchestrator": None,
-            "a2a_router": a2a_router,
-            "tasks_retrieved": [],
-            "tasks_count": 0,
-            "task_analysis_result": {},
-            "dependencies_result": {},
-            "critical_path_result": {},
-            "overall_success": False,
-            "error": ""
-        }
+        if wants_async():
+            job_id = _graph_jobs.submit(_run_generation, project_id, document_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
         
-        # Run graph
-        result = first_time_generation_graph.invoke(initial_state)
-        
-        # Format response
-        response = {
-            "success": result.get("overall_success", False),
-            "project_id": project_id,
-            "document_id": document_id,
-            "task_analysis": result.get("task_analysis_result", {}),
-            "dependencies": result.get("dependencies_result", {}),
-            "critical_path": result.get("critical_path_result", {})
-        }
-        
-        if result.get("error"):
-            response["error"] = result["error"]
-        
-        return jsonify(response), 200
+        return jsonify(_run_generation(project_id, document_id)), 200
         
     except Exception as e:
         logger.error(f"Error in first_generation: {e}")
@@ -121,9 +235,7 @@ def first_generation():
 def get_tasks(project_id: str):
     """Get task analysis for a project"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        tasks = resource_agent.get_task_analysis(project_id)
+        tasks = _cached_read('tasks', project_id, _resource_agent().get_task_analysis)
         return jsonify({'tasks': tasks}), 200
     except Exception as e:
         logger.error(f"Error fetching tasks: {e}")
@@ -134,9 +246,7 @@ def get_tasks(project_id: str):
 def get_dependencies(project_id: str):
     """Get task dependencies for a project"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        dependencies = resource_agent.get_task_dependencies(project_id)
+        dependencies = _cached_read('dependencies', project_id, _resource_agent().get_task_dependencies)
         return jsonify({'dependencies': dependencies}), 200
     except Exception as e:
         logger.error(f"Error fetching dependencies: {e}")
@@ -147,9 +257,7 @@ def get_dependencies(project_id: str):
 def get_critical_path(project_id: str):
     """Get critical path for a project"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        critical_path = resource_agent.get_critical_path(project_id)
+        critical_path = _cached_read('critical_path', project_id, _resource_agent().get_critical_path)
         return jsonify({'critical_path': critical_path}), 200
     except Exception as e:
         logger.error(f"Error fetching critical path: {e}")
@@ -160,9 +268,7 @@ def get_critical_path(project_id: str):
 def get_work_team(project_id: str):
     """Get work team for a project"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        work_team = resource_agent.get_work_team(project_id)
+        work_team = _cached_read('work_team', project_id, _resource_agent().get_work_team)
         return jsonify({'work_team': work_team}), 200
     except Exception as e:
         logger.error(f"Error fetching work team: {e}")
@@ -177,14 +283,12 @@ def add_work_team_member(project_id: str):
         if not data or 'name' not in data:
             return jsonify({"error": "name is required"}), 400
         
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        
-        result = resource_agent.resource_optimization_agent.add_work_team_member(
+        result = _resource_agent().resource_optimization_agent.add_work_team_member(
             project_id,
             data['name'],
             data.get('type', 'person')
         )
+        _invalidate_read_cache(project_id)
         
         return jsonify(result), 200 if result.get('success') else 500
         
@@ -201,13 +305,11 @@ def update_work_team_member(team_member_id: str):
         if not data:
             return jsonify({"error": "Request body is required"}), 400
         
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        
-        success = resource_agent.resource_optimization_agent.update_work_team_member(
+        success = _resource_agent().resource_optimization_agent.update_work_team_member(
             team_member_id,
             data
         )
+        _invalidate_read_cache()
         
         return jsonify({'success': success}), 200 if success else 500
         
@@ -220,10 +322,8 @@ def update_work_team_member(team_member_id: str):
 def delete_work_team_member(team_member_id: str):
     """Delete a work team member"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        
-        success = resource_agent.resource_optimization_agent.delete_work_team_member(team_member_id)
+        success = _resource_agent().resource_optimization_agent.delete_work_team_member(team_member_id)
+        _invalidate_read_cache()
         
         return jsonify({'success': success}), 200 if success else 500
         
@@ -236,9 +336,7 @@ def delete_work_team_member(team_member_id: str):
 def get_financial_summary(project_id: str):
     """Get financial summary for resource allocation"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        summary = resource_agent.get_financial_summary(project_id)
+        summary = _cached_read('financial_summary', project_id, _resource_agent().get_financial_summary)
         return jsonify(summary), 200
     except Exception as e:
         logger.error(f"Error fetching financial summary: {e}")
@@ -249,13 +347,11 @@ def get_financial_summary(project_id: str):
 def assign_resources(project_id: str):
     """AI-based resource assignment"""
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        
-        result = resource_agent.resource_optimization_agent.assign_resources_ai(
+        result = _resource_agent().resource_optimization_agent.assign_resources_ai(
             project_id,
             llm_manager
         )
+        _invalidate_read_cache(project_id)
         
         return jsonify(result), 200 if result.get('success') else 500
         
@@ -272,13 +368,11 @@ def update_resource_assignment(team_member_id: str):
         if not data or 'amount' not in data:
             return jsonify({"error": "amount is required"}), 400
         
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        
-        success = resource_agent.resource_optimization_agent.update_resource_assignment(
+        success = _resource_agent().resource_optimization_agent.update_resource_assignment(
             team_member_id,
             float(data['amount'])
         )
+        _invalidate_read_cache()
         
         return jsonify({'success': success}), 200 if success else 500
         
@@ -296,38 +390,11 @@ def refresh(project_id: str):
         project_id: Project identifier
     """
     try:
-        # Initialize state
-        initial_state: ResourceRefreshState = {
-            "project_id": project_id,
-            "llm_manager": llm_manager,
-            "chroma_manager": chroma_manager,
-            "db_manager": db_manager,
-            "a2a_router": a2a_router,
-            "new_tasks_found": False,
-            "tasks_retrieved": [],
-            "task_analysis_result": {},
-            "dependencies_result": {},
-            "critical_path_result": {},
-            "refresh_result": {},
-            "success": False,
-            "error": ""
-        }
-        
-        # Run graph
-        result = refresh_graph.invoke(initial_state)
-        
-        # Format response
-        response = {
-            "success": result.get("success", False),
-            "project_id": project_id,
-            "new_tasks_found": result.get("new_tasks_found", False),
-            "refresh_result": result.get("refresh_result", {})
-        }
-        
-        if result.get("error"):
-            response["error"] = result["error"]
+        if wants_async():
+            job_id = _graph_jobs.submit(_run_refresh, project_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
         
-        return jsonify(response), 200
+        return jsonify(_run_refresh(project_id)), 200
         
     except Exception as e:
         logger.error(f"Error in refresh: {e}")
@@ -343,10 +410,7 @@ def status(project_id: str):
         project_id: Project identifier
     """
     try:
-        from backend.resource_agent.resource_agent import ResourceAgent
-        resource_agent = ResourceAgent(llm_manager, embeddings_manager, db_manager)
-        
-        status_data = resource_agent._get_current_resource_data(project_id)
+        status_data = _cached_read('status', project_id, _resource_agent()._get_current_resource_data)
         
         return jsonify(status_data), 200
         
@@ -355,6 +419,18 @@ def status(project_id: str):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    """
+    Get the state of a queued first_generation/refresh run.
+    
+    Args:
+        job_id: Job identifier returned with the 202 response
+    """
+    body, status_code = _graph_jobs.status(job_id)
+    return jsonify(body), status_code
+
+
 @app.route('/a2a/message', methods=['POST'])
 def handle_a2a_message():
     """
@@ -375,23 +451,7 @@ def handle_a2a_message():
                 project_id = message.payload.get("project_id")
                 if project_id:
                     # Trigger refresh
-                    initial_state: ResourceRefreshState = {
-                        "project_id": project_id,
-                        "llm_manager": llm_manager,
-                        "chroma_manager": chroma_manager,
-                        "db_manager": db_manager,
-                        "a2a_router": a2a_router,
-                        "new_tasks_found": False,
-                        "tasks_retrieved": [],
-                        "task_analysis_result": {},
-                        "dependencies_result": {},
-                        "critical_path_result": {},
-                        "refresh_result": {},
-                        "success": False,
-                        "error": ""
-                    }
-                    
-                    result = refresh_graph.invoke(initial_state)
+                    result = _run_refresh(project_id)
                     
                     # Send response
                     response_msg = A2AMessage.create_response(
@@ -415,5 +475,17 @@ def handle_a2a_message():
 
 if __name__ == '__main__':
     logger.info("Starting Resource Service on port 8004")
-    app.run(host='0.0.0.0', port=8004, debug=True)
+    debug_mode = os.getenv('RESOURCE_DEBUG', 'False').lower() == 'true'
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve and not debug_mode:
+        # Production WSGI server; graph runs block on LLM/ChromaDB I/O, so serve them on a thread pool
+        serve(app, host='0.0.0.0', port=8004, threads=int(os.getenv('RESOURCE_THREADS', '16')))
+    else:
+        if not serve:
+            logger.warning("waitress not installed, falling back to the threaded Flask server")
+        app.run(host='0.0.0.0', port=8004, debug=debug_mode, threaded=True)
 
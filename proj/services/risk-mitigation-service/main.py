@@ -22,6 +22,7 @@ from backend.risk_mitigation_agent.risk_mitigation_agent import RiskMitigationAg
 from backend.risk_mitigation_agent.agents.what_if_simulator_agent import WhatIfSimulatorAgent
 from backend.a2a_router.router import A2ARouter
 from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
+from backend.service_utils import JobTable, wants_async
 from backend.llm_manager import LLMManager
 from backend.embeddings import EmbeddingsManager
 from backend.database import DatabaseManager
@@ -57,6 +58,12 @@ a2a_router.register_agent(
 )
 
 
+# Runs requested with ?async=true go to this pool and return 202 with a job id
+# at once; clients poll /jobs/<job_id> for the response they'd otherwise get
+GRAPH_WORKERS = int(os.getenv('RISK_GRAPH_WORKERS', '4'))
+_graph_jobs = JobTable(GRAPH_WORKERS, 'risk-graph')
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -84,6 +91,10 @@ def first_generation():
         
         project_id = data['project_id']
         
+        if wants_async():
+            job_id = _graph_jobs.submit(risk_mitigation_agent.initialize_risk_analysis, project_id)
+            return jsonify({"job_id": job_id, "status": "accepted"}), 202
+        
         # Run first-time generation
         result = risk_mitigation_agent.initialize_risk_analysis(project_id)
         
@@ -191,6 +202,18 @@ def risk_summary(project_id: str):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    """
+    Get the state of a queued first_generation run.
+    
+    Args:
+        job_id: Job identifier returned with the 202 response
+    """
+    body, status_code = _graph_jobs.status(job_id)
+    return jsonify(body), status_code
+
+
 @app.route('/a2a/message', methods=['POST'])
 def handle_a2a_message():
     """
@@ -284,5 +307,17 @@ def handle_a2a_message():
 
 if __name__ == '__main__':
     logger.info("Starting Risk Mitigation Service on port 8008")
-    app.run(host='0.0.0.0', port=8008, debug=True)
+    debug_mode = os.getenv('RISK_DEBUG', 'False').lower() == 'true'
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve and not debug_mode:
+        # Production WSGI server; graph runs block on LLM/ChromaDB I/O, so serve them on a thread pool
+        serve(app, host='0.0.0.0', port=8008, threads=int(os.getenv('RISK_THREADS', '16')))
+    else:
+        if not serve:
+            logger.warning("waitress not installed, falling back to the threaded Flask server")
+        app.run(host='0.0.0.0', port=8008, debug=debug_mode, threaded=True)
 
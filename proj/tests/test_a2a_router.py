@@ -0,0 +1,143 @@
+"""
+Test file for A2A Router HTTP delivery
+Delivers messages to a stub agent served on a local port
+"""
+
+import sys
+import os
+import json
+import socket
+import threading
+import time
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import unittest
+from unittest.mock import patch
+from backend.a2a_router import router as router_module
+from backend.a2a_router.router import A2ARouter
+from backend.a2a_protocol.a2a_message import A2AMessage, MessageType
+
+
+class StubAgentHandler(BaseHTTPRequestHandler):
+    """
+    Stub agent /a2a/message endpoint, answering by the request's action:
+    'echo' replies with an A2A response, 'fail' with a plain HTTP 500 and
+    'slow' with an A2A response after a delay
+    """
+
+    posts = []
+
+    def do_POST(self):
+        message = A2AMessage.from_json(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        action = message.payload.get('action')
+        self.posts.append(action)
+
+        if action == 'fail':
+            body, status = json.dumps({'error': 'Agent crashed'}).encode(), 500
+        else:
+            if action == 'slow':
+                time.sleep(1.0)
+            reply = A2AMessage.create_response(
+                sender_agent=message.recipient_agent,
+                recipient_agent=message.sender_agent,
+                payload={'echo': message.payload},
+                correlation_id=message.message_id
+            )
+            body, status = reply.to_json().encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _unused_port() -> int:
+    """A local port nothing is listening on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestA2ARouterHTTPDelivery(unittest.TestCase):
+    """Test send_message/send_message_async to URL-registered agents"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubAgentHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubAgentHandler.posts.clear()
+        self.router = A2ARouter()
+        self.router.register_agent('stub-agent', agent_url=f"http://127.0.0.1:{self.server.server_port}")
+
+    def _request(self, action: str, recipient: str = 'stub-agent') -> A2AMessage:
+        return A2AMessage.create_request(
+            sender_agent='test-client',
+            recipient_agent=recipient,
+            payload={'action': action}
+        )
+
+    def test_delivery_success(self):
+        """Test the agent's A2A reply is returned and logged"""
+        response = self.router.send_message(self._request('echo'))
+
+        self.assertEqual(response.message_type, MessageType.RESPONSE)
+        self.assertEqual(response.payload, {'echo': {'action': 'echo'}})
+        self.assertEqual(self.router.get_agent_info('stub-agent')['message_count'], 1)
+        directions = [entry['direction'] for entry in self.router.get_message_history()]
+        self.assertEqual(directions, ['outgoing', 'incoming'])
+
+    def test_non_a2a_error_reply(self):
+        """Test an HTTP error without an A2A body becomes an error message, sent once"""
+        response = self.router.send_message(self._request('fail'))
+
+        self.assertEqual(response.message_type, MessageType.ERROR)
+        self.assertIn('Agent crashed', response.payload['error'])
+        self.assertEqual(StubAgentHandler.posts, ['fail'])
+
+    def test_read_timeout_is_not_resent(self):
+        """Test a delivery that times out after reaching the agent returns an error without re-posting"""
+        with patch.object(router_module, 'HTTP_DELIVERY_TIMEOUT', 0.2):
+            response = self.router.send_message(self._request('slow'))
+
+        self.assertEqual(response.message_type, MessageType.ERROR)
+        self.assertIn('Failed to deliver message', response.payload['error'])
+        self.assertEqual(StubAgentHandler.posts, ['slow'])
+
+    def test_connect_failure(self):
+        """Test an agent that isn't listening gives an error message quickly"""
+        self.router.register_agent('down-agent', agent_url=f"http://127.0.0.1:{_unused_port()}")
+
+        started = time.monotonic()
+        response = self.router.send_message(self._request('echo', recipient='down-agent'))
+
+        self.assertEqual(response.message_type, MessageType.ERROR)
+        self.assertIn('Failed to deliver message', response.payload['error'])
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(self.router.get_agent_info('down-agent')['message_count'], 0)
+
+    def test_async_delivery_success(self):
+        """Test send_message_async delivers over HTTP too"""
+        response = asyncio.run(self.router.send_message_async(self._request('echo')))
+
+        self.assertEqual(response.message_type, MessageType.RESPONSE)
+        self.assertEqual(StubAgentHandler.posts, ['echo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Test file for the API Gateway service
+Proxies requests to a stub backend served on a local port
+"""
+
+import sys
+import os
+import socket
+import threading
+import time
+import importlib.util
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import unittest
+from unittest.mock import patch
+
+# services/api-gateway isn't an importable package name, so load main.py by path
+_spec = importlib.util.spec_from_file_location(
+    'api_gateway_main', os.path.join(project_root, 'services', 'api-gateway', 'main.py')
+)
+gateway = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gateway)
+
+
+class StubBackendHandler(BaseHTTPRequestHandler):
+    """Answers /ok at once and /slow after a delay, counting the requests it receives"""
+
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path.startswith('/slow'):
+            time.sleep(1.0)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGatewayForwarding(unittest.TestCase):
+    """Test forward_request against a stub backend"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubBackendHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.backend_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubBackendHandler.hits.clear()
+        self.enterContext(patch.dict(gateway.SERVICE_URLS, {'scheduler': self.backend_url}))
+        self.enterContext(patch.dict(gateway._breakers, {'scheduler': {'failures': 0, 'open_until': 0.0}}))
+
+    def test_forward_success(self):
+        """Test a proxied GET returns the backend response"""
+        response = gateway.forward_request('scheduler', '/ok', 'GET', {})
+        self.assertIsNotNone(response)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(StubBackendHandler.hits, ['/ok'])
+
+    def test_read_timeout_not_retried(self):
+        """Test a read timeout gives up after one request instead of re-sending it"""
+        with patch.object(gateway, 'BACKEND_TIMEOUT', (1, 0.2)):
+            response = gateway.forward_request('scheduler', '/slow', 'GET', {})
+        self.assertIsNone(response)
+        self.assertEqual(StubBackendHandler.hits, ['/slow'])
+
+
+
+class TestGatewayCircuitBreaker(unittest.TestCase):
+    """Test the per-service circuit breaker in forward_request"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubBackendHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.backend_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            cls.down_url = f"http://127.0.0.1:{sock.getsockname()[1]}"  # Nothing listens here
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubBackendHandler.hits.clear()
+        self.breaker = {'failures': 0, 'open_until': 0.0}
+        self.enterContext(patch.dict(gateway.SERVICE_URLS, {'scheduler': self.down_url}))
+        self.enterContext(patch.dict(gateway._breakers, {'scheduler': self.breaker}))
+        self.enterContext(patch.object(gateway, 'BREAKER_FAILURE_THRESHOLD', 2))
+        self.enterContext(patch.object(gateway, 'BREAKER_OPEN_SECONDS', 60))
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens at the threshold and then fails fast without calling the backend"""
+        self.assertIsNone(gateway.forward_request('scheduler', '/ok', 'GET', {}))
+        self.assertEqual(self.breaker['open_until'], 0.0)
+        self.assertIsNone(gateway.forward_request('scheduler', '/ok', 'GET', {}))
+        self.assertGreater(self.breaker['open_until'], time.monotonic())
+
+        # Backend is back, but the circuit is still open
+        gateway.SERVICE_URLS['scheduler'] = self.backend_url
+        self.assertIsNone(gateway.forward_request('scheduler', '/ok', 'GET', {}))
+        self.assertEqual(StubBackendHandler.hits, [])
+
+    def test_open_circuit_returns_503(self):
+        """Test a proxied route answers 503 while the service's circuit is open"""
+        self.breaker['open_until'] = time.monotonic() + 60
+        response = gateway.app.test_client().get('/scheduler/ok')
+        self.assertEqual(response.status_code, 503)
+
+    def test_half_open_trial_success_closes(self):
+        """Test the first call after the open period is forwarded and a success resets the count"""
+        gateway.SERVICE_URLS['scheduler'] = self.backend_url
+        self.breaker.update({'failures': 1, 'open_until': time.monotonic() - 1})
+
+        response = gateway.forward_request('scheduler', '/ok', 'GET', {})
+        self.assertIsNotNone(response)
+        response.close()
+        self.assertEqual(StubBackendHandler.hits, ['/ok'])
+        self.assertEqual(self.breaker['failures'], 0)
+
+    def test_half_open_trial_failure_counts_again(self):
+        """Test failures after the open period count toward reopening the circuit"""
+        self.breaker['open_until'] = time.monotonic() - 1
+
+        self.assertIsNone(gateway.forward_request('scheduler', '/ok', 'GET', {}))
+        self.assertEqual(self.breaker['failures'], 1)
+        self.assertIsNone(gateway.forward_request('scheduler', '/ok', 'GET', {}))
+        self.assertGreater(self.breaker['open_until'], time.monotonic())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Test file for the JSON-file DatabaseManager
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import unittest
+from backend.database import DatabaseManager
+
+
+class TestDatabaseManager(unittest.TestCase):
+    """Test DatabaseManager against JSON files in a temporary working directory"""
+
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.work_dir = tempfile.mkdtemp()
+        os.chdir(self.work_dir)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_read_after_write(self):
+        """Test a created project is returned by the next read"""
+        db = DatabaseManager()
+        self.assertEqual(db.get_all_projects(), [])
+
+        db.create_project({'id': 'p1', 'name': 'Alpha'})
+        self.assertEqual(db.get_project('p1'), {'id': 'p1', 'name': 'Alpha'})
+        self.assertEqual([p['id'] for p in db.get_all_projects()], ['p1'])
+
+    def test_write_in_same_mtime_tick_and_size_is_seen(self):
+        """Test another instance's same-size write is read even when the mtime doesn't move"""
+        reader = DatabaseManager()
+        writer = DatabaseManager()
+        reader.create_project({'id': 'p1', 'name': 'Alpha'})
+        self.assertEqual(reader.get_project('p1')['name'], 'Alpha')
+        before = os.stat(reader.projects_file)
+
+        writer._write_json(writer.projects_file, [{'id': 'p1', 'name': 'Bravo'}])
+        os.utime(writer.projects_file, ns=(before.st_atime_ns, before.st_mtime_ns))
+        self.assertEqual(os.stat(writer.projects_file).st_size, before.st_size)
+
+        self.assertEqual(reader.get_project('p1')['name'], 'Bravo')
+
+    def test_returned_records_are_copies(self):
+        """Test mutating a returned record doesn't change what later reads see"""
+        db = DatabaseManager()
+        db.create_project({'id': 'p1', 'name': 'Alpha'})
+        db.create_document({'id': 'd1', 'project_id': 'p1'})
+
+        db.get_all_projects()[0]['name'] = 'Changed'
+        db.get_project('p1')['name'] = 'Changed'
+        db.get_project_documents('p1')[0]['project_id'] = 'p2'
+
+        self.assertEqual(db.get_project('p1')['name'], 'Alpha')
+        self.assertEqual(len(db.get_project_documents('p1')), 1)
+
+    def test_concurrent_appends_are_kept(self):
+        """Test appends from several threads and instances all land in the file"""
+        managers = [DatabaseManager() for _ in range(4)]
+
+        def append_documents(db, worker):
+            for i in range(25):
+                db.create_document({'id': f"d{worker}_{i}", 'project_id': 'p1'})
+
+        threads = [
+            threading.Thread(target=append_documents, args=(db, worker))
+            for worker, db in enumerate(managers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(DatabaseManager().get_project_documents('p1')), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
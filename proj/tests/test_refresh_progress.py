@@ -0,0 +1,114 @@
+"""
+Test file for refresh progress tracking
+Tests the progress file helpers and how the refresh graph nodes use them
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import unittest
+from unittest.mock import MagicMock, patch
+from backend.refresh_progress import load_refresh_progress, save_refresh_progress, clear_refresh_progress
+from backend.financial_agent.nodes import extraction_nodes as financial_extraction_nodes
+from backend.financial_agent.nodes import analysis_nodes as financial_analysis_nodes
+from backend.performance_agent.nodes import analysis_nodes as performance_analysis_nodes
+
+
+class TestRefreshProgressFile(unittest.TestCase):
+    """Test load/save/clear of the progress file"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_save_load_clear(self):
+        """Test saved steps load back and are gone after clear"""
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), set())
+
+        save_refresh_progress(self.data_dir, 'p1', {'d1:details', 'd1:transactions'})
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), {'d1:details', 'd1:transactions'})
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p2'), set())
+
+        clear_refresh_progress(self.data_dir, 'p1')
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), set())
+        clear_refresh_progress(self.data_dir, 'p1')  # Clearing twice is harmless
+
+    def test_unreadable_file_loads_empty(self):
+        """Test a corrupt progress file means nothing is skipped"""
+        with open(os.path.join(self.data_dir, 'p1_refresh_progress.json'), 'w') as f:
+            f.write('{not json')
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), set())
+
+
+class TestRefreshProgressNodes(unittest.TestCase):
+    """Test the refresh nodes record, skip and clear progress"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def _financial_state(self):
+        return {
+            'project_id': 'p1',
+            'new_documents': [{'id': 'd1'}],
+            'llm_manager': MagicMock(),
+            'embeddings_manager': MagicMock(),
+            'chroma_manager': MagicMock(),
+            'financial_data_dir': self.data_dir,
+            'refresh_result': {}
+        }
+
+    @patch.object(financial_extraction_nodes, 'TransactionAgent')
+    @patch.object(financial_extraction_nodes, 'FinancialDetailsAgent')
+    def test_failed_step_is_reported_and_retried(self, mock_details_agent, mock_transaction_agent):
+        """Test a failed extraction isn't recorded, so the next refresh retries only it"""
+        extract_details = mock_details_agent.return_value.extract_financial_details
+        extract_transactions = mock_transaction_agent.return_value.extract_transactions
+        extract_details.return_value = {'success': False, 'error': 'No details parsed'}
+        extract_transactions.return_value = {'success': True}
+
+        state = financial_extraction_nodes.extract_from_new_docs_node(self._financial_state())
+        self.assertEqual(state['refresh_result']['failed_steps'], ['d1:details'])
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), {'d1:transactions'})
+
+        extract_details.return_value = {'success': True}
+        state = financial_extraction_nodes.extract_from_new_docs_node(self._financial_state())
+        self.assertEqual(state['refresh_result']['failed_steps'], [])
+        self.assertEqual(extract_details.call_count, 2)
+        self.assertEqual(extract_transactions.call_count, 1)
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), {'d1:details', 'd1:transactions'})
+
+    def test_update_timestamp_clears_progress(self):
+        """Test the financial refresh forgets its progress once the timestamp is written"""
+        save_refresh_progress(self.data_dir, 'p1', {'d1:details'})
+        state = financial_analysis_nodes.update_timestamp_node(self._financial_state())
+        self.assertTrue(state['success'])
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), set())
+
+    @patch.object(performance_analysis_nodes, 'TaskAgent')
+    def test_recalculate_completion_clears_progress(self, mock_task_agent):
+        """Test the performance refresh forgets its progress once completion is recalculated"""
+        mock_task_agent.return_value.get_project_tasks.return_value = []
+        save_refresh_progress(self.data_dir, 'p1', {'d1:milestones'})
+        state = performance_analysis_nodes.recalculate_completion_node({
+            'project_id': 'p1',
+            'chroma_manager': MagicMock(),
+            'performance_data_dir': self.data_dir,
+            'refresh_result': {}
+        })
+        self.assertTrue(state['success'])
+        self.assertEqual(load_refresh_progress(self.data_dir, 'p1'), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
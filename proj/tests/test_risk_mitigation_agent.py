@@ -5,6 +5,9 @@ Tests individual components and end-to-end functionality
 
 import sys
 import os
+import json
+import threading
+import time
 
 # Add project root to path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -126,6 +129,80 @@ class TestWhatIfSimulatorAgent(unittest.TestCase):
         self.assertEqual(graph_data['nodes'][0]['id'], 'b1')
         self.assertEqual(graph_data['nodes'][0]['severity'], 'High')
 
+    def test_order_bottlenecks_by_priority(self):
+        """Test LLM ordering is applied and unlisted bottlenecks go last"""
+        mock_llm = MagicMock()
+        mock_llm.simple_chat.return_value = {
+            'success': True,
+            'response': '```json\n{"ordered_ids": ["b3", "b1"]}\n```'
+        }
+        bottlenecks = [
+            {'id': 'b1', 'bottleneck': 'Bottleneck 1'},
+            {'id': 'b2', 'bottleneck': 'Bottleneck 2'},
+            {'id': 'b3', 'bottleneck': 'Bottleneck 3'}
+        ]
+
+        ordered = self.simulator.order_bottlenecks_by_priority(bottlenecks, mock_llm)
+
+        self.assertEqual([b['id'] for b in ordered], ['b3', 'b1', 'b2'])
+        self.assertEqual([b['order_priority'] for b in ordered], [1, 2, 4])
+
+    def test_consequences_loaded_once_per_project(self):
+        """Test consequence lookups share one DB load until a new analysis is stored"""
+        mock_chroma = MagicMock()
+        mock_chroma.get_risk_data.return_value = [
+            {'content': '["Delay"]', 'metadata': {'bottleneck_id': 'b1'}},
+            {'content': '["Overrun"]', 'metadata': {'bottleneck_id': 'enhanced_b2'}}
+        ]
+        simulator = WhatIfSimulatorAgent(mock_chroma)
+
+        self.assertEqual(simulator.get_consequences_from_db('b1', 'p1')['consequence_points'], ['Delay'])
+        self.assertEqual(simulator.get_consequences_from_db('b2', 'p1')['consequence_points'], ['Overrun'])
+        self.assertIsNone(simulator.get_consequences_from_db('b3', 'p1'))
+        self.assertEqual(mock_chroma.get_risk_data.call_count, 1)
+
+        mock_llm = MagicMock()
+        mock_llm.simple_chat.return_value = {'success': True, 'response': '{"consequence_points": ["Late"]}'}
+        simulator.analyze_consequences('b3', 'Bottleneck 3', [], mock_llm, project_id='p1', force_regenerate=True)
+        simulator.get_consequences_from_db('b1', 'p1')
+        self.assertEqual(mock_chroma.get_risk_data.call_count, 2)
+
+
+    def test_semantic_cache_scoped_to_titles_context(self):
+        """Test a cached analysis is only reused for the same other-titles context"""
+        entries = {}
+
+        def upsert_semantic_entry(collection_type, item_id, embedding, text, metadata, ttl_seconds):
+            entries[item_id] = {'id': item_id, 'content': text, 'metadata': metadata}
+            return True
+
+        def get_semantic_match(collection_type, embedding, max_distance, where=None):
+            for entry in entries.values():
+                if all(entry['metadata'].get(k) == v for k, v in (where or {}).items()):
+                    return entry
+            return None
+
+        mock_chroma = MagicMock()
+        mock_chroma.model.encode.return_value.tolist.return_value = [[0.1, 0.2]]
+        mock_chroma.get_risk_data.return_value = []
+        mock_chroma.upsert_semantic_entry.side_effect = upsert_semantic_entry
+        mock_chroma.get_semantic_match.side_effect = get_semantic_match
+        simulator = WhatIfSimulatorAgent(mock_chroma)
+
+        mock_llm = MagicMock()
+        mock_llm.simple_chat.return_value = {'success': True, 'response': '{"consequence_points": ["Late"]}'}
+        titles = ['Vendor delay', 'Budget freeze']
+
+        simulator.analyze_consequences('b1', 'Vendor delay', titles, mock_llm, project_id='p1')
+        reused = simulator.analyze_consequences('b1', 'Vendor delay', titles, mock_llm, project_id='p2')
+        self.assertEqual(reused['from_cache'], 'semantic')
+        self.assertEqual(mock_llm.simple_chat.call_count, 1)
+
+        other = simulator.analyze_consequences('b1', 'Vendor delay', ['Vendor delay', 'Staff shortage'],
+                                               mock_llm, project_id='p3')
+        self.assertNotIn('from_cache', other)
+        self.assertEqual(mock_llm.simple_chat.call_count, 2)
+        self.assertEqual(len(entries), 2)
 
 class TestRiskMitigationAgent(unittest.TestCase):
     """Test RiskMitigationAgent"""
@@ -167,6 +244,97 @@ class TestRiskMitigationAgent(unittest.TestCase):
         self.assertGreater(summary['risk_score'], 0)
 
 
+    def test_concurrent_consequence_analyses_share_one_llm_call(self):
+        """Test concurrent callers for the same bottleneck share one LLM call but get their own dicts"""
+        mock_chroma = MagicMock()
+        mock_chroma.model.encode.return_value.tolist.return_value = [[0.1, 0.2]]
+        mock_chroma.get_risk_data.return_value = []
+        mock_chroma.get_semantic_match.return_value = None
+        simulator = WhatIfSimulatorAgent(mock_chroma)
+
+        llm_entered = threading.Event()
+        release_llm = threading.Event()
+
+        def slow_chat(prompt):
+            llm_entered.set()
+            release_llm.wait(5)
+            return {'success': True, 'response': '{"consequence_points": ["Late"]}'}
+
+        mock_llm = MagicMock()
+        mock_llm.simple_chat.side_effect = slow_chat
+        results = []
+
+        def analyze():
+            results.append(simulator.analyze_consequences('b1', 'Vendor delay', ['Vendor delay'],
+                                                          mock_llm, project_id='p1'))
+
+        owner = threading.Thread(target=analyze)
+        owner.start()
+        self.assertTrue(llm_entered.wait(5))
+        waiter = threading.Thread(target=analyze)
+        waiter.start()
+        time.sleep(0.2)  # Let the second caller reach the in-flight run
+        release_llm.set()
+        owner.join(5)
+        waiter.join(5)
+
+        self.assertEqual(mock_llm.simple_chat.call_count, 1)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], results[1])
+        self.assertIsNot(results[0], results[1])
+
+class FakeAddOnlyChromaManager:
+    """Risk store that, like Chroma's add(), silently keeps the existing record for a reused id"""
+
+    def __init__(self):
+        self.records = {}
+
+    def store_risk_data(self, collection_type, data, project_id, metadata=None):
+        for item in data:
+            self.records.setdefault(item['id'], {
+                'id': item['id'],
+                'content': item['text'],
+                'metadata': {'project_id': project_id, **item['metadata']}
+            })
+        return len(data)
+
+    def delete_risk_data(self, collection_type, item_id):
+        self.records.pop(item_id, None)
+        return True
+
+    def get_risk_data(self, collection_type, project_id):
+        return [r for r in self.records.values() if r['metadata']['project_id'] == project_id]
+
+
+class TestRiskOrderingStorage(unittest.TestCase):
+    """Test the stored ordering follows re-initialization"""
+
+    @patch('backend.risk_mitigation_agent.risk_mitigation_agent.RiskChromaManager', FakeAddOnlyChromaManager)
+    def test_reinitialization_replaces_ordering_titles(self):
+        """Test re-initializing with changed bottlenecks stores the new titles and order"""
+        risk_agent = RiskMitigationAgent(MagicMock(), MagicMock(), MagicMock())
+        risk_agent._ensure_risk_data_directory = lambda: None
+        simulator = MagicMock()
+        simulator.order_bottlenecks_by_priority.side_effect = lambda bottlenecks, llm: bottlenecks
+        simulator.analyze_bottlenecks_pipelined.side_effect = (
+            lambda bottlenecks, *args, **kwargs: ([{}] * len(bottlenecks), [{}] * len(bottlenecks))
+        )
+        risk_agent.what_if_simulator = simulator
+
+        simulator.fetch_project_bottlenecks.return_value = [{'id': 'b1', 'bottleneck': 'Old bottleneck'}]
+        self.assertTrue(risk_agent.initialize_risk_analysis('p1')['success'])
+
+        simulator.fetch_project_bottlenecks.return_value = [
+            {'id': 'b2', 'bottleneck': 'Vendor delay'},
+            {'id': 'b3', 'bottleneck': 'Budget freeze'}
+        ]
+        self.assertTrue(risk_agent.initialize_risk_analysis('p1')['success'])
+
+        self.assertEqual(risk_agent._get_all_titles('p1', []), ['Vendor delay', 'Budget freeze'])
+        ordering = risk_agent.chroma_manager.get_risk_data('ordering', 'p1')
+        self.assertEqual(len(ordering), 1)
+        self.assertEqual(json.loads(ordering[0]['content']), ['b2', 'b3'])
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for end-to-end functionality"""
     
@@ -204,6 +372,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestRiskChromaManager))
     suite.addTests(loader.loadTestsFromTestCase(TestWhatIfSimulatorAgent))
     suite.addTests(loader.loadTestsFromTestCase(TestRiskMitigationAgent))
+    suite.addTests(loader.loadTestsFromTestCase(TestRiskOrderingStorage))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     
     # Run tests
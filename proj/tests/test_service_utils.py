@@ -0,0 +1,60 @@
+"""
+Test file for the helpers shared by the agent Flask services
+"""
+
+import sys
+import os
+import threading
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import unittest
+from backend.service_utils import StatusCache
+
+
+class TestStatusCache(unittest.TestCase):
+    """Test StatusCache"""
+
+    def test_reuses_value_until_invalidated(self):
+        """Test a loaded value is reused within the ttl and reloaded after invalidate()"""
+        cache = StatusCache(60, ('tasks',))
+        loads = []
+
+        def loader(project_id):
+            loads.append(project_id)
+            return len(loads)
+
+        self.assertEqual(cache.get('tasks', 'p1', loader), 1)
+        self.assertEqual(cache.get('tasks', 'p1', loader), 1)
+        cache.invalidate('p1')
+        self.assertEqual(cache.get('tasks', 'p1', loader), 2)
+
+    def test_read_in_flight_during_invalidate_is_not_cached(self):
+        """Test a read that started before invalidate() doesn't put its stale value back"""
+        cache = StatusCache(60, ('tasks',))
+        load_started = threading.Event()
+        release_load = threading.Event()
+        results = {}
+
+        def stale_loader(project_id):
+            load_started.set()
+            release_load.wait(5)
+            return 'before refresh'
+
+        reader = threading.Thread(
+            target=lambda: results.setdefault('stale', cache.get('tasks', 'p1', stale_loader))
+        )
+        reader.start()
+        self.assertTrue(load_started.wait(5))
+        cache.invalidate('p1')  # The refresh finishes while the read is still loading
+        release_load.set()
+        reader.join(5)
+
+        self.assertEqual(results['stale'], 'before refresh')
+        self.assertEqual(cache.get('tasks', 'p1', lambda project_id: 'after refresh'), 'after refresh')
+
+
+if __name__ == '__main__':
+    unittest.main()